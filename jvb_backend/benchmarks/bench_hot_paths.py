@@ -0,0 +1,325 @@
+"""Benchmark: the helpers every request runs, compared across commits.
+
+Groups (`--group`, all by default):
+
+ - `jwt`: `jwt.encode`/`jwt.decode` of an access-token payload with
+   HS256, RS256, ES256 and EdDSA keys, then the app's own helpers at the
+   configured algorithm: `create_access_token`, `decode_token` on a
+   token-cache hit and miss (miss = signature check, revocation Bloom
+   filter, cache fill), `create_refresh_token`, `decode_refresh_token`;
+ - `argon2`: `hash`/`verify` for each `--argon2` parameter set
+   (time_cost,memory_cost_kib,parallelism), run inline, plus
+   `hash_password`/`verify_password` through the hash executor at the
+   configured parameters (adds pool dispatch);
+ - `validation`: `UserCreate` / `ItemCreate` from a dict (what FastAPI
+   does after parsing the body) and from raw JSON bytes;
+ - `orm`: `ItemRepository.get_all` (ORM entities, fresh session per
+   call as in a request) against a Core `SELECT` of the same columns
+   returning row tuples, at 10 / 1,000 / 100,000 rows of in-memory
+   SQLite.
+
+Timing follows pyperf: each benchmark is calibrated to a loop count
+whose run takes at least `--min-time` seconds, then run `--runs` times;
+the median time per call is reported with min and standard deviation.
+
+`--save PATH` stores the results (with the commit, Python version and
+machine) as JSON; `--compare PATH` prints the change of every median
+against a saved run and exits with status 1 when one slowed down by more
+than `--threshold`. Compare runs from the same machine only.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --group jwt --group argon2 --argon2 3,65536,4 --argon2 2,19456,1
+    python -m benchmarks.bench_hot_paths --save before.json
+    python -m benchmarks.bench_hot_paths --compare before.json
+
+RS256, ES256 and EdDSA need the `cryptography` package (in
+requirements-dev.txt); without it they are skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("REFRESH_SECRET_KEY", "benchmark-refresh-key-benchmark-refresh")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import fakeredis  # noqa: E402
+import utils.config as config  # noqa: E402
+
+# Installed before the modules binding `redis_client` at import time
+config.redis_client = fakeredis.FakeRedis(decode_responses=True)
+config.redis_bytes_client = fakeredis.FakeRedis()
+
+import jwt  # noqa: E402
+from passlib.context import CryptContext  # noqa: E402
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from models.items_model import Item  # noqa: E402
+from models.user_model import Base  # noqa: E402
+from repositories.item_repository import ItemRepository  # noqa: E402
+from schemas.item_schemas import ItemCreate  # noqa: E402
+from schemas.user_schemas import UserCreate  # noqa: E402
+from utils import jwt_handler  # noqa: E402
+from utils.hash_executor import hash_executor  # noqa: E402
+from utils.password_hash import hash_password, verify_password  # noqa: E402
+from utils.token_cache import token_cache, token_digest  # noqa: E402
+
+GROUPS = ("jwt", "argon2", "validation", "orm")
+ORM_ROWS = (10, 1_000, 100_000)
+PASSWORD = "correct horse battery staple"
+
+
+def measure(fn, min_time: float, runs: int) -> dict:
+    """Time `fn()` pyperf-style; times are per call, in microseconds."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        # Aim slightly past min_time so the next try usually succeeds
+        loops = max(loops * 2, int(loops * min_time * 1.2 / max(elapsed, 1e-9)))
+    per_call = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - started) / loops * 1e6)
+    median = statistics.median(per_call)
+    return {
+        "loops": loops,
+        "median_us": median,
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if runs > 1 else 0.0,
+        "ops_per_sec": 1e6 / median,
+    }
+
+
+def _signing_keys() -> dict:
+    """Algorithm -> (signing key, verifying key); asymmetric ones need cryptography."""
+    keys = {"HS256": (os.environ["SECRET_KEY"],) * 2}
+    try:
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+    except ImportError:
+        print("cryptography not installed; skipping RS256, ES256 and EdDSA", file=sys.stderr)
+        return keys
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    keys["RS256"] = (rsa_key, rsa_key.public_key())
+    keys["ES256"] = (ec_key, ec_key.public_key())
+    keys["EdDSA"] = (ed_key, ed_key.public_key())
+    return keys
+
+
+def bench_jwt(min_time: float, runs: int) -> dict:
+    results = {}
+    payload = jwt.decode(jwt_handler.create_access_token("42", "benchmark-user"), options={"verify_signature": False})
+    for algorithm, (signing_key, verifying_key) in _signing_keys().items():
+        token = jwt.encode(payload, signing_key, algorithm=algorithm)
+        results[f"jwt/{algorithm} encode"] = measure(
+            lambda: jwt.encode(payload, signing_key, algorithm=algorithm), min_time, runs)
+        results[f"jwt/{algorithm} decode"] = measure(
+            lambda: jwt.decode(token, verifying_key, algorithms=[algorithm]), min_time, runs)
+
+    configured = jwt_handler.ALGORITHM
+    access_token = jwt_handler.create_access_token("42", "benchmark-user")
+    digest = token_digest(access_token)
+    refresh_token = jwt_handler.create_refresh_token("42", "benchmark-user")
+
+    def decode_uncached():
+        token_cache.delete(digest)
+        jwt_handler.decode_token(access_token)
+
+    results[f"jwt/create_access_token ({configured})"] = measure(
+        lambda: jwt_handler.create_access_token("42", "benchmark-user"), min_time, runs)
+    jwt_handler.decode_token(access_token)
+    results[f"jwt/decode_token cache hit ({configured})"] = measure(
+        lambda: jwt_handler.decode_token(access_token), min_time, runs)
+    results[f"jwt/decode_token cache miss ({configured})"] = measure(decode_uncached, min_time, runs)
+    results[f"jwt/create_refresh_token ({configured})"] = measure(
+        lambda: jwt_handler.create_refresh_token("42", "benchmark-user"), min_time, runs)
+    results[f"jwt/decode_refresh_token ({configured})"] = measure(
+        lambda: jwt_handler.decode_refresh_token(refresh_token), min_time, runs)
+    return results
+
+
+def parse_argon2(spec: str) -> tuple[int, int, int]:
+    """Parse "time_cost,memory_cost_kib,parallelism"."""
+    time_cost, memory_cost, parallelism = (int(part) for part in spec.split(","))
+    return time_cost, memory_cost, parallelism
+
+
+def bench_argon2(parameter_sets: list[tuple[int, int, int]], min_time: float, runs: int) -> dict:
+    results = {}
+    for time_cost, memory_cost, parallelism in parameter_sets:
+        context = CryptContext(
+            schemes=["argon2"],
+            argon2__rounds=time_cost,
+            argon2__memory_cost=memory_cost,
+            argon2__parallelism=parallelism,
+        )
+        stored = context.hash(PASSWORD)
+        label = f"t={time_cost},m={memory_cost},p={parallelism}"
+        results[f"argon2/{label} hash"] = measure(lambda: context.hash(PASSWORD), min_time, runs)
+        results[f"argon2/{label} verify"] = measure(lambda: context.verify(PASSWORD, stored), min_time, runs)
+
+    configured = f"t={config.ARGON2_TIME_COST},m={config.ARGON2_MEMORY_COST},p={config.ARGON2_PARALLELISM}"
+    stored = hash_password(PASSWORD)
+    results[f"argon2/hash_password ({hash_executor.kind} executor, {configured})"] = measure(
+        lambda: hash_password(PASSWORD), min_time, runs)
+    results[f"argon2/verify_password ({hash_executor.kind} executor, {configured})"] = measure(
+        lambda: verify_password(PASSWORD, stored), min_time, runs)
+    hash_executor.shutdown()
+    return results
+
+
+def bench_validation(min_time: float, runs: int) -> dict:
+    user = {"username": "benchmark-user", "email": "benchmark.user@example.com", "password": PASSWORD}
+    item = {"name": "Green tea 42"}
+    user_json = json.dumps(user).encode()
+    item_json = json.dumps(item).encode()
+    return {
+        "validation/UserCreate from dict": measure(lambda: UserCreate.model_validate(user), min_time, runs),
+        "validation/UserCreate from JSON": measure(lambda: UserCreate.model_validate_json(user_json), min_time, runs),
+        "validation/ItemCreate from dict": measure(lambda: ItemCreate.model_validate(item), min_time, runs),
+        "validation/ItemCreate from JSON": measure(lambda: ItemCreate.model_validate_json(item_json), min_time, runs),
+    }
+
+
+def bench_orm(row_counts: tuple[int, ...], min_time: float, runs: int) -> dict:
+    results = {}
+    columns = select(Item.id, Item.name, Item.updated_at)
+    for rows in row_counts:
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for start in range(0, rows, 10_000):
+                connection.execute(insert(Item), [{"name": f"Item {n}"} for n in range(start, min(rows, start + 10_000))])
+
+        def orm_entities():
+            # A fresh session per call, as per request: no identity-map hits
+            with Session(engine) as db:
+                ItemRepository(db).get_all()
+
+        def core_rows():
+            with engine.connect() as connection:
+                connection.execute(columns).all()
+
+        results[f"orm/get_all ORM entities, {rows:,} rows"] = measure(orm_entities, min_time, runs)
+        results[f"orm/Core row tuples, {rows:,} rows"] = measure(core_rows, min_time, runs)
+        engine.dispose()
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(groups: list[str], argon2: list[tuple[int, int, int]], orm_rows: tuple[int, ...],
+        min_time: float, runs: int) -> dict:
+    results = {}
+    if "jwt" in groups:
+        results.update(bench_jwt(min_time, runs))
+    if "argon2" in groups:
+        results.update(bench_argon2(argon2, min_time, runs))
+    if "validation" in groups:
+        results.update(bench_validation(min_time, runs))
+    if "orm" in groups:
+        results.update(bench_orm(orm_rows, min_time, runs))
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        "min_time": min_time,
+        "runs": runs,
+        "benchmarks": results,
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Return (report lines, regressions) of `result` against `baseline`."""
+    lines, regressions = [], []
+    for name, current in result["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        change = current["median_us"] / base["median_us"] - 1
+        line = f"{name:<58} {base['median_us']:>12.2f} -> {current['median_us']:>12.2f} us  {change:+7.1%}"
+        lines.append(line)
+        if change > threshold:
+            regressions.append(line)
+    return lines, regressions
+
+
+def _format_us(value: float) -> str:
+    if value >= 1000:
+        return f"{value / 1000:9.2f} ms"
+    return f"{value:9.2f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--group", action="append", choices=GROUPS, help="benchmark group (repeatable)")
+    parser.add_argument("--argon2", action="append", type=parse_argon2, metavar="T,M,P",
+                        help="Argon2 time_cost,memory_cost_kib,parallelism (repeatable); "
+                             "default: the configured set and OWASP's 2,19456,1")
+    parser.add_argument("--orm-rows", type=int, action="append", help=f"table sizes (default {ORM_ROWS})")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed run")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--save", metavar="PATH", help="store results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with saved results; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown of a median")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    argon2 = args.argon2 or list(dict.fromkeys([
+        (config.ARGON2_TIME_COST, config.ARGON2_MEMORY_COST, config.ARGON2_PARALLELISM),
+        (2, 19456, 1),
+    ]))
+    result = run(args.group or list(GROUPS), argon2, tuple(args.orm_rows or ORM_ROWS), args.min_time, args.runs)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"commit {result['commit']}, Python {result['python']}, {result['machine']}")
+        for name, stats in result["benchmarks"].items():
+            print(f"  {name:<58} {_format_us(stats['median_us'])} "
+                  f"(min {_format_us(stats['min_us']).strip()}, sd {stats['stdev_us'] / stats['median_us']:.1%})")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"results saved to {args.save}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(result, baseline, args.threshold)
+        print(f"\nagainst {args.compare} (commit {baseline.get('commit')}):")
+        for line in lines:
+            print(f"  {line}")
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: overhead of request metrics and Server-Timing.
+
+Measures what `utils.metrics` adds to the two hot paths it hooks:
+
+ - requests: a FastAPI app with one path-parameter route, called
+   directly over ASGI (no server, no sockets) with and without
+   `MetricsMiddleware`, so the difference is the middleware alone;
+ - statements: `SELECT 1` on an in-memory SQLite engine inside a
+   `traced` function, with and without `instrument_engine`.
+
+Both baselines are far cheaper than any real request or query, so the
+deltas are an upper bound on the relative cost in production. Redis
+timing is one `perf_counter` pair and a histogram observation per
+round-trip, the same work as a statement.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --requests 50000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from utils.metrics import MetricsMiddleware, instrument_engine, traced
+
+
+def _app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, server_timing=True)
+    return app
+
+
+async def _request_seconds(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/items/7", "raw_path": b"/items/7", "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up (builds the middleware stack on first call)
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+def _query_seconds(instrumented: bool, queries: int) -> float:
+    engine = create_engine("sqlite://")
+    if instrumented:
+        instrument_engine(engine)
+    statement = text("SELECT 1")
+
+    @traced("bench.select")
+    def select_one(connection):
+        return connection.execute(statement).scalar()
+
+    with engine.connect() as connection:
+        for _ in range(200):
+            select_one(connection)
+        started = time.perf_counter()
+        for _ in range(queries):
+            select_one(connection)
+        elapsed = time.perf_counter() - started
+    engine.dispose()
+    return elapsed
+
+
+def run(requests: int, queries: int) -> dict:
+    plain = asyncio.run(_request_seconds(_app(False), requests)) / requests
+    instrumented = asyncio.run(_request_seconds(_app(True), requests)) / requests
+    plain_query = _query_seconds(False, queries) / queries
+    instrumented_query = _query_seconds(True, queries) / queries
+    return {
+        "requests": requests,
+        "request_us": plain * 1e6,
+        "request_instrumented_us": instrumented * 1e6,
+        "request_overhead_us": (instrumented - plain) * 1e6,
+        "queries": queries,
+        "query_us": plain_query * 1e6,
+        "query_instrumented_us": instrumented_query * 1e6,
+        "query_overhead_us": (instrumented_query - plain_query) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=20_000, help="ASGI requests per variant")
+    parser.add_argument("--queries", type=int, default=50_000, help="statements per variant")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.requests, args.queries)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"request (ASGI, {result['requests']:,}): {result['request_us']:7.1f} us plain, "
+          f"{result['request_instrumented_us']:7.1f} us with metrics (+{result['request_overhead_us']:.1f} us)")
+    print(f"statement ({result['queries']:,}):     {result['query_us']:7.1f} us plain, "
+          f"{result['query_instrumented_us']:7.1f} us with metrics (+{result['query_overhead_us']:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
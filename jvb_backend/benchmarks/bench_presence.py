@@ -0,0 +1,233 @@
+"""Benchmark: compact presence store vs three string keys per user.
+
+Compares, per login and logout:
+
+ - Redis round-trips: old scheme = one per SET (2 on login; 3 on logout
+   including the token blacklist write); new scheme = one MULTI/EXEC that
+   also carries the token revocation on logout,
+ - time per operation,
+ - Redis memory for N users (1M by default): old `user:{id}:*` string
+   keys vs the shared bitmap plus sorted sets.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_presence --count 1000000
+    python -m benchmarks.bench_presence --redis-url redis://localhost:6379/15
+
+Without `--redis-url`, memory is estimated from key and member sizes and
+operations run against the in-process fakeredis (installed from
+requirements-dev.txt), so times exclude network latency; multiply the
+round-trip counts by your RTT to see what they cost in production.
+With `--redis-url`, the database is FLUSHED; use a scratch db.
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import utils.config as config  # noqa: E402
+
+# Approximate per-key overhead of a Redis string key (dict entry,
+# key/value objects), and per-member overhead of a skiplist-encoded
+# sorted set (skiplist node, dict entry, score), used when no real server
+# is available to ask with INFO memory.
+REDIS_KEY_OVERHEAD_BYTES = 56
+ZSET_MEMBER_OVERHEAD_BYTES = 72
+
+
+class CountingClient:
+    """Forward to a Redis client, counting round-trips.
+
+    A direct command is one round-trip; a pipeline is one per `execute()`.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.round_trips = 0
+
+    def pipeline(self, *args, **kwargs):
+        pipe = self.client.pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def counted_execute(*execute_args, **execute_kwargs):
+            self.round_trips += 1
+            return execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.round_trips += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+def _redis(url: str | None):
+    if url:
+        import redis
+        return redis.Redis.from_url(url, decode_responses=True), True
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=True), False
+
+
+def old_login(client, user_id: int, now: float):
+    client.set(f"user:{user_id}:is_online", 1)
+    client.set(f"user:{user_id}:last_login", now)
+
+
+def old_logout(client, user_id: int, now: float, token: str):
+    client.set(f"blacklist:{token}", "revoked", ex=3600)
+    client.set(f"user:{user_id}:is_online", 0)
+    client.set(f"user:{user_id}:offline_since", now)
+
+
+def new_login(client, user_id: int, now: float):
+    from utils.presence import presence_store
+    presence_store.mark_online(user_id, now)
+
+
+def new_logout(client, user_id: int, now: float, jti: str):
+    from utils.presence import presence_store
+    from utils.revocation import revocation_store
+    pipe = client.pipeline(transaction=True)
+    revocation_store.revoke(jti, int(now) + 3600, pipe=pipe)
+    presence_store.mark_offline(user_id, now, pipe=pipe)
+    pipe.execute()
+
+
+def _measure(client: CountingClient, fn, calls: list[tuple]) -> tuple[float, float]:
+    """Return (seconds per call, round-trips per call)."""
+    client.round_trips = 0
+    start = time.perf_counter()
+    for args in calls:
+        fn(client, *args)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(calls), client.round_trips / len(calls)
+
+
+def _used_memory(client) -> int:
+    return client.info("memory")["used_memory"]
+
+
+def _populate_old(client, count: int, now: float):
+    for start in range(0, count, 10_000):
+        pipe = client.pipeline(transaction=False)
+        for user_id in range(start, min(start + 10_000, count)):
+            online = user_id % 2
+            pipe.set(f"user:{user_id}:is_online", online)
+            pipe.set(f"user:{user_id}:last_login", now)
+            if not online:
+                pipe.set(f"user:{user_id}:offline_since", now)
+        pipe.execute()
+
+
+def _populate_new(client, count: int, now: float):
+    from utils.presence import presence_store
+    for start in range(0, count, 10_000):
+        pipe = client.pipeline(transaction=False)
+        for user_id in range(start, min(start + 10_000, count)):
+            if user_id % 2:
+                presence_store.queue_online(pipe, user_id, now)
+            else:
+                pipe.zadd("presence:last_login", {user_id: now})
+                presence_store.queue_offline(pipe, user_id, now)
+        pipe.execute()
+
+
+def _estimated_memory(count: int, now: float) -> tuple[float, float]:
+    """Estimate (old, new) bytes for `count` users, half of them online."""
+    id_len = len(str(count // 2))
+    value_len = len(repr(now))
+    old = 0.0
+    for suffix, value, share in (("is_online", 1, 1.0), ("last_login", value_len, 1.0), ("offline_since", value_len, 0.5)):
+        old += share * count * (len(f"user:{'0' * id_len}:{suffix}") + value + REDIS_KEY_OVERHEAD_BYTES)
+    # Every user is in last_login plus exactly one of online_since / offline_since;
+    # online users are also in heartbeat
+    new = count / 8 + 2.5 * count * (id_len + 8 + ZSET_MEMBER_OVERHEAD_BYTES)
+    return old, new
+
+
+def run(count: int, samples: int, redis_url: str | None) -> dict:
+    raw_client, real = _redis(redis_url)
+    # Installed before utils.presence / utils.revocation are first
+    # imported, since they bind `redis_client` at import time
+    client = config.redis_client = CountingClient(raw_client)
+    now = time.time()
+    user_ids = list(range(samples))
+
+    old_login_s, old_login_rt = _measure(client, old_login, [(u, now) for u in user_ids])
+    old_logout_s, old_logout_rt = _measure(
+        client, old_logout, [(u, now, f"token-{uuid.uuid4().hex * 4}") for u in user_ids]
+    )
+    new_login_s, new_login_rt = _measure(client, new_login, [(u, now) for u in user_ids])
+    new_logout_s, new_logout_rt = _measure(client, new_logout, [(u, now, uuid.uuid4().hex) for u in user_ids])
+
+    if real:
+        raw_client.flushdb()
+        baseline = _used_memory(raw_client)
+        _populate_old(raw_client, count, now)
+        old_bytes = _used_memory(raw_client) - baseline
+        raw_client.flushdb()
+        baseline = _used_memory(raw_client)
+        _populate_new(raw_client, count, now)
+        new_bytes = _used_memory(raw_client) - baseline
+        raw_client.flushdb()
+    else:
+        old_bytes, new_bytes = _estimated_memory(count, now)
+
+    return {
+        "users": count,
+        "redis": "real" if real else "fakeredis (memory estimated)",
+        "old": {
+            "login_us": old_login_s * 1e6,
+            "login_round_trips": old_login_rt,
+            "logout_us": old_logout_s * 1e6,
+            "logout_round_trips": old_logout_rt,
+            "redis_bytes": old_bytes,
+        },
+        "new": {
+            "login_us": new_login_s * 1e6,
+            "login_round_trips": new_login_rt,
+            "logout_us": new_logout_s * 1e6,
+            "logout_round_trips": new_logout_rt,
+            "redis_bytes": new_bytes,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--count", type=int, default=1_000_000, help="users for the memory comparison")
+    parser.add_argument("--samples", type=int, default=10_000, help="logins/logouts timed per scheme")
+    parser.add_argument("--redis-url", help="real Redis to measure (FLUSHED; use a scratch db)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.count, args.samples, args.redis_url)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    old, new = result["old"], result["new"]
+    print(f"users: {result['users']:,}  redis: {result['redis']}")
+    print(f"{'':22}{'old (3 keys/user)':>20}{'new (bitmap+zsets)':>20}")
+    print(f"{'login':22}{old['login_us']:>17.1f} us{new['login_us']:>17.1f} us")
+    print(f"{'login round-trips':22}{old['login_round_trips']:>20.1f}{new['login_round_trips']:>20.1f}")
+    print(f"{'logout':22}{old['logout_us']:>17.1f} us{new['logout_us']:>17.1f} us")
+    print(f"{'logout round-trips':22}{old['logout_round_trips']:>20.1f}{new['logout_round_trips']:>20.1f}")
+    print(f"{'redis memory':22}{old['redis_bytes'] / 2**20:>17.1f} MB{new['redis_bytes'] / 2**20:>17.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark: Bloom-fronted revocation vs one Redis key per raw token.
+
+Compares, at N revoked tokens (1M by default):
+
+ - lookup cost for a token that is *not* revoked (the common case):
+   old scheme = `GET blacklist:{token}` round-trip; new scheme = local
+   Bloom filter check with no Redis call,
+ - Redis memory: old `blacklist:{jwt}` keys vs new `revoked:{jti}` keys
+   plus the shared Bloom bitmap,
+ - the measured false-positive rate (the fraction of lookups that would
+   still fall through to Redis).
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_revocation --count 1000000
+    python -m benchmarks.bench_revocation --redis-url redis://localhost:6379/15
+
+Without `--redis-url`, Redis memory is estimated from key sizes and
+round-trips are timed against the in-process fakeredis (installed from
+requirements-dev.txt), which understates real network latency.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from utils.jwt_handler import create_access_token  # noqa: E402
+from utils.revocation import BloomFilter, bloom_parameters  # noqa: E402
+
+# Approximate per-key overhead of a Redis string key with a TTL (dict
+# entry, key/value objects, expires entry), used when no real server is
+# available to ask with MEMORY USAGE.
+REDIS_KEY_OVERHEAD_BYTES = 72
+
+
+def _redis(url: str | None):
+    if url:
+        import redis
+        return redis.Redis.from_url(url), True
+    import fakeredis
+    return fakeredis.FakeRedis(), False
+
+
+def _time_per_call(fn, args: list) -> float:
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def _memory_per_key(client, real: bool, keys: list[str], value_len: int) -> float:
+    if real:
+        return statistics.mean(client.memory_usage(key) for key in keys)
+    return statistics.mean(len(key) for key in keys) + value_len + REDIS_KEY_OVERHEAD_BYTES
+
+
+def run(count: int, fp_rate: float, samples: int, redis_url: str | None) -> dict:
+    client, real = _redis(redis_url)
+    sample_tokens = [create_access_token(i, f"user{i}") for i in range(samples)]
+    sample_jtis = [uuid.uuid4().hex for _ in range(samples)]
+
+    # Old scheme: one key per raw JWT
+    old_keys = [f"blacklist:{token}" for token in sample_tokens]
+    pipe = client.pipeline(transaction=False)
+    for key in old_keys:
+        pipe.set(key, "revoked", ex=3600)
+    pipe.execute()
+    old_lookup = _time_per_call(client.get, [f"blacklist:{t}x" for t in sample_tokens])
+    old_key_bytes = _memory_per_key(client, real, old_keys, len("revoked"))
+
+    # New scheme: exact `revoked:{jti}` keys plus one Bloom bitmap
+    new_keys = [f"revoked:{jti}" for jti in sample_jtis]
+    pipe = client.pipeline(transaction=False)
+    for key in new_keys:
+        pipe.set(key, 1, ex=3600)
+    pipe.execute()
+    new_key_bytes = _memory_per_key(client, real, new_keys, 1)
+    client.delete(*old_keys, *new_keys)
+
+    size_bits, hash_count = bloom_parameters(count, fp_rate)
+    bloom = BloomFilter(size_bits, hash_count)
+    start = time.perf_counter()
+    for _ in range(count):
+        bloom.add(uuid.uuid4().hex)
+    build_seconds = time.perf_counter() - start
+
+    probes = [uuid.uuid4().hex for _ in range(samples)]
+    new_lookup = _time_per_call(bloom.__contains__, probes)
+    false_positives = sum(probe in bloom for probe in probes)
+
+    return {
+        "revoked_tokens": count,
+        "redis": "real" if real else "fakeredis (memory estimated)",
+        "old": {
+            "lookup_us": old_lookup * 1e6,
+            "redis_calls_per_lookup": 1.0,
+            "redis_bytes": old_key_bytes * count,
+        },
+        "new": {
+            "lookup_us": new_lookup * 1e6,
+            "redis_calls_per_lookup": false_positives / samples,
+            "redis_bytes": new_key_bytes * count + bloom.nbytes,
+            "worker_filter_bytes": bloom.nbytes,
+            "hash_count": hash_count,
+            "false_positive_rate": false_positives / samples,
+            "build_seconds": build_seconds,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--count", type=int, default=1_000_000, help="revoked tokens")
+    parser.add_argument("--fp-rate", type=float, default=0.001, help="Bloom false-positive target")
+    parser.add_argument("--samples", type=int, default=10_000, help="lookups timed per scheme")
+    parser.add_argument("--redis-url", help="real Redis to measure (use a scratch db)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.count, args.fp_rate, args.samples, args.redis_url)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    old, new = result["old"], result["new"]
+    print(f"revoked tokens: {result['revoked_tokens']:,}  redis: {result['redis']}")
+    print(f"{'':24}{'old (key/token)':>18}{'new (bloom+jti)':>18}")
+    print(f"{'lookup (not revoked)':24}{old['lookup_us']:>15.2f} us{new['lookup_us']:>15.2f} us")
+    print(f"{'redis calls / lookup':24}{old['redis_calls_per_lookup']:>18.4f}{new['redis_calls_per_lookup']:>18.4f}")
+    print(f"{'redis memory':24}{old['redis_bytes'] / 2**20:>15.1f} MB{new['redis_bytes'] / 2**20:>15.1f} MB")
+    print(f"{'worker memory':24}{'0':>18}{new['worker_filter_bytes'] / 2**20:>15.1f} MB")
+    print(f"bloom: k={new['hash_count']}, measured FP rate {new['false_positive_rate']:.4%}, "
+          f"built in {new['build_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark: `GET /items/search` query latency on a large table.
+
+Builds a SQLite file database of `--rows` items (1,000,000 by default)
+with names drawn from a fixed vocabulary, creates the search index the
+way startup does (`item_search_index.ensure`), then times
+`ItemRepository.search` for random queries of one or two terms, each
+term either a whole word or a prefix of `SEARCH_MIN_PREFIX_LENGTH`+
+characters. Every query fetches one page (`--limit` + 1 rows, as the
+service over-fetches) from offset 0 and, for a quarter of queries, from
+a later page within `SEARCH_MAX_RESULTS`.
+
+The database is kept in `--path` and reused by later runs with the same
+row count, since building and indexing a million rows takes a while.
+`--backend like` times the unindexed fallback for comparison (use a
+smaller `--rows`; it scans the table).
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --rows 100000 --queries 2000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from models.items_model import Item  # noqa: E402
+from models.user_model import Base  # noqa: E402
+from repositories.item_repository import ItemRepository  # noqa: E402
+from repositories.item_search import item_search_index, search_terms  # noqa: E402
+from utils.config import SEARCH_MIN_PREFIX_LENGTH, SEARCH_MAX_RESULTS  # noqa: E402
+
+ADJECTIVES = (
+    "green black white red golden smoked roasted spiced iced organic wild sweet "
+    "bitter fresh aged dark light sparkling crispy creamy"
+).split()
+NOUNS = (
+    "tea coffee cake bread cheese salad soup noodle rice pepper tomato apple "
+    "banana cherry lemon mango honey butter chocolate vanilla almond walnut "
+    "ginger garlic basil mint oolong matcha espresso latte croissant bagel "
+    "pretzel waffle pancake muffin cookie brownie yogurt granola"
+).split()
+VOCABULARY = ADJECTIVES + NOUNS
+INSERT_BATCH = 10_000
+
+
+def _name(rng: random.Random) -> str:
+    words = [rng.choice(ADJECTIVES) for _ in range(rng.randint(0, 2))]
+    words += [rng.choice(NOUNS) for _ in range(rng.randint(1, 2))]
+    return f"{' '.join(words).capitalize()} {rng.randint(1, 9999)}"
+
+
+def _build(path: str, rows: int, seed: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        existing = connection.scalar(select(func.count()).select_from(Item))
+    if existing != rows:
+        engine.dispose()
+        os.remove(path)
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            for start in range(0, rows, INSERT_BATCH):
+                batch = min(INSERT_BATCH, rows - start)
+                connection.execute(insert(Item), [{"name": _name(rng)} for _ in range(batch)])
+        print(f"inserted {rows:,} rows in {time.perf_counter() - started:.1f} s")
+    started = time.perf_counter()
+    # Indexes existing rows on first run; a no-op afterwards
+    backend = item_search_index.ensure(engine)
+    print(f"search index ({backend}) ready in {time.perf_counter() - started:.1f} s")
+    return engine
+
+
+def _query(rng: random.Random) -> str:
+    terms = []
+    for _ in range(rng.choice((1, 1, 2))):
+        word = rng.choice(VOCABULARY)
+        if rng.random() < 0.5:
+            word = word[:rng.randint(SEARCH_MIN_PREFIX_LENGTH, max(SEARCH_MIN_PREFIX_LENGTH, len(word) - 1))]
+        terms.append(word)
+    return " ".join(terms)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(path: str, rows: int, queries: int, limit: int, backend: str | None, seed: int) -> dict:
+    engine = _build(path, rows, seed)
+    if backend:
+        item_search_index.backend = backend
+    rng = random.Random(seed + 1)
+    latencies = []
+    matches = 0
+    with Session(engine) as db:
+        repo = ItemRepository(db)
+        # Warm the page cache
+        for _ in range(50):
+            repo.search(search_terms(_query(rng)), 0, limit + 1)
+        for _ in range(queries):
+            terms = search_terms(_query(rng))
+            pages = max(1, SEARCH_MAX_RESULTS // limit)
+            offset = limit * rng.randrange(1, pages) if pages > 1 and rng.random() < 0.25 else 0
+            started = time.perf_counter()
+            found = repo.search(terms, offset, limit + 1)
+            latencies.append((time.perf_counter() - started) * 1000)
+            matches += bool(found)
+            db.expunge_all()
+    engine.dispose()
+    return {
+        "backend": item_search_index.backend,
+        "rows": rows,
+        "max_results": SEARCH_MAX_RESULTS,
+        "queries": queries,
+        "with_results": matches / queries,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="items in the table")
+    parser.add_argument("--queries", type=int, default=5_000, help="timed queries")
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    parser.add_argument("--path", default=os.path.join(tempfile.gettempdir(), "bench_search.db"),
+                        help="SQLite database file (reused across runs)")
+    parser.add_argument("--backend", choices=["fts5", "like"], help="override the detected backend")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.path, args.rows, args.queries, args.limit, args.backend, args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['backend']}: {result['rows']:,} items, {result['queries']:,} queries "
+          f"({result['with_results']:.0%} with results, {result['max_results']} ranked per query)")
+    for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        print(f"  {key[:-3]:>5} {result[key]:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
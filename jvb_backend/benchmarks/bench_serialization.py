@@ -0,0 +1,138 @@
+"""Benchmark: per-request JSON serialization of item responses.
+
+Times the work FastAPI does between an endpoint returning and the
+response body being ready, for pages of 1, 100 and 10,000 items:
+
+ - untyped: no `response_model`, so FastAPI runs `jsonable_encoder` over
+   the ORM objects and `json.dumps` the resulting dicts (how
+   `GET /items/{id}`, create and update used to respond),
+ - union of dicts: `response_model=ItemPage | ItemBatch` with the service
+   returning a dict, validated against both union members before Pydantic
+   dumps it (how `GET /items/` used to respond),
+ - typed: the service returns an `ItemPage`; FastAPI only checks the
+   instance and Pydantic writes JSON bytes directly from the model (the
+   current path for every item route).
+
+FastAPI's response field is a Pydantic `TypeAdapter`; the benchmark uses
+one built the same way, once per model as FastAPI does at startup.
+Items are loaded from an in-memory SQLite database beforehand, so times
+exclude the query.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 1 100 10000 --json
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from models.items_model import Item  # noqa: E402
+from models.user_model import Base  # noqa: E402
+from repositories.item_repository import ITEM_LIST  # noqa: E402
+from schemas.item_schemas import ItemBatch, ItemPage, ItemResponse  # noqa: E402
+from services.item_service import item_page  # noqa: E402
+from utils.list_query import ListQuery  # noqa: E402
+
+PAGE_RESPONSE = TypeAdapter(ItemPage | ItemBatch)
+
+
+def _page_dict(rows: list[Item], limit: int) -> dict:
+    # The plain dict the service used to return, before `item_page`
+    return ListQuery(ITEM_LIST).page(rows, limit)
+
+
+def untyped(rows: list[Item], limit: int) -> bytes:
+    # Starlette's JSONResponse.render
+    content = jsonable_encoder(_page_dict(rows, limit))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def union_of_dicts(rows: list[Item], limit: int) -> bytes:
+    value = PAGE_RESPONSE.validate_python(_page_dict(rows, limit), from_attributes=True)
+    return PAGE_RESPONSE.dump_json(value)
+
+
+def typed(rows: list[Item], limit: int) -> bytes:
+    value = PAGE_RESPONSE.validate_python(item_page(rows, limit), from_attributes=True)
+    return PAGE_RESPONSE.dump_json(value)
+
+
+PATHS = {"untyped": untyped, "union_of_dicts": union_of_dicts, "typed": typed}
+
+
+def _load_items(count: int) -> list[Item]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as db:
+        db.add_all([Item(name=f"item {index}") for index in range(count)])
+        db.commit()
+        return list(db.scalars(select(Item).order_by(Item.id)))
+
+
+def _response_fields(body: bytes) -> str:
+    # The untyped path also emits columns outside `ItemResponse` (updated_at)
+    page = json.loads(body)
+    page["items"] = [{name: item[name] for name in ItemResponse.model_fields} for item in page["items"]]
+    return json.dumps(page, sort_keys=True)
+
+
+def _time_per_call(fn, rows: list[Item], limit: int, min_seconds: float) -> float:
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn(rows, limit)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def run(sizes: list[int], min_seconds: float) -> dict:
+    items = _load_items(max(sizes) + 1)
+    results = {}
+    for size in sizes:
+        # One extra row, as repositories over-fetch to detect the next page
+        rows = items[:size + 1]
+        bodies = {name: fn(rows, size) for name, fn in PATHS.items()}
+        assert len({_response_fields(body) for body in bodies.values()}) == 1, "paths disagree"
+        results[size] = {
+            name: _time_per_call(fn, rows, size, min_seconds) * 1e6
+            for name, fn in PATHS.items()
+        }
+        results[size]["bytes"] = len(bodies["typed"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000], help="items per response")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="time spent per path and size")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.min_seconds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'items':>8}{'bytes':>12}{'untyped':>14}{'union dicts':>14}{'typed':>14}{'speedup':>10}")
+    for size, result in results.items():
+        print(
+            f"{size:>8,}{result['bytes']:>12,}"
+            f"{result['untyped']:>11.1f} us{result['union_of_dicts']:>11.1f} us{result['typed']:>11.1f} us"
+            f"{result['untyped'] / result['typed']:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
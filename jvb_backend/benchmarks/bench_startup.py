@@ -0,0 +1,150 @@
+"""Benchmark: cold start, i.e. importing the app in a fresh interpreter.
+
+Each run starts a new `python` process (temporary working directory,
+SQLite database there, a Redis host that does not resolve) which imports
+`main` and reports:
+
+ - the import time of `main`, interpreter startup excluded;
+ - whether the import touched the database (the SQLite file exists):
+   schema work belongs in `database.migrate`, which runs from the
+   lifespan or `python cli.py migrate`, never at import;
+ - which `LAZY_MODULES` were imported: passlib/argon2 load on first
+   hash, cProfile only when request profiling is enabled.
+
+One more run under `python -X importtime` lists the modules with the
+most import time of their own (`--top`).
+
+This is the import-time budget: the script exits with status 1 when the
+median import exceeds `--budget-ms`, the import did I/O, or a lazy
+module was imported. Timings are per machine; set the budget from a few
+runs on the machine that enforces it, with headroom for noise. The
+default fits a 1-vCPU container, where the import takes about 1.2 s, of
+which FastAPI, SQLAlchemy, pydantic and redis-py take about 0.95 s.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --budget-ms 900 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by `import main`
+LAZY_MODULES = ("passlib", "argon2", "cProfile")
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+import main
+seconds = time.perf_counter() - started
+print(json.dumps({
+    "seconds": seconds,
+    "db_touched": os.path.exists("startup.db"),
+    "lazy_loaded": [name for name in %r if name in sys.modules],
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def _environment(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        PYTHONPATH=APP_DIR,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        REDIS_HOST="redis.invalid",
+        PROFILING_TOKEN="",
+        PROFILE_SAMPLE_RATE="0",
+    )
+    env.setdefault("SECRET_KEY", "startup-secret-key-startup-secret-key")
+    env.setdefault("REFRESH_SECRET_KEY", "startup-refresh-key-startup-refresh-key")
+    env.setdefault("ALGORITHM", "HS256")
+    return env
+
+
+def _import_once(options: tuple = ()) -> subprocess.CompletedProcess:
+    with tempfile.TemporaryDirectory() as workdir:
+        return subprocess.run(
+            [sys.executable, *options, "-c", CHILD % (LAZY_MODULES,)],
+            cwd=workdir, env=_environment(workdir), capture_output=True, text=True, check=True,
+        )
+
+
+def _slowest(importtime: str, top: int) -> list[dict]:
+    """Modules with the most own import time from `-X importtime` output."""
+    modules = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(own) / 1000,
+            "cumulative_ms": int(cumulative) / 1000,
+        })
+    return sorted(modules, key=lambda module: module["self_ms"], reverse=True)[:top]
+
+
+def run(runs: int, top: int) -> dict:
+    # First import compiles bytecode; keep it out of the timings
+    _import_once()
+    reports = [json.loads(_import_once().stdout) for _ in range(runs)]
+    times = [report["seconds"] * 1000 for report in reports]
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "db_touched": any(report["db_touched"] for report in reports),
+        "lazy_loaded": sorted({name for report in reports for name in report["lazy_loaded"]}),
+        "modules": reports[-1]["modules"],
+        "slowest": _slowest(_import_once(("-X", "importtime")).stderr, top),
+    }
+
+
+def budget_failures(result: dict, budget_ms: float) -> list[str]:
+    failures = []
+    if result["median_ms"] > budget_ms:
+        failures.append(f"import main: median {result['median_ms']:.0f} ms > budget {budget_ms:.0f} ms")
+    if result["db_touched"]:
+        failures.append("import main touched the database (schema work must not run at import)")
+    for name in result["lazy_loaded"]:
+        failures.append(f"import main imported {name}, which should load on first use")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters timed")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules listed")
+    parser.add_argument("--budget-ms", type=float, default=1800, help="median import time allowed")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.top)
+    failures = budget_failures(result, args.budget_ms)
+    if args.json:
+        print(json.dumps({**result, "budget_ms": args.budget_ms, "failures": failures}, indent=2))
+    else:
+        print(f"import main ({result['runs']} runs): median {result['median_ms']:.0f} ms, "
+              f"min {result['min_ms']:.0f} ms, max {result['max_ms']:.0f} ms, {result['modules']} modules")
+        print("slowest modules (own time):")
+        for module in result["slowest"]:
+            print(f"  {module['self_ms']:8.1f} ms  {module['cumulative_ms']:8.1f} ms cumulative  {module['module']}")
+
+    for message in failures:
+        print(f"BUDGET {message}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print(f"within budget ({args.budget_ms:.0f} ms, no import-time I/O or eager heavy modules)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Benchmark: write throughput, commit per repository call vs unit of work.
+
+Times three write operations against a SQLite file database, each run
+in a fresh session as a request would:
+
+ - create: insert one item;
+ - update: rename one existing item;
+ - batch: insert `--batch` items in one operation.
+
+Each is run two ways:
+
+ - before: repositories committed and refreshed themselves (how
+   `ItemRepository` wrote before `utils.unit_of_work`): one COMMIT per
+   repository call plus a SELECT reloading the row, and sessions that
+   expire objects on commit;
+ - after: the current repositories, which only flush, inside one
+   `transaction` per operation, on `SessionLocal`.
+
+Besides operations per second, it counts statements and commits per
+operation. The script exits with status 1 unless the unit of work
+issues fewer statements, and no more commits, than the old pattern for
+every operation, i.e. when a repository commits or reloads again. Those
+counts do not depend on the machine; the throughput does.
+
+The app's engine settings apply (WAL, `synchronous=NORMAL`). With
+`--synchronous full` every commit is also an fsync, as on a durable
+MySQL setup (`innodb_flush_log_at_trx_commit=1`), which is where saved
+commits count most. Table versions are bumped in an in-process
+fakeredis.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.bench_writes
+    python -m benchmarks.bench_writes --ops 2000 --batch 50 --synchronous full --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+OPERATIONS = ("create", "update", "batch")
+
+
+def _legacy_create(db, item_class, name: str):
+    item = item_class(name=name)
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def _legacy_update(db, item_class, item_id: int, name: str):
+    item = db.query(item_class).filter(item_class.id == item_id).first()
+    item.name = name
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def run(ops: int, batch: int, synchronous: str) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench_writes_")
+    # Read by `utils.config` and `database` at import
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'writes.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+
+    import fakeredis
+    from utils import config
+
+    # Installed before the modules binding `redis_client` at import time
+    config.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    config.async_redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    from database import SessionLocal, engine, migrate
+    from models.items_model import Item
+    from repositories.item_repository import ItemRepository
+    from utils.table_versions import VersionedSession
+    from utils.unit_of_work import transaction
+
+    if synchronous == "full":
+        @event.listens_for(engine, "connect")
+        def _full_sync(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA synchronous=FULL")
+
+    counts = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _count_statement(*args):
+        counts["statements"] += 1
+
+    @event.listens_for(engine, "commit")
+    def _count_commit(connection):
+        counts["commits"] += 1
+
+    migrate()
+    # The session factory before the unit of work: expiring on commit
+    LegacySession = sessionmaker(class_=VersionedSession, autoflush=False, bind=engine)
+
+    with SessionLocal() as db, transaction(db):
+        ids = [row.id for row in ItemRepository(db).bulk_create([f"seed {n}" for n in range(ops)])]
+
+    def before(operation: str, n: int):
+        with LegacySession() as db:
+            if operation == "create":
+                _legacy_create(db, Item, f"item {n}")
+            elif operation == "update":
+                _legacy_update(db, Item, ids[n], f"renamed {n}")
+            else:
+                for k in range(batch):
+                    _legacy_create(db, Item, f"batch {n}.{k}")
+
+    def after(operation: str, n: int):
+        with SessionLocal() as db, transaction(db):
+            repo = ItemRepository(db)
+            if operation == "create":
+                repo.create(f"item {n}")
+            elif operation == "update":
+                repo.update(ids[n], f"renamed again {n}")
+            else:
+                for k in range(batch):
+                    repo.create(f"batch {n}.{k}")
+
+    results = {}
+    for operation in OPERATIONS:
+        for variant, fn in (("before", before), ("after", after)):
+            counts.update(statements=0, commits=0)
+            started = time.perf_counter()
+            for n in range(ops):
+                fn(operation, n)
+            seconds = time.perf_counter() - started
+            results[f"{operation}/{variant}"] = {
+                "ops_per_sec": ops / seconds,
+                "rows_per_sec": ops * (batch if operation == "batch" else 1) / seconds,
+                "statements_per_op": counts["statements"] / ops,
+                "commits_per_op": counts["commits"] / ops,
+            }
+
+    engine.dispose()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return {"ops": ops, "batch": batch, "synchronous": synchronous, "results": results}
+
+
+def regressions(result: dict) -> list[str]:
+    """Operations where the unit of work saves no statement or adds commits."""
+    failures = []
+    for operation in OPERATIONS:
+        before = result["results"][f"{operation}/before"]
+        after = result["results"][f"{operation}/after"]
+        if after["statements_per_op"] >= before["statements_per_op"]:
+            failures.append(f"{operation}: statements_per_op "
+                            f"{before['statements_per_op']:.2f} -> {after['statements_per_op']:.2f}")
+        if after["commits_per_op"] > before["commits_per_op"]:
+            failures.append(f"{operation}: commits_per_op "
+                            f"{before['commits_per_op']:.2f} -> {after['commits_per_op']:.2f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--ops", type=int, default=1000, help="operations timed per variant")
+    parser.add_argument("--batch", type=int, default=10, help="items written by one batch operation")
+    parser.add_argument("--synchronous", choices=("normal", "full"), default="normal",
+                        help="SQLite synchronous mode (full: fsync per commit)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    result = run(args.ops, args.batch, args.synchronous)
+    failures = regressions(result)
+    if args.json:
+        print(json.dumps({**result, "regressions": failures}, indent=2))
+    else:
+        print(f"{args.ops} ops per variant, batch of {args.batch}, synchronous={args.synchronous}")
+        print(f"{'':18}{'ops/s':>10}{'rows/s':>10}{'stmts/op':>10}{'commits/op':>12}")
+        for name, stats in result["results"].items():
+            print(f"{name:18}{stats['ops_per_sec']:>10.0f}{stats['rows_per_sec']:>10.0f}"
+                  f"{stats['statements_per_op']:>10.2f}{stats['commits_per_op']:>12.2f}")
+        for operation in OPERATIONS:
+            before = result["results"][f"{operation}/before"]["ops_per_sec"]
+            after = result["results"][f"{operation}/after"]["ops_per_sec"]
+            print(f"{operation}: {after / before:.2f}x throughput")
+
+    for message in failures:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
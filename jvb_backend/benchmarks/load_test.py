@@ -0,0 +1,501 @@
+"""Load test: throughput and latency per endpoint under realistic mixes.
+
+Starts the app under uvicorn against a fresh SQLite file and an
+in-process fakeredis TCP server (both installed from
+requirements-dev.txt), seeds users and items through the API, then runs
+`--concurrency` virtual users, each looping over requests drawn from a
+scenario's weighted mix for `--duration` seconds after `--warmup`:
+
+ - `login`: login bursts (`POST /auth/login`, Argon2 verify per request);
+ - `auth_read`: authenticated reads (`GET /users/me`: JWT decode,
+   revocation check, user cache);
+ - `items`: item CRUD and listing;
+ - `presence`: heartbeats and status polling, single and batched;
+ - `mixed`: all of the above in production-like proportions.
+
+Reports requests, throughput, error count and p50/p95/p99 latency per
+endpoint (client-side, plus the server's own `app` time from
+`Server-Timing`). `--save-baseline` stores the report as JSON;
+`--baseline` compares a run against a stored one and exits with status
+1 when an endpoint regressed: p95 or p99 latency above the baseline by
+more than `--threshold` (and `--min-delta-ms`), throughput below it by
+more than `--threshold`, or a higher error rate.
+
+Run from `jvb_backend/`:
+
+    python -m benchmarks.load_test --scenario mixed --save-baseline
+    python -m benchmarks.load_test --scenario mixed --baseline
+    python -m benchmarks.load_test --scenario all --workers 4 --json
+    python -m benchmarks.load_test --url http://localhost:8000 --scenario auth_read
+
+Design notes:
+ - Baselines default to `benchmarks/baselines/<scenario>.json`. They
+   are only comparable on the same machine with the same options
+   (workers, concurrency, ASYNC_MODE, Argon2 costs), which are stored
+   with them and checked before comparing.
+ - The server gets `RATE_LIMIT_ENABLED=false` unless the environment
+   sets it: every virtual user logs in from 127.0.0.1, which the login
+   limits would otherwise throttle within seconds. Other settings
+   (ASYNC_MODE, ARGON2_*, HASH_*, ...) are inherited from the
+   environment; the database and Redis always point at the scratch ones.
+ - Virtual users run in one asyncio process with httpx. Client-side
+   latency therefore includes the client's own overhead, which grows
+   when the driver saturates a core; the server-side `app` timing does
+   not. Compare both before blaming the server.
+ - `--url` targets an already running server (with its own database
+   and Redis); seeding then creates `loadtest-*` users and items there.
+   Never point it at production.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import fakeredis
+import httpx
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+PASSWORD = "LoadTest-password-1"
+STARTUP_TIMEOUT_SECONDS = 60
+# Options that must match for a baseline comparison to mean anything
+COMPARABLE_OPTIONS = ("concurrency", "workers", "users", "async_mode", "argon2")
+
+# Scenario -> operation -> weight
+SCENARIOS = {
+    "login": {"login": 1},
+    "auth_read": {"me": 1},
+    "items": {"item_get": 50, "item_list": 15, "item_create": 15, "item_update": 15, "item_delete": 5},
+    "presence": {"heartbeat": 20, "status": 40, "status_batch": 20, "online": 20},
+    "mixed": {
+        "login": 2, "me": 20,
+        "item_get": 25, "item_list": 8, "item_create": 5, "item_update": 5, "item_delete": 2,
+        "heartbeat": 10, "status": 13, "status_batch": 5, "online": 5,
+    },
+}
+
+
+@dataclass
+class Account:
+    """A seeded user; virtual users share accounts round-robin."""
+
+    username: str
+    user_id: int
+    token: str
+
+
+@dataclass
+class VirtualUser:
+    """One simulated client: an account plus the items it owns.
+
+    A virtual user only updates and deletes its own items, so concurrent
+    virtual users never race on a row and every request should succeed.
+    """
+
+    account: Account
+    item_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Samples:
+    """Latencies (ms) and statuses recorded for one operation."""
+
+    latencies: list[float] = field(default_factory=list)
+    server: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict = field(default_factory=dict)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _RedisStandIn(fakeredis.TcpFakeServer):
+    """fakeredis over TCP, with Nagle disabled on accepted sockets.
+
+    Real Redis sets TCP_NODELAY; without it, replies written in several
+    segments wait for the client's delayed ACK (~40 ms on Linux), which
+    swamps everything being measured.
+    """
+
+    def get_request(self):
+        connection, address = super().get_request()
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection, address
+
+
+def _start_redis() -> tuple[fakeredis.TcpFakeServer, int]:
+    port = _free_port()
+    server = _RedisStandIn(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True, name="fakeredis").start()
+    return server, port
+
+
+def _start_app(port: int, redis_port: int, workers: int, workdir: str) -> subprocess.Popen:
+    env = {"RATE_LIMIT_ENABLED": "false", **os.environ}
+    env.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        REDIS_HOST="127.0.0.1",
+        REDIS_PORT=str(redis_port),
+        REDIS_DB="0",
+    )
+    env.setdefault("SECRET_KEY", "load-test-secret-key-load-test-secret")
+    env.setdefault("REFRESH_SECRET_KEY", "load-test-refresh-key-load-test-refresh")
+    env.setdefault("ALGORITHM", "HS256")
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+    ]
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(command, cwd=backend_dir, env=env)
+
+
+async def _wait_ready(client: httpx.AsyncClient, process: subprocess.Popen | None):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} during startup")
+        try:
+            if (await client.get("/ping")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {STARTUP_TIMEOUT_SECONDS} s")
+
+
+def _check(response: httpx.Response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} "
+                           f"returned {response.status_code}: {response.text[:200]}")
+
+
+async def _seed_account(client: httpx.AsyncClient, run_id: str, index: int) -> Account:
+    username = f"loadtest-{run_id}-{index}"
+    _check(await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": PASSWORD,
+    }))
+    login = await client.post("/auth/login", json={"username": username, "password": PASSWORD})
+    _check(login)
+    token = login.json()["access_token"]
+    me = await client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    _check(me)
+    return Account(username, me.json()["id"], token)
+
+
+async def _seed_items(client: httpx.AsyncClient, user: VirtualUser, items: int):
+    created = await client.post("/items/bulk", json={
+        "items": [{"name": f"{user.account.username} item {n}"} for n in range(items)],
+    })
+    _check(created)
+    user.item_ids = [result["id"] for result in created.json()["results"]]
+
+
+async def _seed(client: httpx.AsyncClient, accounts: int, concurrency: int, items: int) -> list[VirtualUser]:
+    run_id = uuid.uuid4().hex[:8]
+    # A few at a time: registration hashes a password, and a flood would
+    # hit the hash executor's backpressure (503)
+    semaphore = asyncio.Semaphore(4)
+
+    async def seed_one(index: int) -> Account:
+        async with semaphore:
+            return await _seed_account(client, run_id, index)
+
+    seeded = await asyncio.gather(*(seed_one(index) for index in range(accounts)))
+    users = [VirtualUser(seeded[index % accounts]) for index in range(concurrency)]
+    await asyncio.gather(*(_seed_items(client, user, items) for user in users))
+    return users
+
+
+async def _operation(name: str, client: httpx.AsyncClient, user: VirtualUser,
+                     user_ids: list[int], rng: random.Random) -> httpx.Response:
+    """Send one request of operation `name` as `user`."""
+    account = user.account
+    auth = {"Authorization": f"Bearer {account.token}"}
+    if name == "login":
+        return await client.post("/auth/login", json={"username": account.username, "password": PASSWORD})
+    if name == "me":
+        return await client.get("/users/me", headers=auth)
+    if name == "item_get":
+        return await client.get(f"/items/{rng.choice(user.item_ids)}")
+    if name == "item_list":
+        return await client.get("/items/", params={"limit": 50})
+    if name == "item_create":
+        response = await client.post("/items/", json={"name": f"{account.username} item {rng.random():.6f}"})
+        if response.status_code == 201:
+            user.item_ids.append(response.json()["item"]["id"])
+        return response
+    if name == "item_update":
+        return await client.put(f"/items/{rng.choice(user.item_ids)}", json={"name": f"renamed {rng.random():.6f}"})
+    if name == "item_delete":
+        item_id = user.item_ids.pop(rng.randrange(len(user.item_ids)))
+        return await client.delete(f"/items/{item_id}")
+    if name == "heartbeat":
+        return await client.post("/presence/heartbeat", headers=auth)
+    if name == "status":
+        return await client.get(f"/users/status/{rng.choice(user_ids)}")
+    if name == "status_batch":
+        return await client.post("/users/status", json={"user_ids": rng.sample(user_ids, min(50, len(user_ids)))})
+    if name == "online":
+        return await client.get("/users/online", params={"limit": 50})
+    raise ValueError(f"Unknown operation {name!r}")
+
+
+def _server_ms(response: httpx.Response) -> float | None:
+    for part in response.headers.get("server-timing", "").split(","):
+        metric, _, duration = part.strip().partition(";dur=")
+        if metric == "app" and duration:
+            return float(duration)
+    return None
+
+
+async def _virtual_user(client, user, user_ids, mix, seed, measure_from, stop_at, samples):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < stop_at:
+        name = rng.choices(names, weights)[0]
+        if name in ("item_get", "item_update", "item_delete") and len(user.item_ids) < 2:
+            # Deletes ran the user's items down; create one instead
+            name = "item_create"
+        started = time.perf_counter()
+        try:
+            response = await _operation(name, client, user, user_ids, rng)
+        except httpx.HTTPError:
+            status = "transport_error"
+            response = None
+        else:
+            status = response.status_code
+        if started < measure_from:
+            continue
+        sample = samples.setdefault(name, Samples())
+        sample.latencies.append((time.perf_counter() - started) * 1000)
+        sample.statuses[status] = sample.statuses.get(status, 0) + 1
+        if response is None or response.status_code >= 400:
+            sample.errors += 1
+        elif (server_ms := _server_ms(response)) is not None:
+            sample.server.append(server_ms)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def _summary(samples: Samples, seconds: float) -> dict:
+    latencies = samples.latencies
+    return {
+        "requests": len(latencies),
+        "errors": samples.errors,
+        "error_rate": samples.errors / len(latencies) if latencies else 0.0,
+        "rps": len(latencies) / seconds,
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "server_p50_ms": _percentile(samples.server, 50),
+        "server_p95_ms": _percentile(samples.server, 95),
+        "statuses": {str(status): count for status, count in sorted(samples.statuses.items(), key=str)},
+    }
+
+
+async def _run_scenario(client, users, scenario, duration, warmup, seed) -> dict:
+    samples: dict[str, Samples] = {}
+    user_ids = sorted({user.account.user_id for user in users})
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+    await asyncio.gather(*(
+        _virtual_user(client, user, user_ids, SCENARIOS[scenario], seed + index, measure_from, stop_at, samples)
+        for index, user in enumerate(users)
+    ))
+    total = Samples()
+    for sample in samples.values():
+        total.latencies += sample.latencies
+        total.server += sample.server
+        total.errors += sample.errors
+        for status, count in sample.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    return {
+        "endpoints": {name: _summary(samples[name], duration) for name in sorted(samples)},
+        "total": _summary(total, duration),
+    }
+
+
+def _argon2_settings() -> str:
+    return ",".join(os.environ.get(name, "default") for name in (
+        "ARGON2_TIME_COST", "ARGON2_MEMORY_COST", "ARGON2_PARALLELISM",
+    ))
+
+
+async def _run(args, scenarios: list[str]) -> dict:
+    redis_server = process = None
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    base_url = args.url
+    if base_url is None:
+        redis_server, redis_port = _start_redis()
+        port = _free_port()
+        process = _start_app(port, redis_port, args.workers, workdir)
+        base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await _wait_ready(client, process)
+            started = time.perf_counter()
+            users = await _seed(client, args.users, args.concurrency, args.items)
+            print(f"seeded {args.users} users and {args.items} items per virtual user "
+                  f"in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+            results = {}
+            for scenario in scenarios:
+                results[scenario] = await _run_scenario(
+                    client, users, scenario, args.duration, args.warmup, args.seed,
+                )
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if redis_server is not None:
+            redis_server.shutdown()
+            redis_server.server_close()
+    options = {
+        "concurrency": args.concurrency,
+        "workers": args.workers if args.url is None else None,
+        "users": args.users,
+        "duration": args.duration,
+        "async_mode": os.environ.get("ASYNC_MODE", "false").lower() == "true",
+        "argon2": _argon2_settings(),
+    }
+    return {scenario: {"scenario": scenario, "options": options, **result} for scenario, result in results.items()}
+
+
+def compare(result: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Regressions of `result` against `baseline`, one message each.
+
+    Raises:
+        ValueError: when the runs used different options.
+    """
+    for option in COMPARABLE_OPTIONS:
+        if result["options"].get(option) != baseline["options"].get(option):
+            raise ValueError(f"Baseline was recorded with {option}={baseline['options'].get(option)!r}, "
+                             f"this run used {result['options'].get(option)!r}")
+    regressions = []
+    for name, base in baseline["endpoints"].items():
+        current = result["endpoints"].get(name)
+        if current is None or not base["requests"]:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            limit = max(base[key] * (1 + threshold), base[key] + min_delta_ms)
+            if current[key] > limit:
+                regressions.append(f"{name}: {key[:3]} {current[key]:.2f} ms > {limit:.2f} ms "
+                                   f"(baseline {base[key]:.2f} ms)")
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {current['rps']:.1f} req/s < {base['rps'] * (1 - threshold):.1f} req/s "
+                               f"(baseline {base['rps']:.1f} req/s)")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {current['error_rate']:.1%} "
+                               f"(baseline {base['error_rate']:.1%})")
+    return regressions
+
+
+def _baseline_path(path: str | None, scenario: str) -> str:
+    return path or os.path.join(BASELINE_DIR, f"{scenario}.json")
+
+
+def _print_report(report: dict):
+    options = report["options"]
+    details = [f"{options['concurrency']} virtual users", f"{options['duration']:g} s"]
+    if options["workers"] is not None:
+        details.append(f"{options['workers']} worker(s)")
+    if options["async_mode"]:
+        details.append("ASYNC_MODE")
+    print(f"\n{report['scenario']}: {', '.join(details)}")
+    print(f"  {'endpoint':<13} {'requests':>8} {'req/s':>8} {'errors':>6} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'server p50':>10}")
+    rows = [*report["endpoints"].items(), ("TOTAL", report["total"])]
+    for name, stats in rows:
+        print(f"  {name:<13} {stats['requests']:>8} {stats['rps']:>8.1f} {stats['errors']:>6} "
+              f"{stats['p50_ms']:>6.2f}ms {stats['p95_ms']:>6.2f}ms {stats['p99_ms']:>6.2f}ms "
+              f"{stats['server_p50_ms']:>8.2f}ms")
+        if stats["errors"]:
+            statuses = ", ".join(f"{status}: {count}" for status, count in stats["statuses"].items())
+            print(f"  {'':<13} statuses {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="mixed")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before each scenario")
+    parser.add_argument("--users", type=int, default=32, help="accounts seeded (shared by virtual users)")
+    parser.add_argument("--items", type=int, default=20, help="items seeded per account")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", nargs="?", const="", metavar="PATH",
+                        help="store results as the baseline (default benchmarks/baselines/<scenario>.json)")
+    parser.add_argument("--baseline", nargs="?", const="", metavar="PATH",
+                        help="compare against a stored baseline; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression of p95/p99 and throughput")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="latency increases below this are never regressions")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+    if args.scenario == "all" and (args.baseline or args.save_baseline):
+        parser.error("a baseline PATH needs a single --scenario; with all, the default paths are used")
+
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    reports = asyncio.run(_run(args, scenarios))
+
+    if args.json:
+        print(json.dumps(reports if len(reports) > 1 else reports[scenarios[0]], indent=2))
+    else:
+        for report in reports.values():
+            _print_report(report)
+
+    if args.save_baseline is not None:
+        for scenario, report in reports.items():
+            path = _baseline_path(args.save_baseline, scenario)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"baseline saved to {path}", file=sys.stderr)
+
+    if args.baseline is not None:
+        failed = False
+        for scenario, report in reports.items():
+            path = _baseline_path(args.baseline, scenario)
+            with open(path) as f:
+                baseline = json.load(f)
+            try:
+                regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+            except ValueError as exc:
+                sys.exit(f"{scenario}: {exc}")
+            for message in regressions:
+                print(f"REGRESSION {scenario} {message}", file=sys.stderr)
+            failed |= bool(regressions)
+        if failed:
+            sys.exit(1)
+        print("no regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
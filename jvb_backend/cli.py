@@ -0,0 +1,102 @@
+"""Command-line maintenance tasks: bulk import / export and migrations.
+
+Run from `jvb_backend/`:
+
+    python cli.py import items items.ndjson
+    python cli.py import users users.csv --chunk-size 500
+    python cli.py export items items.csv
+    python cli.py export users --format ndjson > users.ndjson
+    python cli.py migrate
+    python cli.py migrate-presence
+
+The format is taken from the file extension (`.csv`, otherwise NDJSON)
+unless `--format` is given; `-` (the default for export) means stdout /
+stdin. Imports print a JSON report with rows/sec when they finish and a
+progress line to stderr after every committed chunk.
+
+`migrate` creates missing tables, columns and indexes; the other
+commands do it first as well unless `DB_AUTO_MIGRATE` is off.
+"""
+
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+
+from database import SessionLocal, migrate, prepare_database
+from services.import_export_service import IMPORTERS, export_lines, import_lines
+from utils.bulk_io import FORMATS, ImportReport, format_from_filename
+from utils.config import IMPORT_CHUNK_SIZE
+from utils.hash_executor import hash_executor
+from utils.presence import presence_store
+
+
+def _open(path: str, mode: str):
+    """Open `path`, or wrap stdin/stdout for "-" without closing it."""
+    if path == "-":
+        return nullcontext(sys.stdin if "r" in mode else sys.stdout)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def print_progress(report: ImportReport):
+    progress = report.as_dict()
+    print(
+        f"{progress['inserted']} inserted, {progress['skipped']} skipped, "
+        f"{progress['rows_per_sec']} rows/sec",
+        file=sys.stderr,
+    )
+
+
+def run_import(args) -> dict:
+    fmt = args.format or format_from_filename(args.path)
+    with _open(args.path, "r") as source, SessionLocal() as db:
+        return import_lines(db, args.kind, source, fmt, args.chunk_size, on_chunk=print_progress)
+
+
+def run_export(args):
+    fmt = args.format or format_from_filename(args.path)
+    with _open(args.path, "w") as target, SessionLocal() as db:
+        for line in export_lines(db, args.kind, fmt):
+            target.write(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of items and users.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="load NDJSON/CSV into the database")
+    import_parser.add_argument("kind", choices=sorted(IMPORTERS))
+    import_parser.add_argument("path", help="input file, or - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="rows per transaction")
+
+    export_parser = commands.add_parser("export", help="dump a table as NDJSON/CSV")
+    export_parser.add_argument("kind", choices=sorted(IMPORTERS))
+    export_parser.add_argument("path", nargs="?", default="-", help="output file, or - for stdout")
+    export_parser.add_argument("--format", choices=FORMATS)
+
+    commands.add_parser("migrate", help="create missing tables, columns and indexes")
+
+    migrate_parser = commands.add_parser(
+        "migrate-presence", help="move legacy user:{id}:* presence keys into the compact store"
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=1000, help="users per round-trip")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "migrate":
+            migrate()
+            return
+        prepare_database()
+        if args.command == "import":
+            print(json.dumps(run_import(args), indent=2))
+        elif args.command == "export":
+            run_export(args)
+        else:
+            print(json.dumps(presence_store.migrate_legacy_keys(args.batch_size), indent=2))
+    finally:
+        hash_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
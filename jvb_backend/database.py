@@ -1,19 +1,285 @@
-from sqlalchemy import create_engine
+"""Database engines and session factories.
+
+Engines are configured from the `DATABASE_URL` / `DB_*` settings in
+`utils.config`, so the same code runs on the default SQLite file in
+development and on MySQL (the production target) or PostgreSQL.
+
+Design notes:
+ - Both engines use an instrumented queue pool (see `utils.db_pool`) so
+   checkout waits and pool saturation are visible at /metrics/db-pool.
+   With `METRICS_ENABLED`, every engine (replicas included) also times
+   its statements into /metrics (see `utils.metrics`). With
+   `QUERY_LOG_ENABLED`, the same hooks feed the slow-query log and the
+   per-request N+1 / duplicate read detection (see `utils.query_log`).
+ - `DB_STATEMENT_TIMEOUT_MS` is applied per connection: MySQL's
+   `max_execution_time` (SELECT statements only) through `init_command`,
+   PostgreSQL's `statement_timeout` through the driver's connect options.
+   SQLite has no statement timeout; `busy_timeout` bounds lock waits.
+ - SQLite connections switch to WAL with `synchronous=NORMAL` and enable
+   mmap: readers no longer block the writer, and commits skip an fsync
+   while staying durable against application crashes.
+ - The async URL is derived from `DATABASE_URL` (aiosqlite / aiomysql /
+   asyncpg) unless `ASYNC_DATABASE_URL` is set, so both request paths
+   always point at the same database.
+ - Replicas (`DATABASE_REPLICA_URLS`) get their own engines with the
+   same pool settings; read-only routes depend on `get_read_db`, which
+   routes through `replica_router` (see `utils.db_replicas`). Tables are
+   only created on the primary.
+ - Sessions are `VersionedSession`s, which bump the per-table version
+   counters behind list ETags after each commit (see
+   `utils.table_versions`).
+ - Services commit through a unit of work (`utils.unit_of_work`);
+   repositories only flush. Sessions do not expire objects on commit,
+   so committed results are serialized without reloading them.
+ - There are no migration scripts: `migrate` runs `create_all` for
+   missing tables, `_add_missing_timestamps` to add `updated_at` to
+   tables created before it existed (backfilled with the upgrade time)
+   and `_add_missing_indexes` for indexes declared after their table.
+   The item search index is created the same way (see
+   `repositories.item_search`).
+ - Importing this module does no I/O: engines connect lazily, and
+   `migrate` runs from the app's lifespan (`DB_AUTO_MIGRATE`, the
+   default) or `python cli.py migrate`. Under gunicorn the master
+   migrates once before forking workers (see gunicorn.conf.py), which
+   then skip it.
+"""
+
+from datetime import datetime
+from fastapi import Request
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from models.user_model import Base
 from models.items_model import Item
+from utils.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+    DATABASE_REPLICA_URLS,
+    ASYNC_DATABASE_REPLICA_URLS,
+    REPLICA_STRATEGY,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_LAG_CHECK_SECONDS,
+    METRICS_ENABLED,
+    QUERY_LOG_ENABLED,
+    DB_AUTO_MIGRATE,
+)
+from utils.db_pool import PoolMetrics, instrumented_pool_class
+from utils.db_replicas import Replica, ReplicaMonitor, ReplicaRouter
+from utils.metrics import instrument_engine, statement_observers
+from utils.query_log import query_log
+from repositories.item_search import item_search_index
+from utils.table_versions import VersionedSession
+
+if QUERY_LOG_ENABLED:
+    statement_observers.append(query_log.observe)
+
+# Async driver used for each backend when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "mysql": "aiomysql",
+    "postgresql": "asyncpg",
+}
+
+
+def async_url_for(url: URL) -> URL:
+    """Return `url` with its driver swapped for the backend's async driver.
+
+    Raises:
+        ValueError: if the backend has no known async driver; set
+                    ASYNC_DATABASE_URL explicitly in that case.
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend!r}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _connect_args(url: URL) -> dict:
+    """Driver-level connect arguments (statement timeouts, thread checks)."""
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        # Sessions are handed between threadpool threads
+        return {"check_same_thread": False} if url.get_driver_name() == "pysqlite" else {}
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    if backend == "mysql":
+        return {"init_command": f"SET SESSION max_execution_time = {DB_STATEMENT_TIMEOUT_MS}"}
+    if backend == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def _engine_options(url: URL, pool_base) -> tuple[dict, PoolMetrics]:
+    """Build `create_engine` keyword arguments and the pool's metrics."""
+    options = {"connect_args": _connect_args(url)}
+    if _is_memory_sqlite(url):
+        # In-memory SQLite is one connection per thread; no queue to tune
+        return options, PoolMetrics(capacity=None)
+    metrics = PoolMetrics(capacity=DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    options.update(
+        poolclass=instrumented_pool_class(pool_base, metrics),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options, metrics
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def _create_engines(url: URL, async_url: URL):
+    """Create the sync and async engines (plus pool metrics) for one database."""
+    options, pool_metrics = _engine_options(url, QueuePool)
+    sync_engine = create_engine(url, **options)
+    async_options, async_pool_metrics = _engine_options(async_url, AsyncAdaptedQueuePool)
+    async_db_engine = create_async_engine(async_url, **async_options)
+    if url.get_backend_name() == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    if async_url.get_backend_name() == "sqlite":
+        event.listen(async_db_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    if METRICS_ENABLED or QUERY_LOG_ENABLED:
+        instrument_engine(sync_engine)
+        instrument_engine(async_db_engine.sync_engine)
+    return sync_engine, pool_metrics, async_db_engine, async_pool_metrics
+
 
-DATABASE_URL = "sqlite:///./users.db"
+def _create_replica(index: int) -> Replica:
+    url = make_url(DATABASE_REPLICA_URLS[index])
+    if index < len(ASYNC_DATABASE_REPLICA_URLS):
+        async_url = make_url(ASYNC_DATABASE_REPLICA_URLS[index])
+    else:
+        async_url = async_url_for(url)
+    replica_engine, pool_metrics, replica_async_engine, async_pool_metrics = _create_engines(url, async_url)
+    return Replica(
+        url.render_as_string(hide_password=True),
+        engine=replica_engine,
+        async_engine=replica_async_engine,
+        pool_metrics=pool_metrics,
+        async_pool_metrics=async_pool_metrics,
+    )
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database_url = make_url(DATABASE_URL)
+async_database_url = make_url(ASYNC_DATABASE_URL) if ASYNC_DATABASE_URL else async_url_for(database_url)
+
+engine, engine_pool_metrics, async_engine, async_engine_pool_metrics = _create_engines(
+    database_url, async_database_url
+)
+
+SessionLocal = sessionmaker(
+    class_=VersionedSession, autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+# Async sessions serve the `async def` request path. They point at the
+# same database so both paths can be benchmarked against identical data.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, sync_session_class=VersionedSession, autoflush=False, expire_on_commit=False
+)
+
+replica_router = ReplicaRouter(
+    [_create_replica(index) for index in range(len(DATABASE_REPLICA_URLS))],
+    strategy=REPLICA_STRATEGY,
+    max_lag=REPLICA_MAX_LAG_SECONDS,
+)
+replica_monitor = ReplicaMonitor(replica_router, REPLICA_LAG_CHECK_SECONDS)
+
+
+def _add_missing_timestamps():
+    """Add `updated_at` to tables created before the column existed."""
+    tables = inspect(engine).get_table_names()
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables or "updated_at" not in table.c:
+                continue
+            columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            if "updated_at" in columns:
+                continue
+            column_type = table.c.updated_at.type.compile(dialect=engine.dialect)
+            # A constant default keeps NOT NULL valid on every backend (SQLite
+            # rejects non-constant defaults in ADD COLUMN); rows are backfilled
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN updated_at {column_type} "
+                "NOT NULL DEFAULT '1970-01-01 00:00:00'"
+            ))
+            connection.execute(table.update().values(updated_at=datetime.utcnow()))
+
+
+def _add_missing_indexes():
+    """Create declared indexes that existing tables do not have yet."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate():
+    """Create missing tables, columns and indexes, and the item search index.
+
+    Idempotent. Runs at startup when `DB_AUTO_MIGRATE` is set (see the
+    lifespan in main.py), or explicitly with `python cli.py migrate`.
+    """
+    _add_missing_timestamps()
+    Base.metadata.create_all(bind=engine)
+    _add_missing_indexes()
+    item_search_index.ensure(engine)
+
+
+def prepare_database():
+    """Startup hook: `migrate`, or only detect the search index without DDL."""
+    if DB_AUTO_MIGRATE:
+        migrate()
+    else:
+        item_search_index.ensure(engine, create=False)
 
-Base.metadata.create_all(bind=engine)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    """Session for read-only routes: a replica when one is eligible, else the primary."""
+    replica = replica_router.route(request.cookies)
+    db = SessionLocal(bind=replica.engine) if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of `get_read_db`."""
+    replica = replica_router.route(request.cookies, use_async=True)
+    async with (AsyncSessionLocal(bind=replica.async_engine) if replica else AsyncSessionLocal()) as db:
+        yield db
@@ -0,0 +1,59 @@
+"""Production server: gunicorn master with preloaded app and uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The master imports the app once (`preload_app`), migrates the schema,
+then forks `WEB_CONCURRENCY` workers that share the imported modules
+copy-on-write instead of each importing FastAPI, SQLAlchemy and the
+routers again. Workers start in milliseconds and are restarted the same
+way when they exit or reach `max_requests`.
+
+Design notes:
+ - Workers do not migrate (`DB_AUTO_MIGRATE` defaults to false here), so
+   N workers never race on DDL; the master runs `database.migrate` once
+   in `on_starting`, before the first fork.
+ - Nothing opened in the master may be shared by workers: the engine
+   pool is disposed after migrating and again (without closing the
+   parent's sockets) in each worker. Redis clients reconnect per process
+   by themselves, and background threads, the hash pool and the
+   presence/revocation listeners start in each worker's lifespan.
+ - `gc.freeze()` after loading moves every object the master built into
+   a permanent generation, so workers' garbage collections do not touch
+   (and copy) the shared pages.
+ - Code changes need a restart, not a HUP: with `preload_app`, reloading
+   workers re-forks the already-loaded master.
+"""
+
+import gc
+import multiprocessing
+import os
+
+# Set before the app is imported (the app is loaded after this file)
+os.environ.setdefault("DB_AUTO_MIGRATE", "false")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+# Recycle workers now and then so slow leaks cannot grow unbounded;
+# jitter keeps them from restarting together
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 1000))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("KEEPALIVE", 5))
+accesslog = os.getenv("ACCESS_LOG") or None
+
+
+def on_starting(server):
+    import database
+
+    database.migrate()
+    database.engine.dispose()
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import database
+
+    database.engine.dispose(close=False)
@@ -1,11 +1,80 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import auth_route, item_route, user_route
+from routers import metrics_route, presence_route, transfer_route
+from database import prepare_database, replica_monitor, replica_router
+from utils.config import (
+    ASYNC_MODE,
+    REPLICA_STICKY_SECONDS,
+    METRICS_ENABLED,
+    SERVER_TIMING_ENABLED,
+    QUERY_LOG_ENABLED,
+    PROFILING_TOKEN,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_MODE,
+    PROFILE_INTERVAL_MS,
+    PROFILE_DIR,
+)
+from utils.db_replicas import ReadYourWritesMiddleware
+from utils.hash_executor import hash_executor
+from utils.metrics import MetricsMiddleware
+from utils.presence import presence_sweeper
+from utils.query_log import QueryAuditMiddleware
+from utils.presence_events import presence_broadcaster
+from utils.revocation import revocation_listener
 
-app = FastAPI()
+if ASYNC_MODE:
+    from routers import async_auth_route as auth_route
+    from routers import async_item_route as item_route
+    from routers import async_user_route as user_route
+else:
+    from routers import auth_route, item_route, user_route
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prepare_database()
+    revocation_listener.start()
+    replica_monitor.start()
+    presence_sweeper.start()
+    yield
+    await presence_broadcaster.stop()
+    presence_sweeper.stop()
+    replica_monitor.stop()
+    revocation_listener.stop()
+    hash_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Only needed when reads can go to a replica
+if replica_router.replicas:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=REPLICA_STICKY_SECONDS)
+
+if QUERY_LOG_ENABLED:
+    app.add_middleware(QueryAuditMiddleware)
+
+if PROFILING_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    from utils.profiling import ProfilingMiddleware
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=PROFILING_TOKEN,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        mode=PROFILE_MODE,
+        directory=PROFILE_DIR,
+        interval=PROFILE_INTERVAL_MS / 1000,
+    )
+
+# Added last so it is outermost and times the other middleware too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING_ENABLED)
+
+app.include_router(transfer_route.router)
 app.include_router(user_route.router)
 app.include_router(auth_route.router)
 app.include_router(item_route.router)
+app.include_router(presence_route.router)
+app.include_router(metrics_route.router)
 
 @app.get("/")
 def read_root():
@@ -13,4 +82,4 @@ def read_root():
 
 @app.get("/ping")
 def ping():
-    return {"message": "pong"}
\ No newline at end of file
+    return {"message": "pong"}
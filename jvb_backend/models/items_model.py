@@ -6,10 +6,16 @@ This module contains the Item class which maps to the 'items' table.
 Fields:
  - id: primary key integer, auto-increment
  - name: text name for the item (required)
+ - updated_at: UTC time of the last write (drives HTTP validators)
+
+Indexes:
+ - ix_items_name_id: (name, id), covers name filters and `sort=name`
+   listings (see `utils.list_query`)
 """
 
-from sqlalchemy import String, Integer, Column
-from models.user_model import Base
+from datetime import datetime
+from sqlalchemy import String, Integer, Column, Index
+from models.user_model import Base, Timestamp
 
 
 class Item(Base):
@@ -19,6 +25,7 @@ class Item(Base):
     """
 
     __tablename__ = 'items'
+    __table_args__ = (Index("ix_items_name_id", "name", "id"),)
 
     # Primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -26,6 +33,9 @@ class Item(Base):
     # Human-readable name for the item. Required field.
     name = Column(String(100), nullable=False)
 
+    # Naive UTC, set on insert and on every ORM update
+    updated_at = Column(Timestamp, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     def __repr__(self):
         """Return a concise developer-friendly representation."""
         return f"<Item(name='{self.name}')>"
\ No newline at end of file
@@ -8,13 +8,25 @@ Fields:
  - username: unique username used for login
  - email: unique email address for the user
  - password_hash: hashed password stored securely
+ - updated_at: UTC time of the last write (drives HTTP validators)
+
+Indexes:
+ - ix_users_username_email / ix_users_email_username: cover user
+   listings filtered or sorted by either column, which select only
+   id, username and email (see `utils.list_query`)
 """
 
-from sqlalchemy import Column, Integer, String
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+# MySQL DATETIME defaults to whole seconds; keep microseconds so two
+# writes within a second still produce different ETags
+Timestamp = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 
 class User(Base):
     """Represents a user account in the database.
@@ -25,6 +37,10 @@ class User(Base):
     """
 
     __tablename__ = 'users'
+    __table_args__ = (
+        Index("ix_users_username_email", "username", "email"),
+        Index("ix_users_email_username", "email", "username"),
+    )
 
     # Primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -38,6 +54,9 @@ class User(Base):
     # Hashed password (never store plaintext passwords)
     password_hash = Column(String(128), nullable=False)
 
+    # Naive UTC, set on insert and on every ORM update
+    updated_at = Column(Timestamp, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     def __repr__(self):
         """Developer-friendly representation (redacts password)."""
         return f"<User(username='{self.username}', email='{self.email}')>"
\ No newline at end of file
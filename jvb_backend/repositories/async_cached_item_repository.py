@@ -0,0 +1,119 @@
+"""Async cached item repository
+
+Async counterpart of `CachedItemRepository`. It shares the same
+`item_cache`, so the sync and async paths see each other's writes within
+one worker. See `repositories.cached_item_repository` for the caching
+rules.
+"""
+
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.items_model import Item
+from repositories.async_item_repository import AsyncItemRepository
+from repositories.cached_item_repository import (
+    DELETED,
+    item_cache,
+    async_item_loads,
+    item_snapshot,
+    item_from_snapshot,
+    item_from_cached,
+)
+from utils.config import ITEM_CACHE_ENABLED
+from utils.metrics import traced_methods
+from utils.unit_of_work import after_commit
+
+
+@traced_methods
+class AsyncCachedItemRepository(AsyncItemRepository):
+    """AsyncItemRepository with a read-through/write-through item cache.
+
+    Args:
+        db: SQLAlchemy AsyncSession used on cache misses and writes.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db)
+        self.cache = item_cache
+
+    async def get_by_id(self, item_id: int) -> Item | None:
+        """Return the item from cache, loading it on a miss."""
+        data = await self.cache.get_async(item_id)
+        if data is None:
+            data = await async_item_loads.do(item_id, lambda: self._load(item_id))
+        return item_from_cached(data)
+
+    async def _load(self, item_id: int) -> dict | None:
+        data = await self.cache.get_async(item_id)
+        if data is None:
+            item = await super().get_by_id(item_id)
+            if item is None:
+                return None
+            data = item_snapshot(item)
+            await self.cache.add_async(item_id, data)
+        return data
+
+    def _set_after_commit(self, snapshots: list[dict]):
+        async def write():
+            for data in snapshots:
+                await self.cache.set_async(data["id"], data)
+        after_commit(self.db, write)
+
+    def _delete_after_commit(self, item_ids):
+        async def tombstone():
+            for item_id in item_ids:
+                await self.cache.set_async(item_id, DELETED)
+        after_commit(self.db, tombstone)
+
+    async def create(self, name: str) -> Item:
+        """Create an item and write its snapshot through to the cache."""
+        new_item = await super().create(name)
+        self._set_after_commit([item_snapshot(new_item)])
+        return new_item
+
+    async def update(self, item_id: int, name: str) -> Item | None:
+        """Update an item and write the new snapshot through to the cache."""
+        item = await super().update(item_id, name)
+        if item:
+            self._set_after_commit([item_snapshot(item)])
+        return item
+
+    async def delete(self, item_id: int) -> Item | None:
+        """Delete an item and tombstone its cache entry."""
+        item = await super().delete(item_id)
+        self._delete_after_commit([item_id])
+        return item
+
+    async def get_many(self, item_ids: list[int]) -> list[Item]:
+        """Serve cached items and fetch only the misses with one `IN` query."""
+        cached = await self.cache.get_many_async(item_ids)
+        missing = [item_id for item_id in item_ids if item_id not in cached]
+        loaded = {item.id: item_snapshot(item) for item in await super().get_many(missing)}
+        await self.cache.add_many_async(loaded)
+        return [item_from_snapshot(data) for data in (*cached.values(), *loaded.values()) if not data.get("deleted")]
+
+    async def bulk_create(self, names: list[str]):
+        """Bulk insert and write every new snapshot through to the cache."""
+        rows = await super().bulk_create(names)
+        self._set_after_commit([item_snapshot(row) for row in rows])
+        return rows
+
+    async def bulk_update(self, names_by_id: dict[int, str], updated_at: datetime | None = None) -> set[int]:
+        """Bulk rename and write the new snapshots through to the cache."""
+        updated_at = updated_at or datetime.utcnow()
+        updated = await super().bulk_update(names_by_id, updated_at)
+        self._set_after_commit([
+            {"id": item_id, "name": names_by_id[item_id], "updated_at": updated_at.isoformat()}
+            for item_id in updated
+        ])
+        return updated
+
+    async def bulk_delete(self, item_ids: list[int]) -> set[int]:
+        """Bulk delete and tombstone the deleted ids."""
+        deleted = await super().bulk_delete(item_ids)
+        self._delete_after_commit(deleted)
+        return deleted
+
+
+def get_async_item_repository(db: AsyncSession) -> AsyncItemRepository:
+    """Return the async item repository services should use for `db`."""
+    return AsyncCachedItemRepository(db) if ITEM_CACHE_ENABLED else AsyncItemRepository(db)
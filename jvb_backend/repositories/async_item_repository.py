@@ -0,0 +1,177 @@
+"""Async item repository
+
+Async counterpart of `ItemRepository` for the `async def` request path.
+Method names and return values mirror the sync repository so services
+can be ported one-to-one; every method that touches the database is a
+coroutine and must be awaited.
+
+Design notes:
+ - Queries use 2.0-style `select()` because `AsyncSession` does not
+   support the legacy `Query` API.
+ - Like the sync repository, writes only flush; the caller's unit of
+   work commits (see `utils.unit_of_work`).
+"""
+
+from datetime import datetime
+from typing import AsyncIterator
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.items_model import Item
+from repositories.item_search import item_search_index
+from utils.list_query import ListQuery
+from utils.metrics import traced_methods
+
+# Rows per multi-row INSERT; keeps statements under driver/SQLite
+# bound-parameter limits
+BULK_INSERT_CHUNK = 500
+
+
+@traced_methods
+class AsyncItemRepository:
+    """Repository for Item persistence operations on an AsyncSession.
+
+    Args:
+        db: SQLAlchemy AsyncSession instance used for DB operations.
+    """
+
+    def __init__(self, db: AsyncSession):
+        # Store the session; caller is responsible for session lifecycle
+        self.db = db
+
+    async def create(self, name: str) -> Item:
+        """Create a new Item and flush it.
+
+        Args:
+            name: The human readable name for the item.
+
+        Returns:
+            The newly created Item instance (with id populated).
+        """
+        new_item = Item(name=name)
+        self.db.add(new_item)
+        # The INSERT returns the id; `updated_at` was set in Python
+        await self.db.flush()
+        return new_item
+
+    async def get_by_id(self, item_id: int) -> Item | None:
+        """Retrieve an Item by its primary key.
+
+        Returns None if no matching item is found.
+        """
+        return await self.db.scalar(select(Item).where(Item.id == item_id))
+
+    async def get_all(self) -> list[Item]:
+        """Return a list of all Item records."""
+        return list(await self.db.scalars(select(Item)))
+
+    async def list_page(self, query: ListQuery, limit: int) -> list[Row]:
+        """Return up to `limit` rows of the listing described by `query`."""
+        return (await self.db.execute(query.statement(limit))).all()
+
+    async def iter_list(self, query: ListQuery, batch_size: int) -> AsyncIterator[Row]:
+        """Yield every row of the listing `query`, in keyset batches.
+
+        Rows hold only the selected columns; each batch is one
+        `list_page` query continuing after the previous batch.
+        """
+        while True:
+            rows = await self.list_page(query, batch_size)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            query = query.after_row(rows[-1])
+
+    async def search(self, terms: list[str], offset: int, limit: int) -> list[Item]:
+        """Return up to `limit` items matching every term, best match first."""
+        return list(await self.db.scalars(item_search_index.statement(terms, offset, limit)))
+
+    async def update(self, item_id: int, name: str) -> Item | None:
+        """Update the name of an existing item.
+
+        Returns the updated instance, or None when the item does not exist.
+        """
+        item = await self.db.scalar(select(Item).where(Item.id == item_id))
+        if item:
+            item.name = name
+            await self.db.flush()
+        return item
+
+    async def delete(self, item_id: int) -> Item | None:
+        """Delete an Item by id.
+
+        Returns the deleted Item instance or None if not found.
+        """
+        item = await self.db.scalar(select(Item).where(Item.id == item_id))
+        if item:
+            await self.db.delete(item)
+            await self.db.flush()
+        return item
+
+    async def get_many(self, item_ids: list[int]) -> list[Item]:
+        """Return the items whose ids are in `item_ids` (one `IN` query)."""
+        if not item_ids:
+            return []
+        return list(await self.db.scalars(select(Item).where(Item.id.in_(item_ids))))
+
+    async def bulk_create(self, names: list[str]) -> list[Row]:
+        """Insert many items.
+
+        Returns:
+            Rows (flushed Items without RETURNING) with `id`, `name` and
+            `updated_at`, in the same order as `names`.
+        """
+        if not names:
+            return []
+        rows = []
+        if self.db.bind.dialect.insert_returning:
+            for start in range(0, len(names), BULK_INSERT_CHUNK):
+                chunk = names[start:start + BULK_INSERT_CHUNK]
+                result = await self.db.execute(
+                    insert(Item).values([{"name": name} for name in chunk]).returning(Item.id, Item.name, Item.updated_at)
+                )
+                # Ids are assigned in VALUES order; RETURNING order is not guaranteed
+                rows.extend(sorted(result.all(), key=lambda row: row.id))
+        else:
+            rows = [Item(name=name) for name in names]
+            self.db.add_all(rows)
+            await self.db.flush()
+        return rows
+
+    async def bulk_update(self, names_by_id: dict[int, str], updated_at: datetime | None = None) -> set[int]:
+        """Rename many items (one SELECT, one executemany UPDATE).
+
+        Args:
+            names_by_id: New name for each item id.
+            updated_at: Timestamp stored on the renamed rows (now by default).
+
+        Returns:
+            The ids that existed and were updated.
+        """
+        if not names_by_id:
+            return set()
+        existing = set(await self.db.scalars(select(Item.id).where(Item.id.in_(list(names_by_id)))))
+        if existing:
+            updated_at = updated_at or datetime.utcnow()
+            # ORM bulk UPDATE by primary key (one executemany)
+            await self.db.execute(
+                update(Item),
+                [{"id": item_id, "name": names_by_id[item_id], "updated_at": updated_at} for item_id in existing],
+            )
+        return existing
+
+    async def bulk_delete(self, item_ids: list[int]) -> set[int]:
+        """Delete many items with a single `IN` delete.
+
+        Returns:
+            The ids that existed and were deleted.
+        """
+        if not item_ids:
+            return set()
+        existing = set(await self.db.scalars(select(Item.id).where(Item.id.in_(item_ids))))
+        if existing:
+            await self.db.execute(
+                delete(Item).where(Item.id.in_(existing)).execution_options(synchronize_session=False)
+            )
+        return existing
@@ -0,0 +1,83 @@
+"""Async user repository
+
+Async counterpart of `UserRepository` for the `async def` request path.
+Method names and return values mirror the sync repository; every method
+that touches the database is a coroutine.
+
+Design notes:
+ - Queries use 2.0-style `select()` because `AsyncSession` does not
+   support the legacy `Query` API.
+ - Like the sync repository, writes only flush; the caller's unit of
+   work commits (see `utils.unit_of_work`).
+"""
+
+from typing import AsyncIterator
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.user_model import User
+from utils.list_query import ListQuery
+from utils.metrics import traced_methods
+
+
+@traced_methods
+class AsyncUserRepository:
+    """Repository for User persistence operations on an AsyncSession.
+
+    Args:
+        db: SQLAlchemy AsyncSession instance used for DB operations.
+    """
+
+    def __init__(self, db: AsyncSession):
+        # Store the session; the caller manages session lifecycle
+        self.db = db
+
+    async def list_users_page(self, query: ListQuery, limit: int) -> list[Row]:
+        """Return up to `limit` rows of the listing described by `query`."""
+        return (await self.db.execute(query.statement(limit))).all()
+
+    async def iter_users_list(self, query: ListQuery, batch_size: int) -> AsyncIterator[Row]:
+        """Yield every row of the listing `query`, in keyset batches.
+
+        Rows hold only the selected columns; each batch is one
+        `list_users_page` query continuing after the previous batch.
+        """
+        while True:
+            rows = await self.list_users_page(query, batch_size)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            query = query.after_row(rows[-1])
+
+    async def get_by_email(self, email: str) -> User | None:
+        """Find a user by email address. Returns None if not found."""
+        return await self.db.scalar(select(User).where(User.email == email))
+
+    async def get_by_username(self, username: str) -> User | None:
+        """Find a user by username. Returns None if not found."""
+        return await self.db.scalar(select(User).where(User.username == username))
+
+    async def get_by_id(self, user_id: int) -> User | None:
+        """Retrieve a user by primary key id. Returns None when not found."""
+        return await self.db.scalar(select(User).where(User.id == user_id))
+
+    async def create_user(self, username: str, password_hash: str, email: str) -> User:
+        """Create a new User and flush it.
+
+        Args:
+            username: Unique username for the new account.
+            password_hash: Pre-hashed password string (do not pass plaintext).
+            email: Unique email address for the user.
+
+        Returns:
+            The newly created User with generated fields populated (e.g. id).
+        """
+        new_user = User(
+            username=username,
+            email=email,
+            password_hash=password_hash,
+        )
+        self.db.add(new_user)
+        await self.db.flush()
+        return new_user
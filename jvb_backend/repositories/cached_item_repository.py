@@ -0,0 +1,189 @@
+"""Cached item repository
+
+`CachedItemRepository` is a drop-in `ItemRepository` that keeps item
+snapshots in a `TieredCache` (per-worker LRU with TTL, plus an optional
+Redis tier). Services obtain it through `get_item_repository`, so the
+cache can be switched off with `ITEM_CACHE_ENABLED=false`.
+
+Design notes:
+ - Reads are read-through. Concurrent misses for the same id are
+   collapsed into one query by `SingleFlight`.
+ - `create` and `update` write through (the fresh snapshot replaces the
+   cached one); `delete` replaces it with a tombstone (`DELETED`). Both
+   wait for the unit of work to commit (`after_commit`), so the cache
+   never serves a write that was rolled back, nor drops an entry while
+   the old row is still current.
+ - Read-through fills only store into an empty slot (`TieredCache.add`,
+   `SET NX` on the Redis tier). A load that read the row before a
+   concurrent write committed therefore cannot overwrite the newer
+   snapshot, nor bring back a deleted item over its tombstone.
+ - Cache hits return a *transient* `Item` built from the snapshot. It is
+   not attached to the session: do not add it to a session or mutate it
+   expecting the change to persist; go through the repository instead.
+"""
+
+from datetime import datetime
+from sqlalchemy.orm import Session
+from models.items_model import Item
+from repositories.item_repository import ItemRepository
+from utils.cache import LRUTTLCache, SingleFlight, AsyncSingleFlight, TieredCache
+from utils.metrics import traced_methods
+from utils.unit_of_work import after_commit
+from utils.config import (
+    redis_client,
+    async_redis_client,
+    ITEM_CACHE_ENABLED,
+    ITEM_CACHE_SIZE,
+    ITEM_CACHE_TTL_SECONDS,
+    ITEM_CACHE_REDIS,
+    ITEM_CACHE_REDIS_TTL_SECONDS,
+)
+
+item_cache = TieredCache(
+    "item",
+    LRUTTLCache(maxsize=ITEM_CACHE_SIZE, ttl=ITEM_CACHE_TTL_SECONDS),
+    redis_client=redis_client if ITEM_CACHE_REDIS else None,
+    async_redis_client=async_redis_client if ITEM_CACHE_REDIS else None,
+    redis_ttl=ITEM_CACHE_REDIS_TTL_SECONDS,
+)
+item_loads = SingleFlight()
+async_item_loads = AsyncSingleFlight()
+
+
+# Cached in place of a deleted item's snapshot; read as "no such item"
+DELETED = {"deleted": True}
+
+
+def item_snapshot(item) -> dict:
+    """Return the JSON-serializable cache representation of an Item (or row)."""
+    return {"id": item.id, "name": item.name, "updated_at": item.updated_at.isoformat()}
+
+
+def item_from_snapshot(data: dict) -> Item:
+    """Build a transient Item from a cached snapshot."""
+    updated_at = data.get("updated_at")
+    return Item(
+        id=data["id"],
+        name=data["name"],
+        # Snapshots cached before `updated_at` existed have none
+        updated_at=datetime.fromisoformat(updated_at) if updated_at else None,
+    )
+
+
+def item_from_cached(data: dict | None) -> Item | None:
+    """The Item a cached value stands for; None for a miss or a tombstone."""
+    if data is None or data.get("deleted"):
+        return None
+    return item_from_snapshot(data)
+
+
+def item_cache_stats() -> dict:
+    """Return cache counters plus the number of coalesced loads."""
+    return {
+        **item_cache.stats(),
+        "coalesced_loads": item_loads.coalesced + async_item_loads.coalesced,
+    }
+
+
+@traced_methods
+class CachedItemRepository(ItemRepository):
+    """ItemRepository with a read-through/write-through item cache.
+
+    Args:
+        db: SQLAlchemy Session instance used on cache misses and writes.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.cache = item_cache
+
+    def get_by_id(self, item_id: int) -> Item | None:
+        """Return the item from cache, loading it on a miss.
+
+        Returns None if no matching item is found.
+        """
+        data = self.cache.get(item_id)
+        if data is None:
+            data = item_loads.do(item_id, lambda: self._load(item_id))
+        return item_from_cached(data)
+
+    def _load(self, item_id: int) -> dict | None:
+        # Another caller may have filled the cache while we waited to lead
+        data = self.cache.get(item_id)
+        if data is None:
+            item = super().get_by_id(item_id)
+            if item is None:
+                return None
+            data = item_snapshot(item)
+            self.cache.add(item_id, data)
+        return data
+
+    def _set_after_commit(self, snapshots: list[dict]):
+        def write():
+            for data in snapshots:
+                self.cache.set(data["id"], data)
+        after_commit(self.db, write)
+
+    def _delete_after_commit(self, item_ids):
+        def tombstone():
+            for item_id in item_ids:
+                self.cache.set(item_id, DELETED)
+        after_commit(self.db, tombstone)
+
+    def create(self, name: str) -> Item:
+        """Create an item and write its snapshot through to the cache."""
+        new_item = super().create(name)
+        self._set_after_commit([item_snapshot(new_item)])
+        return new_item
+
+    def update(self, item_id: int, name: str) -> Item | None:
+        """Update an item and write the new snapshot through to the cache."""
+        item = super().update(item_id, name)
+        if item:
+            self._set_after_commit([item_snapshot(item)])
+        return item
+
+    def delete(self, item_id: int) -> Item | None:
+        """Delete an item and tombstone its cache entry."""
+        item = super().delete(item_id)
+        self._delete_after_commit([item_id])
+        return item
+
+    def get_many(self, item_ids: list[int]) -> list[Item]:
+        """Serve cached items and fetch only the misses with one `IN` query.
+
+        The cache is read with one MGET for the local misses, and the
+        fetched snapshots are filled back in one pipeline.
+        """
+        cached = self.cache.get_many(item_ids)
+        missing = [item_id for item_id in item_ids if item_id not in cached]
+        loaded = {item.id: item_snapshot(item) for item in super().get_many(missing)}
+        self.cache.add_many(loaded)
+        return [item_from_snapshot(data) for data in (*cached.values(), *loaded.values()) if not data.get("deleted")]
+
+    def bulk_create(self, names: list[str]):
+        """Bulk insert and write every new snapshot through to the cache."""
+        rows = super().bulk_create(names)
+        self._set_after_commit([item_snapshot(row) for row in rows])
+        return rows
+
+    def bulk_update(self, names_by_id: dict[int, str], updated_at: datetime | None = None) -> set[int]:
+        """Bulk rename and write the new snapshots through to the cache."""
+        updated_at = updated_at or datetime.utcnow()
+        updated = super().bulk_update(names_by_id, updated_at)
+        self._set_after_commit([
+            {"id": item_id, "name": names_by_id[item_id], "updated_at": updated_at.isoformat()}
+            for item_id in updated
+        ])
+        return updated
+
+    def bulk_delete(self, item_ids: list[int]) -> set[int]:
+        """Bulk delete and tombstone the deleted ids."""
+        deleted = super().bulk_delete(item_ids)
+        self._delete_after_commit(deleted)
+        return deleted
+
+
+def get_item_repository(db: Session) -> ItemRepository:
+    """Return the item repository services should use for `db`."""
+    return CachedItemRepository(db) if ITEM_CACHE_ENABLED else ItemRepository(db)
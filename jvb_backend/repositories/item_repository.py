@@ -7,14 +7,34 @@ layer doesn't need to deal with raw queries or session management.
 Design notes:
  - Methods return the affected Item instance (or None) to let callers
    decide how to respond (e.g. raise 404, ignore, etc.).
- - The repository commits transactions immediately; if you need multi-step
-   transactions, consider passing an external session/transaction scope.
+ - Writes only flush; the caller commits through a unit of work (see
+   `utils.unit_of_work`), so one service operation is one transaction
+   however many repository calls it makes. Flushed objects already hold
+   their generated id and `updated_at`, so writes never reload them.
+ - Bulk methods use multi-row statements and return lightweight rows /
+   id sets instead of ORM instances, so a large batch does not hydrate
+   (or later lazy-reload) thousands of objects.
 """
 
+from datetime import datetime
+from typing import Iterator
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from models.items_model import Item
+from repositories.item_search import item_search_index
+from utils.list_query import ListQuery, ListSpec
+from utils.metrics import traced_methods
 
+# Rows per multi-row INSERT; keeps statements under driver/SQLite
+# bound-parameter limits
+BULK_INSERT_CHUNK = 500
 
+# Filters, sorts and fields allowed on `GET /items/`
+ITEM_LIST = ListSpec(Item, fields=("id", "name"), filters=("name",), prefix_field="name")
+
+
+@traced_methods
 class ItemRepository:
     """Repository for Item persistence operations.
 
@@ -27,7 +47,7 @@ class ItemRepository:
         self.db = db
 
     def create(self, name: str) -> Item:
-        """Create and persist a new Item.
+        """Create a new Item and flush it.
 
         Args:
             name: The human readable name for the item.
@@ -37,9 +57,8 @@ class ItemRepository:
         """
         new_item = Item(name=name)
         self.db.add(new_item)
-        self.db.commit()
-        # Refresh to load generated fields (e.g. id)
-        self.db.refresh(new_item)
+        # The INSERT returns the id; `updated_at` was set in Python
+        self.db.flush()
         return new_item
 
     def get_by_id(self, item_id: int) -> Item | None:
@@ -53,26 +72,152 @@ class ItemRepository:
         """Return a list of all Item records."""
         return self.db.query(Item).all()
 
+    def list_page(self, query: ListQuery, limit: int) -> list[Row]:
+        """Return up to `limit` rows of the listing described by `query`.
+
+        Rows hold only the selected columns (see `utils.list_query`).
+        """
+        return self.db.execute(query.statement(limit)).all()
+
+    def iter_list(self, query: ListQuery, batch_size: int) -> Iterator[Row]:
+        """Yield every row of the listing `query`, in keyset batches.
+
+        Rows hold only the selected columns; each batch is one
+        `list_page` query continuing after the previous batch.
+        """
+        while True:
+            rows = self.list_page(query, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            query = query.after_row(rows[-1])
+
+    def search(self, terms: list[str], offset: int, limit: int) -> list[Item]:
+        """Return up to `limit` items matching every term, best match first.
+
+        Uses the backend's full-text index (see `repositories.item_search`).
+        """
+        return list(self.db.scalars(item_search_index.statement(terms, offset, limit)))
+
     def update(self, item_id: int, name: str) -> Item | None:
         """Update the name of an existing item.
 
-        If the item exists, commits the change and returns the updated
+        If the item exists, flushes the change and returns the updated
         instance. Returns None when the item does not exist.
         """
         item = self.db.query(Item).filter(Item.id == item_id).first()
         if item:
             item.name = name
-            self.db.commit()
-            self.db.refresh(item)
+            self.db.flush()
         return item
 
     def delete(self, item_id: int) -> Item | None:
         """Delete an Item by id.
 
-        Returns the deleted Item instance (detached) or None if not found.
+        Returns the deleted Item instance or None if not found.
         """
         item = self.db.query(Item).filter(Item.id == item_id).first()
         if item:
             self.db.delete(item)
-            self.db.commit()
-        return item
\ No newline at end of file
+            self.db.flush()
+        return item
+
+    def get_many(self, item_ids: list[int]) -> list[Item]:
+        """Return the items whose ids are in `item_ids` (one `IN` query).
+
+        Missing ids are simply absent from the result; order is unspecified.
+        """
+        if not item_ids:
+            return []
+        return self.db.query(Item).filter(Item.id.in_(item_ids)).all()
+
+    def bulk_create(self, names: list[str]) -> list[Row]:
+        """Insert many items.
+
+        Uses multi-row `INSERT ... VALUES (...), (...) RETURNING` in chunks
+        of `BULK_INSERT_CHUNK` where the backend supports RETURNING
+        (SQLite 3.35+, PostgreSQL, MariaDB) and ORM batch flushing
+        otherwise.
+
+        Returns:
+            Rows (flushed Items without RETURNING) with `id`, `name` and
+            `updated_at`, in the same order as `names`.
+        """
+        if not names:
+            return []
+        rows = []
+        if self.db.get_bind().dialect.insert_returning:
+            for start in range(0, len(names), BULK_INSERT_CHUNK):
+                chunk = names[start:start + BULK_INSERT_CHUNK]
+                result = self.db.execute(
+                    insert(Item).values([{"name": name} for name in chunk]).returning(Item.id, Item.name, Item.updated_at)
+                )
+                # Ids are assigned in VALUES order; RETURNING order is not guaranteed
+                rows.extend(sorted(result.all(), key=lambda row: row.id))
+        else:
+            rows = [Item(name=name) for name in names]
+            self.db.add_all(rows)
+            # Ids come back per row; nothing needs reading back
+            self.db.flush()
+        return rows
+
+    def bulk_update(self, names_by_id: dict[int, str], updated_at: datetime | None = None) -> set[int]:
+        """Rename many items (one SELECT, one executemany UPDATE).
+
+        Args:
+            names_by_id: New name for each item id.
+            updated_at: Timestamp stored on the renamed rows (now by default).
+
+        Returns:
+            The ids that existed and were updated.
+        """
+        if not names_by_id:
+            return set()
+        existing = set(self.db.scalars(select(Item.id).where(Item.id.in_(list(names_by_id)))))
+        if existing:
+            updated_at = updated_at or datetime.utcnow()
+            # ORM bulk UPDATE by primary key (one executemany)
+            self.db.execute(
+                update(Item),
+                [{"id": item_id, "name": names_by_id[item_id], "updated_at": updated_at} for item_id in existing],
+            )
+        return existing
+
+    def bulk_delete(self, item_ids: list[int]) -> set[int]:
+        """Delete many items with a single `IN` delete.
+
+        Returns:
+            The ids that existed and were deleted.
+        """
+        if not item_ids:
+            return set()
+        existing = set(self.db.scalars(select(Item.id).where(Item.id.in_(item_ids))))
+        if existing:
+            self.db.execute(
+                delete(Item).where(Item.id.in_(existing)).execution_options(synchronize_session=False)
+            )
+        return existing
+
+    def insert_many(self, names: list[str]) -> int:
+        """Insert many items without returning ids.
+
+        Cheaper than `bulk_create` for imports: a single executemany with
+        no RETURNING and no ORM objects.
+
+        Returns:
+            Number of rows inserted.
+        """
+        if names:
+            self.db.execute(insert(Item), [{"name": name} for name in names])
+        return len(names)
+
+    def stream_rows(self, batch_size: int) -> Iterator[Row]:
+        """Yield `(id, name)` rows for every item in id order.
+
+        Uses `yield_per`, which streams from a server-side cursor where the
+        driver supports one, so memory is bounded by `batch_size`.
+        """
+        result = self.db.execute(
+            select(Item.id, Item.name).order_by(Item.id).execution_options(yield_per=batch_size)
+        )
+        yield from result
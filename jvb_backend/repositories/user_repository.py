@@ -8,14 +8,29 @@ directly.
 Design notes:
  - Methods return model instances (or None) so callers can decide how to
    handle absence (e.g. raise a 404 or return an error response).
- - This repository commits on write operations; for transactional workflows
-   consider using an external session or transaction manager.
+ - Writes only flush; the caller commits through a unit of work (see
+   `utils.unit_of_work`).
 """
 
+from typing import Iterator
+from sqlalchemy import insert, or_, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from models.user_model import User
+from utils.list_query import ListQuery, ListSpec
+from utils.metrics import traced_methods
 
+# Filters, sorts and fields allowed on `GET /users/all`
+USER_LIST = ListSpec(
+    User,
+    fields=("id", "username", "email"),
+    filters=("username", "email"),
+    prefix_field="username",
+    unique=("id", "username", "email"),
+)
 
+
+@traced_methods
 class UserRepository:
     """Repository for User persistence operations.
 
@@ -27,9 +42,25 @@ class UserRepository:
         # Store the session; the caller manages session lifecycle
         self.db = db
 
-    def get_all_users(self) -> list[User]:
-        """Return a list of all users in the database."""
-        return self.db.query(User).all()
+    def list_users_page(self, query: ListQuery, limit: int) -> list[Row]:
+        """Return up to `limit` rows of the listing described by `query`.
+
+        Rows hold only the selected columns, never the password hash.
+        """
+        return self.db.execute(query.statement(limit)).all()
+
+    def iter_users_list(self, query: ListQuery, batch_size: int) -> Iterator[Row]:
+        """Yield every row of the listing `query`, in keyset batches.
+
+        Rows hold only the selected columns; each batch is one
+        `list_users_page` query continuing after the previous batch.
+        """
+        while True:
+            rows = self.list_users_page(query, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            query = query.after_row(rows[-1])
 
     def get_by_email(self, email: str) -> User | None:
         """Find a user by email address.
@@ -50,7 +81,7 @@ class UserRepository:
         return self.db.query(User).filter(User.id == user_id).first()
 
     def create_user(self, username: str, password_hash: str, email: str) -> User:
-        """Create and persist a new User.
+        """Create a new User and flush it.
 
         Args:
             username: Unique username for the new account.
@@ -66,7 +97,48 @@ class UserRepository:
             password_hash=password_hash,
         )
         self.db.add(new_user)
-        # Persist the new user immediately; refresh to populate autogenerated fields
-        self.db.commit()
-        self.db.refresh(new_user)
+        # The INSERT returns the id; a duplicate fails here, not at commit
+        self.db.flush()
         return new_user
+
+    def find_taken(self, usernames: list[str], emails: list[str]) -> tuple[set[str], set[str]]:
+        """Return which of `usernames` / `emails` already belong to a user.
+
+        One query for the whole batch, used to skip duplicates on import
+        instead of failing the transaction on the unique constraints.
+        """
+        if not usernames and not emails:
+            return set(), set()
+        rows = self.db.execute(
+            select(User.username, User.email).where(
+                or_(User.username.in_(usernames), User.email.in_(emails))
+            )
+        ).all()
+        return {row.username for row in rows}, {row.email for row in rows}
+
+    def insert_many(self, users: list[dict]) -> int:
+        """Insert many users without returning ids.
+
+        Args:
+            users: Dicts with `username`, `email` and `password_hash`
+                   (already hashed).
+
+        Returns:
+            Number of rows inserted.
+        """
+        if users:
+            self.db.execute(insert(User), users)
+        return len(users)
+
+    def stream_rows(self, batch_size: int) -> Iterator[Row]:
+        """Yield `(id, username, email)` rows for every user in id order.
+
+        Password hashes are never selected. Uses `yield_per` so memory is
+        bounded by `batch_size`.
+        """
+        result = self.db.execute(
+            select(User.id, User.username, User.email)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from result
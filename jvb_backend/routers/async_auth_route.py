@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from routers.auth_dependencies import Principal, get_current_principal_async
+from routers.rate_limit_dependencies import limit_login_async, limit_register_async
+from services.async_auth_service import (
+    register_user_service,
+    login_user_service,
+    logout_user_service
+)
+from services.auth_service import refresh_token_service
+from schemas.user_schemas import UserCreate, UserLogin
+from schemas.token_schemas import TokenData, RefreshTokenData, RefreshTokenRequest, MessageData, LogoutData
+
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+@router.post("/register", response_model=MessageData, dependencies=[Depends(limit_register_async)])
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await register_user_service(db, user_data)
+
+@router.post("/login", response_model=TokenData, dependencies=[Depends(limit_login_async)])
+async def login_user(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    return await login_user_service(user_data, db)
+
+@router.post("/token/refresh", response_model=RefreshTokenData)
+async def refresh_token(data: RefreshTokenRequest):
+    # Pure CPU work (no I/O), so the sync service is fine here
+    return refresh_token_service(data.refresh_token)
+
+@router.post("/logout", response_model=LogoutData)
+async def logout_user(principal: Principal = Depends(get_current_principal_async)):
+    return await logout_user_service(principal.token, principal.claims, principal.user_id)
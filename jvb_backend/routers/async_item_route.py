@@ -0,0 +1,104 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from database import get_async_db, get_async_read_db
+from services.async_item_service import (
+    create_item_service,
+    get_item_by_id_service,
+    get_all_items_service,
+    search_items_service,
+    stream_items_service,
+    update_item_service,
+    delete_item_service,
+    get_items_by_ids_service,
+    bulk_create_items_service,
+    bulk_update_items_service,
+    bulk_delete_items_service,
+)
+from services.item_service import parse_item_ids
+from schemas.item_schemas import (
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemDetail,
+    ItemDeleted,
+    ItemPage,
+    ItemFieldsPage,
+    ItemBatch,
+    ItemBulkCreate,
+    ItemBulkUpdate,
+    ItemBulkDelete,
+    ItemBulkResponse,
+)
+from routers.list_dependencies import item_list_query
+from utils.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from utils.list_query import ListQuery
+from utils.http_cache import conditional, is_not_modified, list_validators_async, not_modified, row_validators
+
+router = APIRouter(prefix="/items", tags=["Items"])
+
+# Bulk and search routes are declared before "/{item_id}" so "bulk" / "search" are not parsed as ids
+@router.post("/bulk", response_model=ItemBulkResponse)
+async def bulk_create_items(data: ItemBulkCreate, db: AsyncSession = Depends(get_async_db)):
+    return await bulk_create_items_service(db, data)
+
+@router.patch("/bulk", response_model=ItemBulkResponse)
+async def bulk_update_items(data: ItemBulkUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await bulk_update_items_service(db, data)
+
+@router.delete("/bulk", response_model=ItemBulkResponse)
+async def bulk_delete_items(data: ItemBulkDelete, db: AsyncSession = Depends(get_async_db)):
+    return await bulk_delete_items_service(db, data)
+
+@router.get("/search", response_model=ItemPage)
+async def search_items(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_async_db),
+):
+    validators = await list_validators_async("items", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    return conditional(request, response, validators, await search_items_service(db, q, cursor, limit))
+
+@router.post("/", status_code=201, response_model=ItemDetail)
+async def create_item(item_data: ItemCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_item_service(db, item_data)
+
+@router.get("/{item_id}", response_model=ItemResponse)
+async def get_item(item_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    item = await get_item_by_id_service(db, item_id)
+    return conditional(request, response, row_validators("item", item), item)
+
+@router.get("/", response_model=ItemPage | ItemBatch | ItemFieldsPage)
+async def get_all_items(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = False,
+    ids: str | None = Query(None, description="Comma-separated ids; switches to multi-get"),
+    query: ListQuery = Depends(item_list_query),
+    # Primary, not a replica: a body must not be older than the version in its ETag
+    db: AsyncSession = Depends(get_async_db),
+):
+    if stream and ids is not None:
+        raise HTTPException(status_code=400, detail="stream cannot be combined with ids")
+    if stream:
+        return StreamingResponse(stream_items_service(db, query), media_type="application/x-ndjson")
+    validators = await list_validators_async("items", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    if ids is not None:
+        return conditional(request, response, validators, await get_items_by_ids_service(db, parse_item_ids(ids)))
+    return conditional(request, response, validators, await get_all_items_service(db, query, limit))
+
+@router.put("/{item_id}", response_model=ItemDetail)
+async def update_item(item_id: int, item_data: ItemUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await update_item_service(db, item_id, item_data)
+
+@router.delete("/{item_id}", response_model=ItemDeleted)
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await delete_item_service(db, item_id)
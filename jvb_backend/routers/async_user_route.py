@@ -0,0 +1,58 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from database import get_async_db
+from routers.auth_dependencies import get_current_user_async
+from routers.list_dependencies import user_list_query
+from services.async_user_service import (
+    get_all_users_service,
+    stream_users_service,
+    get_user_status,
+    get_users_status_service,
+    get_online_users_service,
+)
+from schemas.user_schemas import UserResponse, UserPage, UserFieldsPage, UserStatusResponse, UserStatusQuery, UserStatusBatch, OnlineUsers
+from utils.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from utils.list_query import ListQuery
+from utils.http_cache import conditional, is_not_modified, list_validators_async, not_modified
+from utils.presence import MAX_USER_ID
+
+router = APIRouter(prefix="/users", tags=["Users"])
+
+@router.get("/me", response_model=UserResponse)
+async def get_my_profile(current_user: UserResponse = Depends(get_current_user_async)):
+    return current_user
+
+@router.get("/all", response_model=UserPage | UserFieldsPage)
+async def get_all_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = False,
+    query: ListQuery = Depends(user_list_query),
+    # Primary, not a replica: a body must not be older than the version in its ETag
+    db: AsyncSession = Depends(get_async_db),
+):
+    if stream:
+        return StreamingResponse(stream_users_service(db, query), media_type="application/x-ndjson")
+    validators = await list_validators_async("users", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    return conditional(request, response, validators, await get_all_users_service(db, query, limit))
+
+@router.get("/status/{user_id}", response_model=UserStatusResponse)
+async def check_user_status(user_id: int = Path(ge=0, le=MAX_USER_ID)):
+    status = await get_user_status(user_id)
+
+    if not status:
+        raise HTTPException(status_code=404, detail="User not found in system")
+    
+    return status
+
+@router.post("/status", response_model=UserStatusBatch)
+async def check_users_status(query: UserStatusQuery):
+    return await get_users_status_service(query)
+
+@router.get("/online", response_model=OnlineUsers)
+async def get_online_users(limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX)):
+    return await get_online_users_service(limit)
@@ -0,0 +1,67 @@
+"""Shared authentication dependencies.
+
+Every authenticated route depends on one of these instead of decoding
+the token itself:
+
+ - `get_current_principal` builds a `Principal` from the verified JWT
+   claims alone. It never touches the database, and with the token cache
+   a hot token costs neither Redis nor crypto.
+ - `get_current_user` is for routes that need the user's profile; it
+   resolves the principal through the read-through user cache.
+
+`*_async` variants serve the `async def` routers.
+"""
+
+from dataclasses import dataclass, field
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import get_read_db, get_async_read_db
+from schemas.user_schemas import UserResponse
+from services.user_cache import get_cached_user, get_cached_user_async
+from utils.jwt_handler import decode_token, decode_token_async
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as described by their access token.
+
+    Fields:
+        user_id: User id from the `sub` claim.
+        username: Username claim.
+        token: The raw access token (needed to revoke it).
+        claims: All verified claims (`exp`, `jti`, ...).
+    """
+
+    user_id: int
+    username: str
+    token: str = field(repr=False)
+    claims: dict = field(repr=False)
+
+
+def _principal(token: str, payload: dict) -> Principal:
+    return Principal(
+        user_id=int(payload["sub"]),
+        username=payload.get("username"),
+        token=token,
+        claims=payload,
+    )
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    return _principal(token, decode_token(token))
+
+
+async def get_current_principal_async(token: str = Depends(oauth2_scheme)) -> Principal:
+    return _principal(token, await decode_token_async(token))
+
+
+def get_current_user(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_read_db)) -> UserResponse:
+    return get_cached_user(db, principal.user_id)
+
+
+async def get_current_user_async(principal: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_read_db)) -> UserResponse:
+    return await get_cached_user_async(db, principal.user_id)
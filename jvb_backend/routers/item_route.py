@@ -1,33 +1,104 @@
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from database import get_db, get_read_db
 from services.item_service import (
     create_item_service,
     get_item_by_id_service,
     get_all_items_service,
+    search_items_service,
+    stream_items_service,
     update_item_service,
-    delete_item_service
+    delete_item_service,
+    get_items_by_ids_service,
+    bulk_create_items_service,
+    bulk_update_items_service,
+    bulk_delete_items_service,
+    parse_item_ids,
 )
-from schemas.item_schemas import ItemCreate, ItemUpdate
+from schemas.item_schemas import (
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemDetail,
+    ItemDeleted,
+    ItemPage,
+    ItemFieldsPage,
+    ItemBatch,
+    ItemBulkCreate,
+    ItemBulkUpdate,
+    ItemBulkDelete,
+    ItemBulkResponse,
+)
+from routers.list_dependencies import item_list_query
+from utils.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from utils.list_query import ListQuery
+from utils.http_cache import conditional, is_not_modified, list_validators, not_modified, row_validators
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
-@router.post("/", status_code=201)
+# Bulk and search routes are declared before "/{item_id}" so "bulk" / "search" are not parsed as ids
+@router.post("/bulk", response_model=ItemBulkResponse)
+def bulk_create_items(data: ItemBulkCreate, db: Session = Depends(get_db)):
+    return bulk_create_items_service(db, data)
+
+@router.patch("/bulk", response_model=ItemBulkResponse)
+def bulk_update_items(data: ItemBulkUpdate, db: Session = Depends(get_db)):
+    return bulk_update_items_service(db, data)
+
+@router.delete("/bulk", response_model=ItemBulkResponse)
+def bulk_delete_items(data: ItemBulkDelete, db: Session = Depends(get_db)):
+    return bulk_delete_items_service(db, data)
+
+@router.get("/search", response_model=ItemPage)
+def search_items(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: Session = Depends(get_db),
+):
+    validators = list_validators("items", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    return conditional(request, response, validators, search_items_service(db, q, cursor, limit))
+
+@router.post("/", status_code=201, response_model=ItemDetail)
 def create_item(item_data: ItemCreate, db: Session = Depends(get_db)):
     return create_item_service(db, item_data)
 
-@router.get("/{item_id}")
-def get_item(item_id: int, db: Session = Depends(get_db)):
-    return get_item_by_id_service(db, item_id)
+@router.get("/{item_id}", response_model=ItemResponse)
+def get_item(item_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    item = get_item_by_id_service(db, item_id)
+    return conditional(request, response, row_validators("item", item), item)
 
-@router.get("/")
-def get_all_items(db: Session = Depends(get_db)):
-    return get_all_items_service(db)
+@router.get("/", response_model=ItemPage | ItemBatch | ItemFieldsPage)
+def get_all_items(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = False,
+    ids: str | None = Query(None, description="Comma-separated ids; switches to multi-get"),
+    query: ListQuery = Depends(item_list_query),
+    # Primary, not a replica: a body must not be older than the version in its ETag
+    db: Session = Depends(get_db),
+):
+    if stream and ids is not None:
+        raise HTTPException(status_code=400, detail="stream cannot be combined with ids")
+    if stream:
+        return StreamingResponse(stream_items_service(db, query), media_type="application/x-ndjson")
+    validators = list_validators("items", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    if ids is not None:
+        return conditional(request, response, validators, get_items_by_ids_service(db, parse_item_ids(ids)))
+    return conditional(request, response, validators, get_all_items_service(db, query, limit))
 
-@router.put("/{item_id}")
+@router.put("/{item_id}", response_model=ItemDetail)
 def update_item(item_id: int, item_data: ItemUpdate, db: Session = Depends(get_db)):
     return update_item_service(db, item_id, item_data)
 
-@router.delete("/{item_id}")
+@router.delete("/{item_id}", response_model=ItemDeleted)
 def delete_item(item_id: int, db: Session = Depends(get_db)):
     return delete_item_service(db, item_id)
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""Query-parameter dependencies for filtered list endpoints.
+
+`GET /items/` and `GET /users/all` depend on these to turn their filter,
+sort and `fields=` parameters into a `ListQuery` (see
+`utils.list_query`). They are `async def` although they only parse, so
+FastAPI runs them inline instead of handing them to the threadpool.
+"""
+
+from fastapi import Query
+from repositories.item_repository import ITEM_LIST
+from repositories.user_repository import USER_LIST
+from utils.list_query import ListQuery, parse_list_query
+from utils.pagination import MAX_SQL_INT
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return (default: all)"
+SORT_DESCRIPTION = "Field to order by; prefix with - for descending"
+
+
+async def item_list_query(
+    cursor: str | None = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    sort: str = Query("id", description=SORT_DESCRIPTION),
+    min_id: int | None = Query(None, ge=0, le=MAX_SQL_INT),
+    max_id: int | None = Query(None, ge=0, le=MAX_SQL_INT),
+    name: str | None = None,
+    name_prefix: str | None = Query(None, max_length=100),
+) -> ListQuery:
+    return parse_list_query(
+        ITEM_LIST, cursor, fields, sort, min_id, max_id, name_prefix, {"name": name}
+    )
+
+
+async def user_list_query(
+    cursor: str | None = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    sort: str = Query("id", description=SORT_DESCRIPTION),
+    min_id: int | None = Query(None, ge=0, le=MAX_SQL_INT),
+    max_id: int | None = Query(None, ge=0, le=MAX_SQL_INT),
+    username: str | None = None,
+    email: str | None = None,
+    username_prefix: str | None = Query(None, max_length=50),
+) -> ListQuery:
+    return parse_list_query(
+        USER_LIST, cursor, fields, sort, min_id, max_id, username_prefix, {"username": username, "email": email}
+    )
@@ -0,0 +1,91 @@
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from database import engine, engine_pool_metrics, async_engine, async_engine_pool_metrics, replica_router
+from repositories.cached_item_repository import item_cache_stats
+from services.user_cache import user_cache
+from utils.db_pool import pool_stats
+from utils.hash_executor import hash_executor
+from utils.metrics import CONTENT_TYPE, render, stats_gauges
+from utils.presence_events import presence_broadcaster
+from utils.query_log import query_log
+from utils.rate_limit import rate_limiter
+from utils.revocation import revocation_store
+from utils.config import PROFILING_TOKEN
+from utils.token_cache import token_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+def _gauges() -> list:
+    gauges = (
+        stats_gauges("hash_executor", hash_executor.stats())
+        + stats_gauges("token_cache", token_cache.stats())
+        + stats_gauges("revocation", revocation_store.stats())
+        + stats_gauges("user_cache", user_cache.stats())
+        + stats_gauges("item_cache", item_cache_stats())
+        + stats_gauges("db_pool", pool_stats(engine.pool, engine_pool_metrics), {"engine": "sync"})
+        + stats_gauges("db_pool", pool_stats(async_engine.pool, async_engine_pool_metrics), {"engine": "async"})
+        + stats_gauges("presence", presence_broadcaster.stats())
+        + stats_gauges("rate_limit", rate_limiter.stats())
+        + stats_gauges("query_log", query_log.stats())
+    )
+    replicas = replica_router.stats()
+    gauges += stats_gauges("replica_router", replicas)
+    for replica in replicas["replicas"]:
+        gauges += stats_gauges("replica", replica, {"replica": replica["name"]})
+    return gauges
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(render(_gauges()), media_type=CONTENT_TYPE)
+
+@router.get("/hashing")
+def get_hashing_metrics():
+    return hash_executor.stats()
+
+@router.get("/token-cache")
+def get_token_cache_metrics():
+    return token_cache.stats()
+
+@router.get("/revocation")
+def get_revocation_metrics():
+    return revocation_store.stats()
+
+@router.get("/user-cache")
+def get_user_cache_metrics():
+    return user_cache.stats()
+
+@router.get("/item-cache")
+def get_item_cache_metrics():
+    return item_cache_stats()
+
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    return {
+        "sync": pool_stats(engine.pool, engine_pool_metrics),
+        "async": pool_stats(async_engine.pool, async_engine_pool_metrics),
+    }
+
+@router.get("/replicas")
+def get_replica_metrics():
+    return replica_router.stats()
+
+@router.get("/presence")
+def get_presence_metrics():
+    return presence_broadcaster.stats()
+
+@router.get("/rate-limit")
+def get_rate_limit_metrics():
+    return rate_limiter.stats()
+
+# Statements and routes of slow queries describe the schema and traffic:
+# only for operators holding the profiling token, like request profiles
+def require_profiling_token(x_profiling_token: str | None = Header(None)):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_profiling_token is None or not hmac.compare_digest(x_profiling_token.encode(), PROFILING_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling token")
+
+@router.get("/queries", dependencies=[Depends(require_profiling_token)])
+def get_query_metrics():
+    return query_log.stats()
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from routers.auth_dependencies import Principal, get_current_principal_async
+from schemas.user_schemas import Heartbeat
+from services.presence_service import heartbeat_service, parse_user_ids, presence_stream
+
+router = APIRouter(prefix="/presence", tags=["Presence"])
+
+@router.get("/stream")
+async def stream_presence(request: Request, ids: str = Query(..., description="Comma-separated user ids")):
+    user_ids = parse_user_ids(ids)
+    return StreamingResponse(
+        presence_stream(request, user_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/heartbeat", response_model=Heartbeat)
+async def send_heartbeat(principal: Principal = Depends(get_current_principal_async)):
+    return await heartbeat_service(principal.user_id)
@@ -0,0 +1,32 @@
+"""Rate-limit dependencies for the auth routes.
+
+Declared in the route decorator (`dependencies=[...]`), so they run
+before the route's own dependencies: an over-limit request is rejected
+before a database session is opened or a password is hashed. They take
+the same body parameter as the route (`user_data`), which FastAPI parses
+once and shares.
+"""
+
+from fastapi import Request
+from schemas.user_schemas import UserCreate, UserLogin
+from utils.config import RATE_LIMIT_LOGIN, RATE_LIMIT_REGISTER
+from utils.rate_limit import RateLimit
+
+login_limit = RateLimit("login", RATE_LIMIT_LOGIN)
+register_limit = RateLimit("register", RATE_LIMIT_REGISTER)
+
+
+def limit_login(request: Request, user_data: UserLogin):
+    login_limit.hit(request, user_data.username)
+
+
+async def limit_login_async(request: Request, user_data: UserLogin):
+    await login_limit.hit_async(request, user_data.username)
+
+
+def limit_register(request: Request, user_data: UserCreate):
+    register_limit.hit(request, user_data.username)
+
+
+async def limit_register_async(request: Request, user_data: UserCreate):
+    await register_limit.hit_async(request, user_data.username)
@@ -0,0 +1,35 @@
+from typing import Literal
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from database import get_db, get_read_db
+from schemas.transfer_schemas import ImportResult
+from services.import_export_service import import_stream, export_lines
+from utils.bulk_io import MEDIA_TYPES
+from utils.config import IMPORT_CHUNK_SIZE, IMPORT_CHUNK_SIZE_MAX
+
+# Included before the item/user routers so "/items/export" is not matched as "/items/{item_id}"
+router = APIRouter(tags=["Import/Export"])
+
+Kind = Literal["items", "users"]
+Format = Literal["ndjson", "csv"]
+
+# Users are imported with `python cli.py import users` only: an HTTP user
+# import would create accounts past the register limits and tie up the
+# password hash pool that logins need
+@router.post("/items/import", response_model=ImportResult)
+async def import_items(
+    request: Request,
+    format: Format = "ndjson",
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=IMPORT_CHUNK_SIZE_MAX),
+    db: Session = Depends(get_db),
+):
+    return await import_stream(db, "items", request.stream(), format, chunk_size)
+
+@router.get("/{kind}/export")
+def export_records(kind: Kind, format: Format = "ndjson", db: Session = Depends(get_read_db)):
+    return StreamingResponse(
+        export_lines(db, kind, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+    )
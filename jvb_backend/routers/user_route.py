@@ -1,32 +1,58 @@
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from database import get_db
-from models.user_model import User
-from services.user_service import get_user_by_id, get_all_users_service, get_user_status
-from schemas.user_schemas import UserResponse
-from utils.jwt_handler import decode_token
+from routers.auth_dependencies import get_current_user
+from routers.list_dependencies import user_list_query
+from services.user_service import (
+    get_all_users_service,
+    stream_users_service,
+    get_user_status,
+    get_users_status_service,
+    get_online_users_service,
+)
+from schemas.user_schemas import UserResponse, UserPage, UserFieldsPage, UserStatusResponse, UserStatusQuery, UserStatusBatch, OnlineUsers
+from utils.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from utils.list_query import ListQuery
+from utils.http_cache import conditional, is_not_modified, list_validators, not_modified
+from utils.presence import MAX_USER_ID
 
 router = APIRouter(prefix="/users", tags=["Users"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    payload = decode_token(token)
-    return get_user_by_id(db, payload["sub"])
 
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
-    return UserResponse.from_orm(current_user)
+def get_my_profile(current_user: UserResponse = Depends(get_current_user)):
+    return current_user
 
-@router.get("/all", response_model=list[UserResponse])
-def get_all_users(db: Session = Depends(get_db)):
-    return get_all_users_service(db)
+@router.get("/all", response_model=UserPage | UserFieldsPage)
+def get_all_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = False,
+    query: ListQuery = Depends(user_list_query),
+    # Primary, not a replica: a body must not be older than the version in its ETag
+    db: Session = Depends(get_db),
+):
+    if stream:
+        return StreamingResponse(stream_users_service(db, query), media_type="application/x-ndjson")
+    validators = list_validators("users", request)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    return conditional(request, response, validators, get_all_users_service(db, query, limit))
 
-@router.get("/status/{user_id}")
-def check_user_status(user_id: int):
+@router.get("/status/{user_id}", response_model=UserStatusResponse)
+def check_user_status(user_id: int = Path(ge=0, le=MAX_USER_ID)):
     status = get_user_status(user_id)
 
     if not status:
         raise HTTPException(status_code=404, detail="User not found in system")
     
-    return status
\ No newline at end of file
+    return status
+
+@router.post("/status", response_model=UserStatusBatch)
+def check_users_status(query: UserStatusQuery):
+    return get_users_status_service(query)
+
+@router.get("/online", response_model=OnlineUsers)
+def get_online_users(limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX)):
+    return get_online_users_service(limit)
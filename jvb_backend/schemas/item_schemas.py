@@ -5,7 +5,9 @@ services for item-related operations. The schemas are intentionally
 simple and focused on the fields used in the example app.
 """
 
+from typing import Optional
 from pydantic import BaseModel
+from schemas.sparse_schemas import SparseModel
 
 
 class ItemCreate(BaseModel):
@@ -40,4 +42,137 @@ class ItemResponse(BaseModel):
         # Allows Pydantic to populate this model from ORM objects (SQLAlchemy)
         # when using e.g. `ItemResponse.model_validate(item)` or Pydantic v1's
         # `orm_mode`. In Pydantic v2 this is expressed via `from_attributes`.
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ItemDetail(BaseModel):
+    """Response for `POST /items/` and `PUT /items/{item_id}`.
+
+    Fields:
+        detail: Human-readable outcome.
+        item: The item as stored.
+    """
+
+    detail: str
+    item: ItemResponse
+
+
+class ItemDeleted(BaseModel):
+    """Response for `DELETE /items/{item_id}`.
+
+    Fields:
+        detail: Human-readable outcome.
+    """
+
+    detail: str
+
+
+class ItemPage(BaseModel):
+    """One page of a keyset-paginated item listing.
+
+    Fields:
+        items: Items on this page, in the requested order (id by default).
+        next_cursor: Opaque cursor for the next page; None on the last page.
+    """
+
+    items: list[ItemResponse]
+    next_cursor: Optional[str] = None
+
+
+class ItemFields(SparseModel):
+    """An item restricted to the fields requested with `fields=`.
+
+    Fields not requested are omitted from the JSON.
+    """
+
+    id: Optional[int] = None
+    name: Optional[str] = None
+
+
+class ItemFieldsPage(BaseModel):
+    """One page of an item listing with `fields=`.
+
+    Fields:
+        items: Items on this page, in the requested order.
+        next_cursor: Opaque cursor for the next page; None on the last page.
+    """
+
+    items: list[ItemFields]
+    next_cursor: Optional[str] = None
+
+
+class ItemBulkCreate(BaseModel):
+    """Request body for `POST /items/bulk`.
+
+    Fields:
+        items: Items to create, in order.
+    """
+
+    items: list[ItemCreate]
+
+
+class ItemBulkUpdateEntry(BaseModel):
+    """One rename inside an `ItemBulkUpdate`."""
+
+    id: int
+    name: str
+
+
+class ItemBulkUpdate(BaseModel):
+    """Request body for `PATCH /items/bulk`.
+
+    Fields:
+        items: Renames to apply; a later entry for the same id wins.
+    """
+
+    items: list[ItemBulkUpdateEntry]
+
+
+class ItemBulkDelete(BaseModel):
+    """Request body for `DELETE /items/bulk`.
+
+    Fields:
+        ids: Ids of the items to delete.
+    """
+
+    ids: list[int]
+
+
+class ItemBulkResult(BaseModel):
+    """Outcome for one entry of a bulk request.
+
+    Fields:
+        id: Item id the entry refers to.
+        status: "created", "updated", "deleted" or "not_found".
+        item: The item after the operation (absent for deletes/misses).
+    """
+
+    id: int
+    status: str
+    item: Optional[ItemResponse] = None
+
+
+class ItemBulkResponse(BaseModel):
+    """Response for bulk item operations.
+
+    Fields:
+        results: One result per request entry, in request order.
+        succeeded: Number of entries applied.
+        failed: Number of entries not applied (e.g. unknown ids).
+    """
+
+    results: list[ItemBulkResult]
+    succeeded: int
+    failed: int
+
+
+class ItemBatch(BaseModel):
+    """Response for `GET /items/?ids=...` (multi-get).
+
+    Fields:
+        items: Found items, in the order their ids were requested.
+        missing_ids: Requested ids that do not exist.
+    """
+
+    items: list[ItemResponse]
+    missing_ids: list[int]
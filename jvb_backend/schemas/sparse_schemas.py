@@ -0,0 +1,17 @@
+"""Base schema for sparse fieldsets (`fields=` on list endpoints).
+
+A sparse row is a model whose fields are all optional; only the fields
+it was built with are serialized, so `fields=id` yields `{"id": 1}`
+rather than `{"id": 1, "name": null}` (see `utils.list_query`).
+"""
+
+from pydantic import BaseModel, model_serializer
+
+
+class SparseModel(BaseModel):
+    """Model that serializes only the fields it was given."""
+
+    @model_serializer(mode="wrap")
+    def _only_given_fields(self, handler):
+        data = handler(self)
+        return {name: value for name, value in data.items() if name in self.model_fields_set}
@@ -22,6 +22,40 @@ class UserStatus(BaseModel):
     last_login: str
 
 
+class OfflineStatus(BaseModel):
+    """Presence returned after logout.
+
+    Fields:
+        is_online: Always False.
+        offline_since: ISO-8601 timestamp (string) of the logout.
+    """
+
+    is_online: bool
+    offline_since: str
+
+
+class MessageData(BaseModel):
+    """Schema for endpoints that only report an outcome (e.g. register).
+
+    Fields:
+        message: Friendly message or status.
+    """
+
+    message: str
+
+
+class LogoutData(BaseModel):
+    """Schema returned after logout.
+
+    Fields:
+        message: Friendly message or status.
+        user_status: The user's presence after logging out.
+    """
+
+    message: str
+    user_status: OfflineStatus
+
+
 class TokenData(BaseModel):
     """Schema returned after successful authentication.
 
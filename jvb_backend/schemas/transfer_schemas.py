@@ -0,0 +1,41 @@
+"""Pydantic schemas for bulk import/export responses.
+
+Exports are streamed as NDJSON/CSV and have no JSON schema of their own;
+only the import report is described here (see `utils.bulk_io.ImportReport`).
+"""
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    """One rejected row of an import.
+
+    Fields:
+        line: 1-based line number in the upload (the CSV header is line 1).
+        error: Why the row was skipped.
+    """
+
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    """Response of `POST /items/import` (and of `cli.py import`).
+
+    Fields:
+        rows: Data rows read.
+        inserted: Rows inserted.
+        skipped: Rows rejected (invalid or duplicate).
+        chunks: Transactions committed.
+        seconds: Wall time of the import.
+        rows_per_sec: Throughput over `seconds`.
+        errors: The first rejected rows (capped at 100).
+    """
+
+    rows: int
+    inserted: int
+    skipped: int
+    chunks: int
+    seconds: float
+    rows_per_sec: float
+    errors: list[ImportRowError]
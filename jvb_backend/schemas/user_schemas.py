@@ -5,7 +5,10 @@ authentication services. Schemas keep external API contracts stable and
 validate inputs coming from clients.
 """
 
-from pydantic import BaseModel, EmailStr
+from typing import Literal, Optional
+from pydantic import BaseModel, EmailStr, conint
+from schemas.sparse_schemas import SparseModel
+from utils.presence import MAX_USER_ID
 
 
 class UserCreate(BaseModel):
@@ -49,4 +52,137 @@ class UserResponse(BaseModel):
     class Config:
         # Enable population from ORM objects (SQLAlchemy) when converting
         # DB models to response schemas. In Pydantic v2 this is `from_attributes`.
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserPage(BaseModel):
+    """One page of a keyset-paginated user listing.
+
+    Fields:
+        items: Users on this page, in the requested order (id by default).
+        next_cursor: Opaque cursor for the next page; None on the last page.
+    """
+
+    items: list[UserResponse]
+    next_cursor: Optional[str] = None
+
+
+class UserFields(SparseModel):
+    """A user restricted to the fields requested with `fields=`.
+
+    Fields not requested are omitted from the JSON.
+    """
+
+    id: Optional[int] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+
+
+class UserFieldsPage(BaseModel):
+    """One page of a user listing with `fields=`.
+
+    Fields:
+        items: Users on this page, in the requested order.
+        next_cursor: Opaque cursor for the next page; None on the last page.
+    """
+
+    items: list[UserFields]
+    next_cursor: Optional[str] = None
+
+
+class UserStatusResponse(BaseModel):
+    """Response of `GET /users/status/{user_id}`.
+
+    Fields:
+        user_id: The user's id.
+        is_online: Whether the user is currently online.
+        offline_duration: "<n> phút trước" for offline users, else None.
+    """
+
+    user_id: int
+    is_online: bool
+    offline_duration: Optional[str] = None
+
+
+class UserStatusQuery(BaseModel):
+    """Request body for `POST /users/status`.
+
+    Fields:
+        user_ids: Users to look up (duplicates are ignored).
+        order: "input" keeps the request order; "recent" lists online users
+               first (most recently online first), then offline users by
+               how recently they went offline, then users with no presence.
+    """
+
+    # Presence bitmap offsets (see `utils.presence`)
+    user_ids: list[conint(ge=0, le=MAX_USER_ID)]
+    order: Literal["input", "recent"] = "input"
+
+
+class UserPresence(BaseModel):
+    """Presence of one user in a bulk status response.
+
+    Fields:
+        user_id: The user's id.
+        is_online: Whether the user is currently online.
+        offline_duration: "<n> phút trước" for offline users, else None.
+        online_since: Epoch seconds of the login, while online.
+        offline_since: Epoch seconds of the logout, while offline.
+    """
+
+    user_id: int
+    is_online: bool
+    offline_duration: Optional[str] = None
+    online_since: Optional[float] = None
+    offline_since: Optional[float] = None
+
+
+class UserStatusBatch(BaseModel):
+    """Response of `POST /users/status`.
+
+    Fields:
+        statuses: One entry per distinct requested id.
+        online: How many of the requested users are online.
+    """
+
+    statuses: list[UserPresence]
+    online: int
+
+
+class OnlineUser(BaseModel):
+    """An online user and when they came online.
+
+    Fields:
+        user_id: The user's id.
+        online_since: Epoch seconds of the login.
+    """
+
+    user_id: int
+    online_since: float
+
+
+class OnlineUsers(BaseModel):
+    """Response of `GET /users/online`.
+
+    Fields:
+        online_count: Total users online right now.
+        users: Most recently online users first.
+    """
+
+    online_count: int
+    users: list[OnlineUser]
+
+
+class Heartbeat(BaseModel):
+    """Response of `POST /presence/heartbeat`.
+
+    Fields:
+        user_id: The caller's id.
+        came_online: True if the idle sweep had marked the user offline.
+        timeout_seconds: Idle time after which the user is marked offline;
+                         send heartbeats well within it.
+    """
+
+    user_id: int
+    came_online: bool
+    timeout_seconds: float
@@ -0,0 +1,141 @@
+"""Async authentication service helpers.
+
+Async counterparts of the functions in `services.auth_service`, used by
+the `async def` routers when `ASYNC_MODE` is enabled. Behaviour and
+return payloads are identical to the sync versions; only the I/O is
+different (AsyncSession and the asyncio Redis client).
+
+Argon2 hashing is CPU-bound, so it is awaited on the hash executor
+instead of running on the event loop.
+"""
+
+from datetime import datetime
+from fastapi import HTTPException, status
+from repositories.async_user_repository import AsyncUserRepository
+from schemas.user_schemas import UserCreate, UserLogin
+from services.user_cache import invalidate_user_async
+from utils.config import async_redis_client
+from utils.jwt_handler import create_access_token, create_refresh_token
+from utils.metrics import traced
+from utils.presence import presence_store
+from utils.password_hash import hash_password_async, verify_password_async
+from utils.revocation import revocation_store, token_id
+from utils.token_cache import token_digest
+from utils.unit_of_work import transaction
+
+
+@traced("async_auth_service.register_user_service")
+async def register_user_service(db, user_data: UserCreate):
+    """Register a new user.
+
+    Args:
+        db: SQLAlchemy AsyncSession used for persistence.
+        user_data: `UserCreate` containing username, email, and password.
+
+    Returns:
+        A dict containing a success message.
+
+    Raises:
+        HTTPException: 400 if email or username is already taken.
+    """
+    user_repo = AsyncUserRepository(db)
+
+    if await user_repo.get_by_email(user_data.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+
+    if await user_repo.get_by_username(user_data.username):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken",
+        )
+
+    hashed_password = await hash_password_async(user_data.password)
+
+    async with transaction(db):
+        new_user = await user_repo.create_user(
+            username=user_data.username,
+            email=user_data.email,
+            password_hash=hashed_password,
+        )
+    await invalidate_user_async(new_user.id)
+
+    return {"message": "User registered successfully"}
+
+
+@traced("async_auth_service.login_user_service")
+async def login_user_service(user_data: UserLogin, db):
+    """Authenticate a user and return tokens.
+
+    Args:
+        user_data: `UserLogin` with username and password.
+        db: SQLAlchemy AsyncSession for user lookup.
+
+    Returns:
+        Same payload as `auth_service.login_user_service`.
+
+    Raises:
+        HTTPException: 401 when authentication fails.
+    """
+    user_repo = AsyncUserRepository(db)
+
+    user = await user_repo.get_by_username(user_data.username)
+
+    if not user or not await verify_password_async(user_data.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password",
+        )
+
+    # Issue tokens
+    access_token = create_access_token(user.id, user.username)
+    refresh_token = create_refresh_token(user.id, user.username)
+
+    now = datetime.utcnow().timestamp()
+
+    # Update presence info in Redis (one MULTI)
+    await presence_store.mark_online_async(user.id, now)
+
+    return {
+        "message": "Login successful",
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user_status": {
+            "is_online": True,
+            "last_login": datetime.utcfromtimestamp(now).isoformat(),
+        },
+    }
+
+
+@traced("async_auth_service.logout_user_service")
+async def logout_user_service(token: str, payload: dict, user_id: int):
+    """Log out a user and revoke the current token.
+
+    Args:
+        token: The raw access token being revoked.
+        payload: Its decoded claims (`jti` and `exp` are used).
+        user_id: ID of the user to mark as offline.
+
+    Returns:
+        Same payload as `auth_service.logout_user_service`.
+    """
+    now = datetime.utcnow().timestamp()
+
+    # Revoke the token and mark the user offline in a single MULTI/EXEC
+    async with async_redis_client.pipeline(transaction=True) as pipe:
+        await revocation_store.revoke_async(
+            token_id(token, payload), payload["exp"], digest=token_digest(token), pipe=pipe
+        )
+        await presence_store.mark_offline_async(user_id, now, pipe=pipe)
+        await pipe.execute()
+
+    return {
+        "message": "User logged out successfully",
+        "user_status": {
+            "is_online": False,
+            "offline_since": datetime.utcfromtimestamp(now).isoformat(),
+        },
+    }
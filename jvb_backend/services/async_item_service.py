@@ -0,0 +1,182 @@
+"""Async item service layer
+
+Async counterparts of the functions in `services.item_service`, used by
+the `async def` routers when `ASYNC_MODE` is enabled. Return values and
+errors match the sync versions.
+"""
+
+from typing import AsyncIterator
+from fastapi import HTTPException
+from repositories.async_cached_item_repository import get_async_item_repository
+from schemas.item_schemas import (
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemFields,
+    ItemPage,
+    ItemBatch,
+    ItemBulkCreate,
+    ItemBulkUpdate,
+    ItemBulkDelete,
+    ItemBulkResponse,
+    ItemFieldsPage,
+)
+from repositories.item_repository import ITEM_LIST
+from services.item_service import (
+    check_batch_size,
+    item_batch,
+    item_page,
+    parse_search,
+    search_page,
+    bulk_created_results,
+    bulk_updated_results,
+    bulk_deleted_results,
+)
+from utils.config import PAGE_SIZE_DEFAULT, STREAM_BATCH_SIZE
+from utils.list_query import ListQuery
+from utils.unit_of_work import transaction
+
+
+async def create_item_service(db, item_data: ItemCreate):
+    """Create and persist a new item.
+
+    Returns:
+        A dict containing a success message and the created Item object.
+    """
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        new_item = await repo.create(item_data.name)
+
+    return {
+        "detail": "Item created successfully",
+        "item": new_item,
+    }
+
+
+async def get_item_by_id_service(db, item_id: int):
+    """Retrieve a single item by id.
+
+    Raises:
+        HTTPException: 404 if the item does not exist.
+    """
+    repo = get_async_item_repository(db)
+    item = await repo.get_by_id(item_id)
+
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
+
+
+async def get_all_items_service(db, query: ListQuery | None = None, limit: int = PAGE_SIZE_DEFAULT) -> ItemPage | ItemFieldsPage:
+    """Return one page of items, filtered and ordered as `query` asks."""
+    query = query or ListQuery(ITEM_LIST)
+    repo = get_async_item_repository(db)
+    rows = await repo.list_page(query, limit + 1)
+
+    return item_page(rows, limit, query)
+
+
+async def search_items_service(db, q: str, cursor: str | None = None, limit: int = PAGE_SIZE_DEFAULT) -> ItemPage:
+    """Full-text search over item names, best match first.
+
+    Raises:
+        HTTPException: 400 for an empty query or a malformed cursor.
+    """
+    terms, offset = parse_search(q, cursor)
+    repo = get_async_item_repository(db)
+    return search_page(await repo.search(terms, offset, limit + 1), offset, limit)
+
+
+def stream_items_service(db, query: ListQuery | None = None, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[str]:
+    """Stream every item of a listing as NDJSON lines from keyset batches."""
+    query = query or ListQuery(ITEM_LIST)
+    model = ItemFields if query.sparse else ItemResponse
+    repo = get_async_item_repository(db)
+
+    async def generate():
+        async for row in repo.iter_list(query, batch_size):
+            yield model.model_validate(query.record(row)).model_dump_json() + "\n"
+
+    return generate()
+
+
+async def update_item_service(db, item_id: int, item_data: ItemUpdate):
+    """Update an existing item's name.
+
+    Raises:
+        HTTPException: 404 if the item does not exist.
+    """
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        item = await repo.update(item_id, item_data.name)
+
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    return {
+        "detail": "Item updated successfully",
+        "item": item,
+    }
+
+
+async def delete_item_service(db, item_id: int):
+    """Delete an item by id.
+
+    Raises:
+        HTTPException: 404 if the item does not exist.
+    """
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        item = await repo.delete(item_id)
+
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    return {"detail": "Item deleted successfully"}
+
+
+async def get_items_by_ids_service(db, item_ids: list[int]) -> ItemBatch:
+    """Fetch many items at once (multi-get)."""
+    repo = get_async_item_repository(db)
+    return item_batch(item_ids, await repo.get_many(item_ids))
+
+
+async def bulk_create_items_service(db, data: ItemBulkCreate) -> ItemBulkResponse:
+    """Create many items in one transaction.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.items))
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        rows = await repo.bulk_create([item.name for item in data.items])
+    return bulk_created_results(rows)
+
+
+async def bulk_update_items_service(db, data: ItemBulkUpdate) -> ItemBulkResponse:
+    """Rename many items in one transaction, reporting unknown ids.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.items))
+    names_by_id = {entry.id: entry.name for entry in data.items}
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        updated = await repo.bulk_update(names_by_id)
+    return bulk_updated_results(names_by_id, updated)
+
+
+async def bulk_delete_items_service(db, data: ItemBulkDelete) -> ItemBulkResponse:
+    """Delete many items in one transaction, reporting unknown ids.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.ids))
+    item_ids = list(dict.fromkeys(data.ids))
+    repo = get_async_item_repository(db)
+    async with transaction(db):
+        deleted = await repo.bulk_delete(item_ids)
+    return bulk_deleted_results(item_ids, deleted)
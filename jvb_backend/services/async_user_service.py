@@ -0,0 +1,80 @@
+"""Async user service helpers.
+
+Async counterparts of the functions in `services.user_service`, used by
+the `async def` routers when `ASYNC_MODE` is enabled.
+"""
+
+from typing import AsyncIterator
+from fastapi import HTTPException
+from repositories.async_user_repository import AsyncUserRepository
+from repositories.user_repository import USER_LIST
+from schemas.user_schemas import UserResponse, UserFields, UserPage, UserFieldsPage, UserStatusQuery
+from services.user_service import distinct_user_ids, format_offline_duration, status_batch, user_page
+from utils.config import PAGE_SIZE_DEFAULT, STREAM_BATCH_SIZE
+from utils.list_query import ListQuery
+from utils.metrics import traced
+from utils.presence import presence_store
+
+
+@traced("async_user_service.get_all_users_service")
+async def get_all_users_service(db, query: ListQuery | None = None, limit: int = PAGE_SIZE_DEFAULT) -> UserPage | UserFieldsPage:
+    """Return one page of users, filtered and ordered as `query` asks."""
+    query = query or ListQuery(USER_LIST)
+    user_repo = AsyncUserRepository(db)
+
+    rows = await user_repo.list_users_page(query, limit + 1)
+    return user_page(rows, limit, query)
+
+
+def stream_users_service(db, query: ListQuery | None = None, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[str]:
+    """Stream every user of a listing as NDJSON lines from keyset batches."""
+    query = query or ListQuery(USER_LIST)
+    model = UserFields if query.sparse else UserResponse
+    user_repo = AsyncUserRepository(db)
+
+    async def generate():
+        async for row in user_repo.iter_users_list(query, batch_size):
+            yield model.model_validate(query.record(row)).model_dump_json() + "\n"
+
+    return generate()
+
+
+@traced("async_user_service.get_user_status")
+async def get_user_status(user_id: int):
+    """Return presence information for a user.
+
+    Returns:
+        Dict with keys: `user_id`, `is_online` (bool), and
+        `offline_duration` (string or None).
+    """
+    presence = await presence_store.get_async(user_id)
+
+    if presence["is_online"]:
+        return {
+            "user_id": user_id,
+            "is_online": True,
+            "offline_duration": None,
+        }
+
+    return {
+        "user_id": user_id,
+        "is_online": False,
+        "offline_duration": format_offline_duration(presence["offline_since"]),
+    }
+
+
+@traced("async_user_service.get_users_status_service")
+async def get_users_status_service(query: UserStatusQuery):
+    """Return presence for many users in one Redis round-trip.
+
+    Raises:
+        HTTPException: 413 when too many ids are requested.
+    """
+    user_ids = distinct_user_ids(query.user_ids)
+    return status_batch(await presence_store.get_many_async(user_ids), query.order)
+
+
+@traced("async_user_service.get_online_users_service")
+async def get_online_users_service(limit: int = PAGE_SIZE_DEFAULT):
+    """Return the online user count and the most recently online users."""
+    return await presence_store.online_users_async(limit)
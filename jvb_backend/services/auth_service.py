@@ -14,11 +14,18 @@ from datetime import datetime
 from fastapi import HTTPException, status
 from repositories.user_repository import UserRepository
 from schemas.user_schemas import UserCreate, UserLogin
+from services.user_cache import invalidate_user
 from utils.config import redis_client
 from utils.jwt_handler import create_access_token, create_refresh_token
+from utils.metrics import traced
+from utils.presence import presence_store
 from utils.password_hash import hash_password, verify_password
+from utils.revocation import revocation_store, token_id
+from utils.token_cache import token_digest
+from utils.unit_of_work import transaction
 
 
+@traced("auth_service.register_user_service")
 def register_user_service(db, user_data: UserCreate):
     """Register a new user.
 
@@ -52,15 +59,18 @@ def register_user_service(db, user_data: UserCreate):
     # Hash the plaintext password before persisting
     hashed_password = hash_password(user_data.password)
 
-    user_repo.create_user(
-        username=user_data.username,
-        email=user_data.email,
-        password_hash=hashed_password,
-    )
+    with transaction(db):
+        new_user = user_repo.create_user(
+            username=user_data.username,
+            email=user_data.email,
+            password_hash=hashed_password,
+        )
+    invalidate_user(new_user.id)
 
     return {"message": "User registered successfully"}
 
 
+@traced("auth_service.login_user_service")
 def login_user_service(user_data: UserLogin, db):
     """Authenticate a user and return tokens.
 
@@ -94,9 +104,8 @@ def login_user_service(user_data: UserLogin, db):
 
     now = datetime.utcnow().timestamp()
 
-    # Update presence info in Redis
-    redis_client.set(f"user:{user.id}:is_online", 1)
-    redis_client.set(f"user:{user.id}:last_login", now)
+    # Update presence info in Redis (one MULTI)
+    presence_store.mark_online(user.id, now)
 
     return {
         "message": "Login successful",
@@ -110,6 +119,7 @@ def login_user_service(user_data: UserLogin, db):
     }
 
 
+@traced("auth_service.refresh_token_service")
 def refresh_token_service(refresh_token: str):
     """Exchange a refresh token for a new access token.
 
@@ -145,35 +155,31 @@ def refresh_token_service(refresh_token: str):
     return {"access_token": new_access_token, "token_type": "bearer"}
 
 
-def logout_user_service(token: int, exp: int, user_id: int):
+@traced("auth_service.logout_user_service")
+def logout_user_service(token: str, payload: dict, user_id: int):
     """Log out a user and revoke the current token.
 
-    Blacklists the provided token in Redis for the remaining TTL and
-    marks the user as offline with a timestamp. The function returns a
+    Revokes the token by its `jti` until it expires (which also evicts it
+    from every worker's token cache) and marks the user as offline with a
+    timestamp, all in one Redis transaction. The function returns a
     small status payload describing the user's new presence state.
 
     Args:
-        token: Token identifier stored in JWT (or a representation used
-               as a blacklist key).
-        exp: Expiration time (epoch seconds) of the token being revoked.
+        token: The raw access token being revoked.
+        payload: Its decoded claims (`jti` and `exp` are used).
         user_id: ID of the user to mark as offline.
 
     Returns:
         A dict containing a confirmation message and the user's new
         presence status.
     """
-    ttl = exp - int(datetime.utcnow().timestamp())
-
-    if ttl < 0:
-        ttl = 0
-
-    # Store the token in a Redis blacklist for the remaining TTL
-    redis_client.setex(f"blacklist:{token}", ttl, "revoked")
-
-    # Mark user offline and record when they went offline
     now = datetime.utcnow().timestamp()
-    redis_client.set(f"user:{user_id}:is_online", 0)
-    redis_client.set(f"user:{user_id}:offline_since", now)
+
+    # Revoke the token and mark the user offline in a single MULTI/EXEC
+    pipe = redis_client.pipeline(transaction=True)
+    revocation_store.revoke(token_id(token, payload), payload["exp"], digest=token_digest(token), pipe=pipe)
+    presence_store.mark_offline(user_id, now, pipe=pipe)
+    pipe.execute()
 
     return {
         "message": "User logged out successfully",
@@ -0,0 +1,210 @@
+"""Bulk import / export service.
+
+Moves items and users in and out of the database as NDJSON or CSV
+without loading the whole dataset into memory. Both the CLI (`cli.py`)
+and the HTTP endpoints in `routers/transfer_route.py` use it.
+
+Design notes:
+ - Imports commit once per chunk of `chunk_size` rows (one unit of work,
+   see `utils.unit_of_work`), so a large import makes steady progress
+   and a crash loses at most one chunk. Invalid or duplicate rows are
+   skipped and reported rather than aborting.
+ - User passwords are hashed in parallel on `hash_executor`; a chunk
+   waits for free pool slots instead of failing with 503. That is fine
+   for the CLI but would let one request hold every slot logins need,
+   so `import_stream` (the HTTP path) imports items only.
+ - Duplicate usernames/emails are detected with one query per chunk
+   (plus an in-chunk check) instead of relying on constraint errors that
+   would roll back the whole chunk.
+ - Exports read through `yield_per`, so memory is bounded by
+   `STREAM_BATCH_SIZE` rows. Password hashes are never exported.
+"""
+
+from typing import AsyncIterator, Callable, Iterable, Iterator
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from repositories.item_repository import ItemRepository
+from repositories.user_repository import UserRepository
+from schemas.item_schemas import ItemCreate
+from schemas.user_schemas import UserCreate
+from utils.bulk_io import ImportReport, RecordParser, aiter_lines, chunked, format_records
+from utils.config import IMPORT_CHUNK_SIZE, STREAM_BATCH_SIZE
+from utils.password_hash import hash_passwords
+from utils.unit_of_work import transaction
+
+EXPORT_FIELDS = {
+    "items": ["id", "name"],
+    "users": ["id", "username", "email"],
+}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    """Condense a pydantic error into `field: message; ...`."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _validate(parsed: list[tuple], schema, report: ImportReport) -> list[tuple[int, object]]:
+    """Validate parsed rows against `schema`, rejecting bad ones into `report`.
+
+    Returns:
+        `(line_no, model)` pairs for the valid rows.
+    """
+    valid = []
+    for line_no, record, error in parsed:
+        report.rows += 1
+        if error is not None:
+            report.reject(line_no, error)
+            continue
+        try:
+            valid.append((line_no, schema.model_validate(record)))
+        except ValidationError as exc:
+            report.reject(line_no, _validation_message(exc))
+    return valid
+
+
+def import_items_chunk(db, parsed: list[tuple], report: ImportReport):
+    """Validate and insert one chunk of parsed item rows in one transaction.
+
+    Args:
+        db: SQLAlchemy Session.
+        parsed: `(line_no, record, error)` tuples from `RecordParser`.
+        report: Report updated in place.
+    """
+    valid = _validate(parsed, ItemCreate, report)
+    with transaction(db):
+        inserted = ItemRepository(db).insert_many([item.name for _, item in valid])
+    report.inserted += inserted
+    report.chunks += 1
+
+
+def import_users_chunk(db, parsed: list[tuple], report: ImportReport):
+    """Validate, hash and insert one chunk of parsed user rows.
+
+    Rows whose username or email already exists (in the database or
+    earlier in the chunk) are skipped.
+
+    Args:
+        db: SQLAlchemy Session.
+        parsed: `(line_no, record, error)` tuples from `RecordParser`.
+        report: Report updated in place.
+    """
+    valid = _validate(parsed, UserCreate, report)
+    user_repo = UserRepository(db)
+    with transaction(db):
+        taken_usernames, taken_emails = user_repo.find_taken(
+            [user.username for _, user in valid], [user.email for _, user in valid]
+        )
+
+        accepted = []
+        for line_no, user in valid:
+            if user.username in taken_usernames:
+                report.reject(line_no, f"Username already exists: {user.username}")
+                continue
+            if user.email in taken_emails:
+                report.reject(line_no, f"Email already exists: {user.email}")
+                continue
+            taken_usernames.add(user.username)
+            taken_emails.add(user.email)
+            accepted.append(user)
+
+        hashes = hash_passwords([user.password for user in accepted])
+        inserted = user_repo.insert_many([
+            {"username": user.username, "email": user.email, "password_hash": password_hash}
+            for user, password_hash in zip(accepted, hashes)
+        ])
+    report.inserted += inserted
+    report.chunks += 1
+
+
+IMPORTERS = {
+    "items": import_items_chunk,
+    "users": import_users_chunk,
+}
+
+# Kinds `import_stream` accepts; users need password hashing (CLI only)
+STREAM_IMPORTS = ("items",)
+
+
+def import_lines(
+    db,
+    kind: str,
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_chunk: Callable[[ImportReport], None] | None = None,
+) -> dict:
+    """Import `kind` ("items" or "users") from an iterable of text lines.
+
+    Args:
+        db: SQLAlchemy Session.
+        kind: Entity to import.
+        lines: Input lines, e.g. an open file.
+        fmt: "ndjson" or "csv".
+        chunk_size: Rows per transaction.
+        on_chunk: Optional callback invoked with the report after each
+                  committed chunk (progress output).
+
+    Returns:
+        The `ImportReport` as a dict (counts, seconds, rows_per_sec, errors).
+    """
+    importer = IMPORTERS[kind]
+    report = ImportReport()
+    for parsed in chunked(RecordParser(fmt).parse(lines), chunk_size):
+        importer(db, parsed, report)
+        if on_chunk is not None:
+            on_chunk(report)
+    return report.as_dict()
+
+
+async def import_stream(db, kind: str, body: AsyncIterator[bytes], fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """Import `kind` from a streamed request body.
+
+    The body is parsed incrementally; each full chunk is written on the
+    thread pool so the event loop is never blocked by the database.
+
+    Args:
+        db: SQLAlchemy Session.
+        kind: Entity to import; one of `STREAM_IMPORTS`.
+        body: Raw body chunks, e.g. `Request.stream()`.
+        fmt: "ndjson" or "csv".
+        chunk_size: Rows per transaction.
+
+    Returns:
+        The `ImportReport` as a dict.
+
+    Raises:
+        HTTPException: 400 for a body that is not UTF-8 or has a line
+                        longer than `MAX_LINE_LENGTH`.
+    """
+    if kind not in STREAM_IMPORTS:
+        raise ValueError(f"{kind} cannot be imported from a request body")
+    importer = IMPORTERS[kind]
+    parser = RecordParser(fmt)
+    report = ImportReport()
+    parsed = []
+    async for line in aiter_lines(body):
+        parsed.extend(parser.parse([line]))
+        if len(parsed) >= chunk_size:
+            await run_in_threadpool(importer, db, parsed, report)
+            parsed = []
+    if parsed:
+        await run_in_threadpool(importer, db, parsed, report)
+    return report.as_dict()
+
+
+def export_lines(db, kind: str, fmt: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Stream every `kind` row as NDJSON or CSV lines, in id order.
+
+    Args:
+        db: SQLAlchemy Session; must stay open while the stream is consumed.
+        kind: Entity to export ("items" or "users").
+        fmt: "ndjson" or "csv".
+        batch_size: Rows fetched per round-trip.
+
+    Returns:
+        Iterator of output lines (CSV starts with a header line).
+    """
+    repo = ItemRepository(db) if kind == "items" else UserRepository(db)
+    return format_records(repo.stream_rows(batch_size), EXPORT_FIELDS[kind], fmt)
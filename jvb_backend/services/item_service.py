@@ -6,9 +6,29 @@ Each function raises HTTPException when the requested resource doesn't
 exist or when an operation cannot be completed.
 """
 
-from fastapi import HTTPException
-from repositories.item_repository import ItemRepository
-from schemas.item_schemas import ItemCreate, ItemUpdate
+from typing import Iterator
+from fastapi import HTTPException, status
+from repositories.cached_item_repository import get_item_repository
+from repositories.item_repository import ITEM_LIST
+from repositories.item_search import search_terms
+from schemas.item_schemas import (
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemFields,
+    ItemPage,
+    ItemBatch,
+    ItemBulkCreate,
+    ItemBulkUpdate,
+    ItemBulkDelete,
+    ItemBulkResult,
+    ItemBulkResponse,
+    ItemFieldsPage,
+)
+from utils.config import PAGE_SIZE_DEFAULT, STREAM_BATCH_SIZE, ITEM_BULK_MAX_SIZE, SEARCH_MAX_RESULTS
+from utils.list_query import ListQuery
+from utils.pagination import decode_offset_cursor, encode_offset_cursor
+from utils.unit_of_work import transaction
 
 
 def create_item_service(db, item_data: ItemCreate):
@@ -21,8 +41,9 @@ def create_item_service(db, item_data: ItemCreate):
     Returns:
         A dict containing a success message and the created Item object.
     """
-    repo = ItemRepository(db)
-    new_item = repo.create(item_data.name)
+    repo = get_item_repository(db)
+    with transaction(db):
+        new_item = repo.create(item_data.name)
 
     return {
         "detail": "Item created successfully",
@@ -43,7 +64,7 @@ def get_item_by_id_service(db, item_id: int):
     Raises:
         HTTPException: 404 if the item does not exist.
     """
-    repo = ItemRepository(db)
+    repo = get_item_repository(db)
     item = repo.get_by_id(item_id)
 
     if not item:
@@ -51,19 +72,119 @@ def get_item_by_id_service(db, item_id: int):
     return item
 
 
-def get_all_items_service(db):
-    """Return all items from the database.
+def item_page(rows, limit: int, query: ListQuery | None = None) -> ItemPage | ItemFieldsPage:
+    """Build the page model for an over-fetched result set.
+
+    Returned as a model rather than a dict: `GET /items/` is declared as
+    a union, and a dict would be validated against every union member,
+    multiplying the cost of large pages.
+
+    Args:
+        rows: Items or rows ordered as `query` asks.
+        limit: Page size.
+        query: The listing's `ListQuery`; None for the plain id order.
+    """
+    query = query or ListQuery(ITEM_LIST)
+    page = query.page(rows, limit)
+    if query.sparse:
+        return ItemFieldsPage.model_validate(page)
+    return ItemPage.model_validate(page)
+
+
+def get_all_items_service(db, query: ListQuery | None = None, limit: int = PAGE_SIZE_DEFAULT) -> ItemPage | ItemFieldsPage:
+    """Return one page of items, filtered and ordered as `query` asks.
 
     Args:
         db: SQLAlchemy Session.
+        query: Parsed filters, sort, fields and cursor (see
+               `utils.list_query`); None for the first page by id.
+        limit: Maximum number of items on the page.
 
     Returns:
-        A list of Item instances.
+        An `ItemPage` with `items` and `next_cursor` (None when there are
+        no more items), or an `ItemFieldsPage` when `fields=` was given.
+    """
+    query = query or ListQuery(ITEM_LIST)
+    repo = get_item_repository(db)
+    rows = repo.list_page(query, limit + 1)
+
+    return item_page(rows, limit, query)
+
+
+def parse_search(q: str, cursor: str | None) -> tuple[list[str], int]:
+    """Split a search query into terms and decode its cursor.
+
+    Raises:
+        HTTPException: 400 if `q` has no word characters or the cursor
+                        is malformed or past `SEARCH_MAX_RESULTS`.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain at least one word",
+        )
+    return terms, decode_offset_cursor(cursor, SEARCH_MAX_RESULTS)
+
+
+def search_page(rows: list, offset: int, limit: int) -> ItemPage:
+    """Build the `ItemPage` for over-fetched search results.
+
+    Paging stops at `SEARCH_MAX_RESULTS`.
     """
-    repo = ItemRepository(db)
-    items = repo.get_all()
+    has_more = len(rows) > limit and offset + limit < SEARCH_MAX_RESULTS
+    return ItemPage.model_validate({
+        "items": rows[:limit],
+        "next_cursor": encode_offset_cursor(offset + limit) if has_more else None,
+    })
 
-    return items
+
+def search_items_service(db, q: str, cursor: str | None = None, limit: int = PAGE_SIZE_DEFAULT) -> ItemPage:
+    """Full-text search over item names, best match first.
+
+    Args:
+        db: SQLAlchemy Session.
+        q: Free-text query; every word must match (as a prefix when long
+           enough, see `repositories.item_search`).
+        cursor: Opaque cursor from a previous page, or None for the first.
+        limit: Maximum number of items on the page.
+
+    Returns:
+        An `ItemPage` of matching items.
+
+    Raises:
+        HTTPException: 400 for an empty query or a malformed cursor.
+    """
+    terms, offset = parse_search(q, cursor)
+    repo = get_item_repository(db)
+    return search_page(repo.search(terms, offset, limit + 1), offset, limit)
+
+
+def stream_items_service(db, query: ListQuery | None = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Stream every item of a listing as NDJSON, one JSON object per line.
+
+    Rows are pulled from the database in keyset batches of `batch_size`,
+    so memory use is flat regardless of table size.
+
+    Args:
+        db: SQLAlchemy Session; must stay open while the stream is consumed.
+        query: Filters, sort, fields and cursor of the listing (already
+               validated, so nothing fails once the response starts);
+               None for all items by id.
+        batch_size: Number of rows fetched per database round-trip.
+
+    Returns:
+        Iterator of NDJSON lines.
+    """
+    query = query or ListQuery(ITEM_LIST)
+    model = ItemFields if query.sparse else ItemResponse
+    repo = get_item_repository(db)
+
+    def generate():
+        for row in repo.iter_list(query, batch_size):
+            yield model.model_validate(query.record(row)).model_dump_json() + "\n"
+
+    return generate()
 
 
 def update_item_service(db, item_id: int, item_data: ItemUpdate):
@@ -80,14 +201,13 @@ def update_item_service(db, item_id: int, item_data: ItemUpdate):
     Raises:
         HTTPException: 404 if the item does not exist.
     """
-    repo = ItemRepository(db)
-    item = repo.get_by_id(item_id)
+    repo = get_item_repository(db)
+    with transaction(db):
+        item = repo.update(item_id, item_data.name)
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    repo.update(item_id, item_data.name)
-
     return {
         "detail": "Item updated successfully",
         "item": item,
@@ -107,12 +227,132 @@ def delete_item_service(db, item_id: int):
     Raises:
         HTTPException: 404 if the item does not exist.
     """
-    repo = ItemRepository(db)
-    item = repo.get_by_id(item_id)
+    repo = get_item_repository(db)
+    with transaction(db):
+        item = repo.delete(item_id)
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    repo.delete(item_id)
+    return {"detail": "Item deleted successfully"}
+
 
-    return {"detail": "Item deleted successfully"}
\ No newline at end of file
+def check_batch_size(count: int):
+    """Raise 413 when a bulk request has more than `ITEM_BULK_MAX_SIZE` entries."""
+    if count > ITEM_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large (max {ITEM_BULK_MAX_SIZE} entries)",
+        )
+
+
+def parse_item_ids(ids: str) -> list[int]:
+    """Parse a comma-separated `ids` query value, keeping first occurrences.
+
+    Raises:
+        HTTPException: 400 for non-integer ids, 413 for too many ids.
+    """
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers",
+        )
+    parsed = list(dict.fromkeys(parsed))
+    check_batch_size(len(parsed))
+    return parsed
+
+
+def item_batch(item_ids: list[int], items) -> ItemBatch:
+    """Order fetched items by the requested ids and list the missing ones."""
+    by_id = {item.id: item for item in items}
+    return ItemBatch(
+        items=[ItemResponse.model_validate(by_id[item_id]) for item_id in item_ids if item_id in by_id],
+        missing_ids=[item_id for item_id in item_ids if item_id not in by_id],
+    )
+
+
+def _bulk_response(results: list[ItemBulkResult]) -> ItemBulkResponse:
+    succeeded = sum(result.status != "not_found" for result in results)
+    return ItemBulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+def bulk_created_results(rows) -> ItemBulkResponse:
+    """Build the bulk response for rows returned by `bulk_create`."""
+    return _bulk_response([
+        ItemBulkResult(id=row.id, status="created", item=ItemResponse.model_validate(row))
+        for row in rows
+    ])
+
+
+def bulk_updated_results(names_by_id: dict[int, str], updated: set[int]) -> ItemBulkResponse:
+    """Build the bulk response for a `bulk_update`, in request order."""
+    return _bulk_response([
+        ItemBulkResult(id=item_id, status="updated", item=ItemResponse(id=item_id, name=name))
+        if item_id in updated else ItemBulkResult(id=item_id, status="not_found")
+        for item_id, name in names_by_id.items()
+    ])
+
+
+def bulk_deleted_results(item_ids: list[int], deleted: set[int]) -> ItemBulkResponse:
+    """Build the bulk response for a `bulk_delete`, in request order."""
+    return _bulk_response([
+        ItemBulkResult(id=item_id, status="deleted" if item_id in deleted else "not_found")
+        for item_id in item_ids
+    ])
+
+
+def get_items_by_ids_service(db, item_ids: list[int]) -> ItemBatch:
+    """Fetch many items at once (multi-get).
+
+    Args:
+        db: SQLAlchemy Session.
+        item_ids: Ids to fetch, as returned by `parse_item_ids`.
+
+    Returns:
+        An `ItemBatch` with found items in request order plus missing ids.
+    """
+    repo = get_item_repository(db)
+    return item_batch(item_ids, repo.get_many(item_ids))
+
+
+def bulk_create_items_service(db, data: ItemBulkCreate) -> ItemBulkResponse:
+    """Create many items in one transaction.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.items))
+    repo = get_item_repository(db)
+    with transaction(db):
+        rows = repo.bulk_create([item.name for item in data.items])
+    return bulk_created_results(rows)
+
+
+def bulk_update_items_service(db, data: ItemBulkUpdate) -> ItemBulkResponse:
+    """Rename many items in one transaction, reporting unknown ids.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.items))
+    names_by_id = {entry.id: entry.name for entry in data.items}
+    repo = get_item_repository(db)
+    with transaction(db):
+        updated = repo.bulk_update(names_by_id)
+    return bulk_updated_results(names_by_id, updated)
+
+
+def bulk_delete_items_service(db, data: ItemBulkDelete) -> ItemBulkResponse:
+    """Delete many items in one transaction, reporting unknown ids.
+
+    Raises:
+        HTTPException: 413 if the batch exceeds `ITEM_BULK_MAX_SIZE`.
+    """
+    check_batch_size(len(data.ids))
+    item_ids = list(dict.fromkeys(data.ids))
+    repo = get_item_repository(db)
+    with transaction(db):
+        deleted = repo.bulk_delete(item_ids)
+    return bulk_deleted_results(item_ids, deleted)
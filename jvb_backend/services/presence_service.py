@@ -0,0 +1,86 @@
+"""Presence push service.
+
+Backs `GET /presence/stream` (server-sent events) and
+`POST /presence/heartbeat`. A stream starts with a `snapshot` of every
+watched user (the same entries as `POST /users/status`), then sends a
+`presence` event per transition and a comment line every
+`PRESENCE_STREAM_KEEPALIVE_SECONDS` so proxies keep the connection open.
+A client that fell behind (or any client after a Redis reconnect) gets a
+new `snapshot` in place of the events it missed. When the worker cannot
+subscribe to Redis in time, the stream sends a single `error` event and
+ends, and the client reconnects later.
+"""
+
+import asyncio
+from typing import AsyncIterator
+from fastapi import HTTPException, Request, status
+from services.user_service import distinct_user_ids, status_batch
+from utils.config import PRESENCE_STREAM_KEEPALIVE_SECONDS, PRESENCE_SUBSCRIBE_TIMEOUT_SECONDS, PRESENCE_TIMEOUT_SECONDS
+from utils.presence import MAX_USER_ID, presence_store
+from utils.presence_events import RESYNC, presence_broadcaster, sse_event
+
+
+def parse_user_ids(ids: str) -> list[int]:
+    """Parse a comma-separated id list into distinct user ids.
+
+    Raises:
+        HTTPException: 422 if an id is not an integer in 0..`MAX_USER_ID`
+                        or none are given; 413 when too many ids are
+                        requested.
+    """
+    try:
+        user_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        user_ids = None
+    if not user_ids or any(not 0 <= user_id <= MAX_USER_ID for user_id in user_ids):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma-separated list of user ids",
+        )
+    return distinct_user_ids(user_ids)
+
+
+async def _snapshot(user_ids: list[int]) -> str:
+    return sse_event("snapshot", status_batch(await presence_store.get_many_async(user_ids), "input"))
+
+
+async def presence_stream(request: Request, user_ids: list[int]) -> AsyncIterator[str]:
+    """Yield server-sent events for the presence of `user_ids`.
+
+    The subscription is taken before the first snapshot, so no
+    transition can fall between the two, and released when the client
+    disconnects.
+    """
+    try:
+        subscription = await presence_broadcaster.subscribe(user_ids, PRESENCE_SUBSCRIBE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        yield sse_event("error", {"detail": "Presence updates are unavailable"})
+        return
+    try:
+        yield await _snapshot(user_ids)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), PRESENCE_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event is RESYNC:
+                yield await _snapshot(user_ids)
+            else:
+                yield sse_event("presence", event)
+    finally:
+        presence_broadcaster.unsubscribe(subscription)
+
+
+async def heartbeat_service(user_id: int) -> dict:
+    """Record a heartbeat for `user_id`.
+
+    Returns:
+        A dict with `user_id`, `came_online` (the user had been marked
+        offline by the idle sweep) and `timeout_seconds` (send the next
+        heartbeat well before this).
+    """
+    came_online = await presence_store.heartbeat_async(user_id)
+    return {"user_id": user_id, "came_online": came_online, "timeout_seconds": PRESENCE_TIMEOUT_SECONDS}
@@ -0,0 +1,87 @@
+"""Read-through cache of user profiles.
+
+Authenticated endpoints mostly need nothing beyond the JWT claims (see
+`routers.auth_dependencies.Principal`). When a request does need the
+user's profile, it goes through this cache instead of a SELECT on
+`users`: a per-worker LRU with a short TTL, optionally backed by a
+shared Redis tier (`USER_CACHE_REDIS`).
+
+Only the public profile (`UserResponse` fields) is cached; the password
+hash never leaves the database. Services that write users must call
+`invalidate_user` afterwards.
+"""
+
+from repositories.user_repository import UserRepository
+from repositories.async_user_repository import AsyncUserRepository
+from schemas.user_schemas import UserResponse
+from fastapi import HTTPException
+from utils.cache import LRUTTLCache, TieredCache
+from utils.config import (
+    redis_client,
+    async_redis_client,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL_SECONDS,
+    USER_CACHE_REDIS,
+    USER_CACHE_REDIS_TTL_SECONDS,
+)
+
+user_cache = TieredCache(
+    "user",
+    LRUTTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS),
+    redis_client=redis_client if USER_CACHE_REDIS else None,
+    async_redis_client=async_redis_client if USER_CACHE_REDIS else None,
+    redis_ttl=USER_CACHE_REDIS_TTL_SECONDS,
+)
+
+
+def _not_found():
+    return HTTPException(status_code=404, detail="User not found")
+
+
+def get_cached_user(db, user_id: int) -> UserResponse:
+    """Return a user's profile, loading it from the database on a miss.
+
+    Args:
+        db: SQLAlchemy Session used only on a cache miss.
+        user_id: Primary key id of the user.
+
+    Returns:
+        The user's `UserResponse`.
+
+    Raises:
+        HTTPException: 404 if the user is not found.
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return UserResponse.model_validate(cached)
+
+    user = UserRepository(db).get_by_id(user_id)
+    if not user:
+        raise _not_found()
+    profile = UserResponse.model_validate(user)
+    user_cache.set(user_id, profile.model_dump())
+    return profile
+
+
+async def get_cached_user_async(db, user_id: int) -> UserResponse:
+    """Async variant of `get_cached_user` for the `async def` request path."""
+    cached = await user_cache.get_async(user_id)
+    if cached is not None:
+        return UserResponse.model_validate(cached)
+
+    user = await AsyncUserRepository(db).get_by_id(user_id)
+    if not user:
+        raise _not_found()
+    profile = UserResponse.model_validate(user)
+    await user_cache.set_async(user_id, profile.model_dump())
+    return profile
+
+
+def invalidate_user(user_id: int):
+    """Drop a user's cached profile after it has been written."""
+    user_cache.delete(user_id)
+
+
+async def invalidate_user_async(user_id: int):
+    """Async variant of `invalidate_user`."""
+    await user_cache.delete_async(user_id)
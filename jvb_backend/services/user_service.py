@@ -2,74 +2,86 @@
 
 Provides higher-level user-related utilities used by routers and other
 service layers. This module contains convenience functions for fetching
-users, checking presence information in Redis, and computing offline
-durations.
+users, checking presence information in Redis (see `utils.presence`),
+and computing offline durations.
 """
 
-from fastapi import HTTPException
+from typing import Iterator
+from fastapi import HTTPException, status
 from datetime import datetime
-from utils.config import redis_client
-from repositories.user_repository import UserRepository
+from utils.config import PAGE_SIZE_DEFAULT, STREAM_BATCH_SIZE, PRESENCE_BATCH_MAX
+from utils.list_query import ListQuery
+from utils.metrics import traced
+from utils.presence import presence_store
+from repositories.user_repository import USER_LIST, UserRepository
+from schemas.user_schemas import UserResponse, UserFields, UserPage, UserFieldsPage, UserStatusQuery
 
 
-def get_user_by_id(db, user_id: int):
-    """Retrieve a single user by their primary key id.
+def user_page(rows, limit: int, query: ListQuery) -> UserPage | UserFieldsPage:
+    """Build the page model for an over-fetched user listing."""
+    page = query.page(rows, limit)
+    if query.sparse:
+        return UserFieldsPage.model_validate(page)
+    return UserPage.model_validate(page)
+
+
+@traced("user_service.get_all_users_service")
+def get_all_users_service(db, query: ListQuery | None = None, limit: int = PAGE_SIZE_DEFAULT) -> UserPage | UserFieldsPage:
+    """Return one page of users, filtered and ordered as `query` asks.
 
     Args:
         db: SQLAlchemy Session used for lookup.
-        user_id: Primary key id of the user to retrieve.
+        query: Parsed filters, sort, fields and cursor (see
+               `utils.list_query`); None for the first page by id.
+        limit: Maximum number of users on the page.
 
     Returns:
-        The User instance when found.
-
-    Raises:
-        HTTPException: 404 if the user is not found.
+        A `UserPage` with `items` and `next_cursor` (None when there are
+        no more users), or a `UserFieldsPage` when `fields=` was given.
     """
+    query = query or ListQuery(USER_LIST)
     user_repo = UserRepository(db)
 
-    user = user_repo.get_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    rows = user_repo.list_users_page(query, limit + 1)
+    return user_page(rows, limit, query)
+
 
+def stream_users_service(db, query: ListQuery | None = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Stream every user of a listing as NDJSON, one object per line.
 
-def get_all_users_service(db):
-    """Return a list of all users.
+    Lines are `UserResponse` objects, or `UserFields` with `fields=`.
 
     Args:
-        db: SQLAlchemy Session used for lookup.
+        db: SQLAlchemy Session; must stay open while the stream is consumed.
+        query: Filters, sort, fields and cursor of the listing (already
+               validated, so nothing fails once the response starts);
+               None for all users by id.
+        batch_size: Number of rows fetched per database round-trip.
 
     Returns:
-        List of User instances.
+        Iterator of NDJSON lines.
     """
+    query = query or ListQuery(USER_LIST)
+    model = UserFields if query.sparse else UserResponse
     user_repo = UserRepository(db)
 
-    users = user_repo.get_all_users()
-    return users
-
+    def generate():
+        for row in user_repo.iter_users_list(query, batch_size):
+            yield model.model_validate(query.record(row)).model_dump_json() + "\n"
 
-def get_offline_duration(user_id: int):
-    """Calculate how long a user has been offline.
+    return generate()
 
-    Reads the `user:{user_id}:offline_since` key from Redis (expected to
-    be a timestamp) and returns a human-friendly string describing how
-    long ago the user went offline.
 
-    Args:
-        user_id: ID of the user to check.
+def format_offline_duration(offline_since: float | None):
+    """Describe how long ago `offline_since` (epoch seconds) was.
 
     Returns:
         A string like "<n> phút trước" (minutes ago) or None when no
         offline timestamp is available.
     """
-    offline_since = redis_client.get(f"user:{user_id}:offline_since")
-
-    if not offline_since:
+    if offline_since is None:
         return None
 
-    # Redis returns bytes for stored values; ensure we convert to float
-    # regardless of the stored representation.
-    offline_since = float(offline_since)
     diff = datetime.utcnow().timestamp() - offline_since
 
     minutes = int(diff // 60)
@@ -78,12 +90,13 @@ def get_offline_duration(user_id: int):
     return f"{minutes} phút trước"
 
 
+@traced("user_service.get_user_status")
 def get_user_status(user_id: int):
     """Return presence information for a user.
 
-    Queries Redis for `user:{user_id}:is_online`. If the value indicates
-    the user is online, returns a short dict with `is_online: True`.
-    Otherwise, it computes the offline duration and returns that value.
+    Reads the user's online bit and timestamps from the presence store in
+    one round-trip. Online users get `is_online: True`; otherwise the
+    offline duration is included.
 
     Args:
         user_id: ID of the user whose status is requested.
@@ -92,23 +105,91 @@ def get_user_status(user_id: int):
         Dict with keys: `user_id`, `is_online` (bool), and
         `offline_duration` (string or None).
     """
-    status = redis_client.get(f"user:{user_id}:is_online")
-
-    # Redis may return bytes which should be decoded to string for
-    # comparison (or None if key does not exist).
-    if isinstance(status, bytes):
-        status = status.decode()
+    presence = presence_store.get(user_id)
 
-    if status == "1":
+    if presence["is_online"]:
         return {
             "user_id": user_id,
             "is_online": True,
             "offline_duration": None,
         }
 
-    offline_duration = get_offline_duration(user_id)
     return {
         "user_id": user_id,
         "is_online": False,
-        "offline_duration": offline_duration,
-    }
\ No newline at end of file
+        "offline_duration": format_offline_duration(presence["offline_since"]),
+    }
+
+
+def distinct_user_ids(user_ids: list[int]) -> list[int]:
+    """Drop duplicate ids (keeping first occurrences) and enforce the batch limit.
+
+    Raises:
+        HTTPException: 413 when more than `PRESENCE_BATCH_MAX` distinct ids
+                        are requested.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > PRESENCE_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many user ids (max {PRESENCE_BATCH_MAX})",
+        )
+    return user_ids
+
+
+def _recency_key(presence: dict):
+    if presence["is_online"]:
+        return (0, -(presence["online_since"] or 0))
+    if presence["offline_since"] is not None:
+        return (1, -presence["offline_since"])
+    return (2, 0)
+
+
+def status_batch(presences: list[dict], order: str) -> dict:
+    """Shape presence-store entries into a `UserStatusBatch` payload.
+
+    Args:
+        presences: Entries from `presence_store.get_many`.
+        order: "input" or "recent" (see `UserStatusQuery`).
+    """
+    if order == "recent":
+        presences = sorted(presences, key=_recency_key)
+    statuses = [
+        {
+            **presence,
+            "offline_duration": None if presence["is_online"] else format_offline_duration(presence["offline_since"]),
+        }
+        for presence in presences
+    ]
+    return {
+        "statuses": statuses,
+        "online": sum(presence["is_online"] for presence in presences),
+    }
+
+
+@traced("user_service.get_users_status_service")
+def get_users_status_service(query: UserStatusQuery):
+    """Return presence for many users in one Redis round-trip.
+
+    Args:
+        query: Requested ids and result order.
+
+    Returns:
+        A dict with `statuses` (one per distinct id) and `online` (how
+        many of them are online).
+
+    Raises:
+        HTTPException: 413 when too many ids are requested.
+    """
+    user_ids = distinct_user_ids(query.user_ids)
+    return status_batch(presence_store.get_many(user_ids), query.order)
+
+
+@traced("user_service.get_online_users_service")
+def get_online_users_service(limit: int = PAGE_SIZE_DEFAULT):
+    """Return the online user count and the most recently online users.
+
+    Args:
+        limit: Maximum number of users listed.
+    """
+    return presence_store.online_users(limit)
@@ -0,0 +1,211 @@
+"""NDJSON / CSV helpers for bulk import and export.
+
+Both formats are handled line by line so files and request bodies of any
+size are processed with memory bounded by the import chunk size, never
+by the size of the input.
+
+Design notes:
+ - `RecordParser` is stateful only for CSV (it remembers the header
+   line), so the same parser serves a file read synchronously by the CLI
+   and a request body read asynchronously by the HTTP endpoints.
+ - CSV is parsed one physical line at a time, so quoted fields must not
+   contain embedded newlines (exports never produce them for these
+   tables).
+ - `ImportReport` collects counts and the first `MAX_REPORTED_ERRORS`
+   row errors; a bad row is skipped and reported, it never aborts the
+   import.
+ - CSV output is written through `csv.writer` into a reusable buffer so
+   quoting matches what `RecordParser` reads back.
+ - Request bodies are read with `aiter_lines`, which rejects lines longer
+   than `MAX_LINE_LENGTH` (an input without newlines would otherwise be
+   buffered whole) and input that is not UTF-8, both with a 400.
+"""
+
+import codecs
+import csv
+import io
+import json
+import time
+from typing import AsyncIterator, Iterable, Iterator
+from fastapi import HTTPException, status
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Cap on row errors kept in a report so a bad file can't exhaust memory
+MAX_REPORTED_ERRORS = 100
+# Characters allowed in one line of a request body; rows are far shorter
+MAX_LINE_LENGTH = 64 * 1024
+
+
+def format_from_filename(path: str, default: str = "ndjson") -> str:
+    """Guess the bulk format from a file extension (`.csv` → csv)."""
+    return "csv" if path.lower().endswith(".csv") else default
+
+
+class RecordParser:
+    """Turn input lines into dicts, one record per non-blank line.
+
+    Args:
+        fmt: "ndjson" or "csv". CSV input must start with a header line.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        self.fmt = fmt
+        self.header: list[str] | None = None
+        self.line_no = 0
+
+    def parse(self, lines: Iterable[str]) -> Iterator[tuple[int, dict | None, str | None]]:
+        """Parse `lines`, yielding `(line_no, record, error)` tuples.
+
+        Exactly one of `record` / `error` is set. Blank lines are skipped.
+        """
+        for line in lines:
+            self.line_no += 1
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if self.fmt == "ndjson":
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield self.line_no, None, f"Invalid JSON: {exc}"
+                    continue
+                if not isinstance(record, dict):
+                    yield self.line_no, None, "Expected a JSON object"
+                    continue
+                yield self.line_no, record, None
+                continue
+
+            values = next(csv.reader([line]))
+            if self.header is None:
+                self.header = [name.strip() for name in values]
+                continue
+            if len(values) != len(self.header):
+                yield self.line_no, None, f"Expected {len(self.header)} columns, got {len(values)}"
+                continue
+            yield self.line_no, dict(zip(self.header, values)), None
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of at most `size` consecutive elements."""
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split an async stream of UTF-8 byte chunks into text lines.
+
+    Used on `Request.stream()`; multi-byte characters split across
+    chunks are decoded correctly.
+
+    Raises:
+        HTTPException: 400 when the input is not UTF-8 or a line is
+                        longer than `MAX_LINE_LENGTH` characters.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    line_no = 0
+
+    def decode(data: bytes, final: bool = False) -> str:
+        try:
+            return decoder.decode(data, final)
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Line {line_no + 1} is not valid UTF-8",
+            )
+
+    def check_length(line: str):
+        if len(line) > MAX_LINE_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Line {line_no + 1} is longer than {MAX_LINE_LENGTH} characters",
+            )
+
+    async for chunk in chunks:
+        pending += decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            check_length(line)
+            line_no += 1
+            yield line
+        check_length(pending)
+    pending += decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def format_records(rows: Iterable, fields: list[str], fmt: str) -> Iterator[str]:
+    """Serialise rows (SQLAlchemy rows or objects) as NDJSON or CSV lines.
+
+    Args:
+        rows: Rows exposing `fields` as attributes.
+        fields: Column names, in output order. CSV output starts with them
+                as a header line.
+        fmt: "ndjson" or "csv".
+    """
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps({field: getattr(row, field) for field in fields}) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def emit(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield emit(fields)
+    for row in rows:
+        yield emit([getattr(row, field) for field in fields])
+
+
+class ImportReport:
+    """Running totals for one import.
+
+    Attributes:
+        rows: Non-blank input rows seen.
+        inserted: Rows written to the database.
+        skipped: Rows rejected (invalid or duplicate).
+        chunks: Transactions committed.
+        errors: Up to `MAX_REPORTED_ERRORS` `{"line", "error"}` entries.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.errors: list[dict] = []
+        self._started = time.perf_counter()
+
+    def reject(self, line_no: int, error: str):
+        """Count a skipped row and keep its error while under the cap."""
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": error})
+
+    def as_dict(self) -> dict:
+        """Return the report with elapsed time and throughput."""
+        elapsed = time.perf_counter() - self._started
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "chunks": self.chunks,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors,
+        }
@@ -0,0 +1,432 @@
+"""Caching primitives.
+
+`LRUTTLCache` is a small thread-safe LRU map whose entries also expire.
+It is shared by the per-worker caches in this project (verified JWT
+payloads, users, items) so they all behave and report stats the same
+way. `TieredCache` puts an `LRUTTLCache` in front of an optional shared
+Redis tier for JSON-serializable values, and `SingleFlight` /
+`AsyncSingleFlight` collapse concurrent loads of the same cold key into
+a single backend call (stampede protection).
+
+Design notes:
+ - Expiry is wall-clock (`time.time()`), so callers can pin an entry to
+   an absolute deadline such as a JWT `exp` claim.
+ - A `maxsize` of 0 disables the cache: `set` becomes a no-op and every
+   `get` is a miss.
+ - Expired entries are dropped lazily on access; when the cache is full
+   the least recently used entry is evicted.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class LRUTTLCache:
+    """Bounded LRU cache with a default TTL and optional per-entry deadline.
+
+    Args:
+        maxsize: Maximum number of entries kept; 0 disables caching.
+        ttl: Default time-to-live in seconds for new entries.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None, expires_at: float | None = None):
+        """Store `value` under `key`.
+
+        The entry expires after `ttl` seconds (the cache default when
+        omitted) or at `expires_at`, whichever comes first.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(key, value, self._deadline(ttl, expires_at))
+
+    def add(self, key, value, ttl: float | None = None, expires_at: float | None = None) -> bool:
+        """Store `value` only if `key` has no live entry.
+
+        Returns:
+            True if the value was stored, False if a live entry already
+            existed (and was left untouched).
+        """
+        if self.maxsize <= 0:
+            return False
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self._store(key, value, self._deadline(ttl, expires_at))
+            return True
+
+    def delete(self, key):
+        """Remove `key` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def _deadline(self, ttl: float | None, expires_at: float | None) -> float:
+        deadline = time.time() + (self.ttl if ttl is None else ttl)
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        return deadline
+
+    def _store(self, key, value, deadline: float):
+        # Caller must hold `_lock`
+        self._data[key] = (value, deadline)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class TieredCache:
+    """Per-worker LRU/TTL cache backed by an optional Redis tier.
+
+    Lookups try the local tier, then Redis (populating the local tier on
+    a Redis hit). Values must be JSON-serializable. Redis errors are
+    logged and treated as misses so an unavailable cache never fails a
+    request.
+
+    Local entries are not invalidated across workers; keep the local TTL
+    short and rely on the Redis tier (which `delete` clears) for sharing.
+
+    Args:
+        namespace: Prefix for Redis keys (`cache:{namespace}:{key}`).
+        local: The in-process tier.
+        redis_client: Sync Redis client, or None to disable the Redis tier.
+        async_redis_client: asyncio Redis client for the `*_async` methods.
+        redis_ttl: Time-to-live in seconds for Redis entries.
+    """
+
+    def __init__(self, namespace: str, local: LRUTTLCache, redis_client=None, async_redis_client=None, redis_ttl: int = 300):
+        self.namespace = namespace
+        self.local = local
+        self.redis = redis_client
+        self.async_redis = async_redis_client
+        self.redis_ttl = redis_ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+    def _key(self, key) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        value = self.local.get(key)
+        if value is not None or self.redis is None:
+            return value
+        try:
+            raw = self.redis.get(self._key(key))
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+            return None
+        return self._from_redis(key, raw)
+
+    async def get_async(self, key):
+        """Async variant of `get` using the asyncio Redis client."""
+        value = self.local.get(key)
+        if value is not None or self.async_redis is None:
+            return value
+        try:
+            raw = await self.async_redis.get(self._key(key))
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+            return None
+        return self._from_redis(key, raw)
+
+    def get_many(self, keys) -> dict:
+        """Return `{key: value}` for the cached `keys`; misses are left out.
+
+        Local misses are looked up in Redis with a single MGET.
+        """
+        found, missing = self._get_many_local(keys)
+        if not missing or self.redis is None:
+            return found
+        try:
+            raws = self.redis.mget([self._key(key) for key in missing])
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+            return found
+        return self._from_redis_many(found, missing, raws)
+
+    async def get_many_async(self, keys) -> dict:
+        """Async variant of `get_many`."""
+        found, missing = self._get_many_local(keys)
+        if not missing or self.async_redis is None:
+            return found
+        try:
+            raws = await self.async_redis.mget([self._key(key) for key in missing])
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+            return found
+        return self._from_redis_many(found, missing, raws)
+
+    def _get_many_local(self, keys) -> tuple[dict, list]:
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def _from_redis_many(self, found: dict, keys: list, raws: list) -> dict:
+        for key, raw in zip(keys, raws):
+            value = self._from_redis(key, raw)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def _from_redis(self, key, raw):
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store `value` in both tiers."""
+        self.local.set(key, value)
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(self._key(key), json.dumps(value), ex=self.redis_ttl)
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+
+    async def set_async(self, key, value):
+        """Async variant of `set`."""
+        self.local.set(key, value)
+        if self.async_redis is None:
+            return
+        try:
+            await self.async_redis.set(self._key(key), json.dumps(value), ex=self.redis_ttl)
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+
+    def add(self, key, value) -> bool:
+        """Store `value` unless `key` already holds a value (`SET NX`).
+
+        Meant for read-through fills: a value written since the load
+        started is newer than the loaded one and is kept. The local tier
+        is only filled once Redis accepted the value, so it never holds
+        an entry older than the shared one.
+
+        Returns:
+            True if the value was stored.
+        """
+        if self.redis is not None:
+            try:
+                if not self.redis.set(self._key(key), json.dumps(value), ex=self.redis_ttl, nx=True):
+                    return False
+            except redis.RedisError:
+                logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+                return False
+        return self.local.add(key, value)
+
+    async def add_async(self, key, value) -> bool:
+        """Async variant of `add`."""
+        if self.async_redis is not None:
+            try:
+                if not await self.async_redis.set(self._key(key), json.dumps(value), ex=self.redis_ttl, nx=True):
+                    return False
+            except redis.RedisError:
+                logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+                return False
+        return self.local.add(key, value)
+
+    def add_many(self, values: dict):
+        """`add` every `{key: value}`, in one pipelined round-trip to Redis."""
+        if not values:
+            return
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                self._queue_adds(pipe, values)
+                stored = pipe.execute()
+            except redis.RedisError:
+                logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+                return
+            values = {key: value for (key, value), ok in zip(values.items(), stored) if ok}
+        for key, value in values.items():
+            self.local.add(key, value)
+
+    async def add_many_async(self, values: dict):
+        """Async variant of `add_many`."""
+        if not values:
+            return
+        if self.async_redis is not None:
+            try:
+                async with self.async_redis.pipeline(transaction=False) as pipe:
+                    self._queue_adds(pipe, values)
+                    stored = await pipe.execute()
+            except redis.RedisError:
+                logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+                return
+            values = {key: value for (key, value), ok in zip(values.items(), stored) if ok}
+        for key, value in values.items():
+            self.local.add(key, value)
+
+    def _queue_adds(self, pipe, values: dict):
+        for key, value in values.items():
+            pipe.set(self._key(key), json.dumps(value), ex=self.redis_ttl, nx=True)
+
+    def delete(self, key):
+        """Remove `key` from both tiers."""
+        self.local.delete(key)
+        if self.redis is None:
+            return
+        try:
+            self.redis.delete(self._key(key))
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+
+    async def delete_async(self, key):
+        """Async variant of `delete`."""
+        self.local.delete(key)
+        if self.async_redis is None:
+            return
+        try:
+            await self.async_redis.delete(self._key(key))
+        except redis.RedisError:
+            logger.warning("Redis tier unavailable for cache %s", self.namespace, exc_info=True)
+
+    def stats(self) -> dict:
+        """Return local-tier stats plus Redis-tier hit/miss counters."""
+        return {
+            **self.local.stats(),
+            "redis_enabled": self.redis is not None,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+        }
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight wait and receive the same result (or exception). Results are
+    shared between threads, so `fn` should return plain data rather than
+    session-bound ORM objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run `fn()` for `key`, or wait for the call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of `SingleFlight` for coroutine loaders."""
+
+    def __init__(self):
+        self._calls: dict = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Await `fn()` for `key`, or the call already in flight."""
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
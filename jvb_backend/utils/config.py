@@ -1,6 +1,8 @@
 import redis
+import redis.asyncio
 import os
 from dotenv import load_dotenv
+from utils.metrics import TimedRedis, TimedAsyncRedis
 
 load_dotenv()
 
@@ -8,9 +10,186 @@ REDIS_HOST = os.getenv("REDIS_HOST", "locahost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 
-redis_client = redis.Redis(
+# Request metrics at GET /metrics and per-layer Server-Timing headers
+# (see utils/metrics.py). When enabled, the Redis clients below time
+# every command.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+RedisClient = TimedRedis if METRICS_ENABLED else redis.Redis
+AsyncRedisClient = TimedAsyncRedis if METRICS_ENABLED else redis.asyncio.Redis
+
+redis_client = RedisClient(
     host=REDIS_HOST,
     port=REDIS_PORT,
     db=REDIS_DB,
     decode_responses=True
-)
\ No newline at end of file
+)
+
+# Client returning raw bytes, for binary values such as Bloom bitmaps
+redis_bytes_client = RedisClient(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    decode_responses=False
+)
+
+# Async client used by the `async def` request path (see ASYNC_MODE)
+async_redis_client = AsyncRedisClient(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    decode_responses=True
+)
+
+# Request path: when true, main.py mounts the async routers backed by
+# AsyncSession and the asyncio Redis client instead of the sync ones.
+ASYNC_MODE = os.getenv("ASYNC_MODE", "false").lower() == "true"
+
+# Pagination
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 500))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+# Password hashing
+# Argon2 cost parameters; defaults match passlib's argon2 defaults
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+# Where hashing runs: "process" (default), "thread" or "inline"
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "process").lower()
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 1))
+# Jobs allowed to wait for a free worker before callers get a 503
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", HASH_POOL_SIZE * 4))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", 1))
+
+# Lifetime of access tokens, the only tokens that can be revoked
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+
+# Verified-token cache (per worker)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+# Upper bound on how long a verified payload is trusted without
+# re-checking Redis, in case an invalidation message is missed
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+TOKEN_INVALIDATION_CHANNEL = os.getenv("TOKEN_INVALIDATION_CHANNEL", "auth:token_invalidation")
+
+# Token revocation (time-bucketed Bloom filters, see utils/revocation.py)
+# Revoked tokens are grouped by the hour (by default) in which they expire
+REVOCATION_BUCKET_SECONDS = int(os.getenv("REVOCATION_BUCKET_SECONDS", 3600))
+# Bloom filters are sized for this many revocations per bucket at the
+# given false-positive rate; false positives only cost a Redis EXISTS
+REVOCATION_EXPECTED_PER_BUCKET = int(os.getenv("REVOCATION_EXPECTED_PER_BUCKET", 100000))
+REVOCATION_FALSE_POSITIVE_RATE = float(os.getenv("REVOCATION_FALSE_POSITIVE_RATE", 0.001))
+# How often each worker re-reads the shared filters from Redis
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", 30))
+
+# User cache (read-through, used when a request needs more than JWT claims)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+# Local entries are not invalidated across workers, so keep this short
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_REDIS = os.getenv("USER_CACHE_REDIS", "false").lower() == "true"
+USER_CACHE_REDIS_TTL_SECONDS = int(os.getenv("USER_CACHE_REDIS_TTL_SECONDS", 300))
+
+# Item cache (read-through/write-through in front of ItemRepository)
+ITEM_CACHE_ENABLED = os.getenv("ITEM_CACHE_ENABLED", "true").lower() == "true"
+ITEM_CACHE_SIZE = int(os.getenv("ITEM_CACHE_SIZE", 10000))
+# Local entries are not invalidated across workers, so keep this short
+ITEM_CACHE_TTL_SECONDS = int(os.getenv("ITEM_CACHE_TTL_SECONDS", 5))
+ITEM_CACHE_REDIS = os.getenv("ITEM_CACHE_REDIS", "false").lower() == "true"
+ITEM_CACHE_REDIS_TTL_SECONDS = int(os.getenv("ITEM_CACHE_REDIS_TTL_SECONDS", 300))
+
+# Bulk item endpoints: maximum entries per request (also caps ?ids=)
+ITEM_BULK_MAX_SIZE = int(os.getenv("ITEM_BULK_MAX_SIZE", 1000))
+
+# Bulk import/export
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_CHUNK_SIZE_MAX = int(os.getenv("IMPORT_CHUNK_SIZE_MAX", 10000))
+
+# Database engine
+# Any SQLAlchemy URL, e.g. mysql+pymysql://user:pass@db:3306/jvb_database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./users.db")
+# Async URL for ASYNC_MODE; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Seconds a checkout may wait for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle connections older than this (seconds); keep it below MySQL's wait_timeout
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Per-statement limit in ms on MySQL/PostgreSQL; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+# SQLite only: lock wait and memory-mapped I/O size
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+# Create/upgrade the schema when the app starts (see database.migrate).
+# Turn off where one process migrates first (gunicorn.conf.py does)
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
+
+# Read replicas (comma-separated SQLAlchemy URLs; empty = primary only)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Optional async URLs in the same order; derived from the sync ones when unset
+ASYNC_DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+# "round_robin" or "least_connections"
+REPLICA_STRATEGY = os.getenv("REPLICA_STRATEGY", "round_robin").lower()
+# Reads from a client go to the primary for this long after it writes
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+# Replicas lagging more than this are skipped until they catch up
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 5))
+
+# Bulk presence lookups (POST /users/status)
+PRESENCE_BATCH_MAX = int(os.getenv("PRESENCE_BATCH_MAX", 5000))
+
+# Presence push and auto-offline
+PRESENCE_CHANNEL = os.getenv("PRESENCE_CHANNEL", "presence:events")
+# Users with no heartbeat (or login) for this long are marked offline
+PRESENCE_TIMEOUT_SECONDS = float(os.getenv("PRESENCE_TIMEOUT_SECONDS", 90))
+PRESENCE_SWEEP_SECONDS = float(os.getenv("PRESENCE_SWEEP_SECONDS", 15))
+# Per-connection event buffer; a slower client is resynced with a snapshot
+PRESENCE_STREAM_QUEUE_SIZE = int(os.getenv("PRESENCE_STREAM_QUEUE_SIZE", 256))
+PRESENCE_STREAM_KEEPALIVE_SECONDS = float(os.getenv("PRESENCE_STREAM_KEEPALIVE_SECONDS", 15))
+# How long a new stream waits for the worker's Redis subscription
+PRESENCE_SUBSCRIBE_TIMEOUT_SECONDS = float(os.getenv("PRESENCE_SUBSCRIBE_TIMEOUT_SECONDS", 5))
+
+# HTTP caching of read endpoints (ETag / Last-Modified). 0 = clients must
+# revalidate every time (Cache-Control: no-cache)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 0))
+
+# Item search (GET /items/search)
+# Shorter terms match whole words only, not as prefixes
+SEARCH_MIN_PREFIX_LENGTH = int(os.getenv("SEARCH_MIN_PREFIX_LENGTH", 2))
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", 8))
+# Matches ranked per query (the newest ones); also the paging limit.
+# Query cost grows with it on SQLite
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 200))
+
+# Rate limits (see utils/rate_limit.py): comma-separated scope:limit/seconds
+# rules per route, scope being "ip" or "username"
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "ip:20/60,username:5/60")
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "ip:10/3600")
+# Keys over their limit remembered per worker and rejected without Redis
+RATE_LIMIT_LOCAL_SIZE = int(os.getenv("RATE_LIMIT_LOCAL_SIZE", 10000))
+
+# Slow-query log and per-request detection of repeated statements (N+1)
+# and duplicate reads (see utils/query_log.py)
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() == "true"
+# Statements taking at least this long are logged; 0 logs every statement
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+# Executions of one statement in a request that flag an N+1 pattern
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 10))
+# Slow queries and findings kept for /metrics/queries
+QUERY_LOG_SIZE = int(os.getenv("QUERY_LOG_SIZE", 100))
+
+# Request profiling (see utils/profiling.py). Requests sending
+# "X-Profile: <PROFILING_TOKEN>" are profiled (never while the token is
+# empty), plus this fraction of all requests
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+# "sample" (collapsed stacks for flame graphs) or "cprofile" (pstats)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample").lower()
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
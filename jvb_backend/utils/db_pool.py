@@ -0,0 +1,111 @@
+"""Connection pool instrumentation.
+
+SQLAlchemy's pools do not report how long a checkout waited for a free
+connection, so pool exhaustion only shows up as slow requests (or a
+`TimeoutError` after `DB_POOL_TIMEOUT`). `instrumented_pool_class` wraps
+a pool class so every `connect()` is timed into a `PoolMetrics`, and
+`pool_stats` combines those timings with the pool's own counters.
+
+Design notes:
+ - The wrapper is a generated subclass rather than pool events because
+   no event fires *before* a checkout starts waiting. The subclass is
+   also what `Pool.recreate()` (engine.dispose) instantiates, so metrics
+   survive pool recycling.
+ - Measured wait includes pre-ping and opening new connections, i.e. the
+   full latency a request pays before its first statement.
+ - Works for the async engine as well: `AsyncAdaptedQueuePool.connect()`
+   runs inside SQLAlchemy's greenlet bridge, so wall time still covers
+   the awaited wait.
+"""
+
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class PoolMetrics:
+    """Checkout counters for one engine's pool.
+
+    Args:
+        capacity: `pool_size + max_overflow`, or None for unbounded pools.
+    """
+
+    def __init__(self, capacity: int | None):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # Guarded by `_lock`
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def observe(self, connect):
+        """Call `connect()` and record how long it took."""
+        with self._lock:
+            self._waiting += 1
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._lock:
+                self._waiting -= 1
+                if timed_out:
+                    self._timeouts += 1
+                else:
+                    self._checkouts += 1
+                    self._wait_seconds_total += waited
+                    self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    def snapshot(self) -> dict:
+        """Return checkout counters and wait times."""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (self._wait_seconds_total / checkouts * 1000) if checkouts else 0.0,
+                "max_wait_ms": self._wait_seconds_max * 1000,
+            }
+
+
+def instrumented_pool_class(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    """Return a subclass of `base` whose `connect()` reports to `metrics`.
+
+    Pass the result as `poolclass=` to `create_engine` /
+    `create_async_engine`.
+    """
+
+    class InstrumentedPool(base):
+        def connect(self):
+            return metrics.observe(super().connect)
+
+    InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def pool_stats(pool: Pool, metrics: PoolMetrics) -> dict:
+    """Combine a pool's occupancy with its checkout metrics.
+
+    `saturation` is checked-out connections over capacity; at 1.0 new
+    checkouts queue (and `waiting` / `avg_wait_ms` start to climb).
+    """
+    stats = {"pool": type(pool).__name__, "capacity": metrics.capacity}
+    if isinstance(pool, QueuePool):
+        checked_out = pool.checkedout()
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=checked_out,
+            overflow=max(0, pool.overflow()),
+            saturation=round(checked_out / metrics.capacity, 3) if metrics.capacity else None,
+        )
+    stats.update(metrics.snapshot())
+    return stats
@@ -0,0 +1,271 @@
+"""Read-replica routing.
+
+Read-only endpoints take their session from `database.get_read_db`,
+which asks `ReplicaRouter` for a replica; writes keep using the primary
+through `get_db`. Three rules decide where a read goes:
+
+ - read-your-writes: a client that wrote within the last
+   `REPLICA_STICKY_SECONDS` reads from the primary. The window is
+   carried in a cookie set by `ReadYourWritesMiddleware` on every
+   successful non-GET request, so it holds across workers and hosts.
+ - lag: `ReplicaMonitor` measures each replica's replication lag every
+   `REPLICA_LAG_CHECK_SECONDS`; replicas over `REPLICA_MAX_LAG_SECONDS`
+   (or whose lag can't be measured) are skipped until they catch up.
+ - strategy: among healthy replicas, round-robin or least-connections
+   (fewest checked-out pool connections). With none healthy, reads fall
+   back to the primary.
+
+Design notes:
+ - Lag comes from the server's own view: `Seconds_Behind_Source` on
+   MySQL, last replay timestamp on PostgreSQL. SQLite files used as
+   local stand-ins always report 0; `ReplicaRouter.record_lag` lets
+   tests simulate lag.
+ - Cached reads (item and user caches) may still serve a value loaded
+   from a replica for up to the cache TTL after it was loaded; the
+   staleness bound is lag plus TTL.
+"""
+
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Mapping
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+from utils.db_pool import PoolMetrics, pool_stats
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+STRATEGIES = ("round_robin", "least_connections")
+
+
+def replication_lag(connection: Connection) -> float | None:
+    """Return the replica's lag in seconds, or None if replication is stopped."""
+    backend = connection.dialect.name
+    if backend == "mysql":
+        row = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+        if row is None:
+            return None
+        lag = row.get("Seconds_Behind_Source")
+        return None if lag is None else float(lag)
+    if backend == "postgresql":
+        lag = connection.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )).scalar()
+        return None if lag is None else float(lag)
+    # SQLite stand-ins (and unknown backends) have no replication to measure
+    return 0.0
+
+
+class Replica:
+    """One read replica with its sync and async engines.
+
+    Attributes:
+        name: URL with the password hidden, for metrics and logs.
+        lag: Last measured lag in seconds (None if unmeasurable).
+        healthy: Whether the replica is in rotation.
+        reads: Sessions handed out for this replica.
+    """
+
+    def __init__(self, name: str, engine: Engine, async_engine: AsyncEngine,
+                 pool_metrics: PoolMetrics, async_pool_metrics: PoolMetrics):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.pool_metrics = pool_metrics
+        self.async_pool_metrics = async_pool_metrics
+        self.lag: float | None = 0.0
+        self.healthy = True
+        self.reads = 0
+        self.checked_at: float | None = None
+
+    def connections_in_use(self, use_async: bool) -> int:
+        """Checked-out connections on the engine the caller will use."""
+        pool = (self.async_engine if use_async else self.engine).pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "checked_at": self.checked_at,
+            "reads": self.reads,
+            "pool": pool_stats(self.engine.pool, self.pool_metrics),
+            "async_pool": pool_stats(self.async_engine.pool, self.async_pool_metrics),
+        }
+
+
+def is_sticky(cookies: Mapping[str, str]) -> bool:
+    """True while the client's read-your-writes window is still open.
+
+    The expiry is checked server-side as well, so clients that ignore
+    cookie `Max-Age` do not stay pinned to the primary.
+    """
+    value = cookies.get(STICKY_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    """Pick the replica (or the primary) that serves a read.
+
+    Args:
+        replicas: Configured replicas; empty means every read uses the primary.
+        strategy: "round_robin" or "least_connections".
+        max_lag: Seconds of lag above which a replica leaves rotation.
+    """
+
+    def __init__(self, replicas: list[Replica], strategy: str, max_lag: float):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown replica strategy: {strategy!r}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        # Guarded by `_lock`
+        self._sticky_reads = 0
+        self._fallback_reads = 0
+
+    def route(self, cookies: Mapping[str, str], use_async: bool = False) -> Replica | None:
+        """Return the replica for a read, or None to use the primary.
+
+        Args:
+            cookies: Request cookies (checked for the sticky window).
+            use_async: Whether the caller will use the async engine
+                       (matters for least-connections).
+        """
+        if not self.replicas:
+            return None
+        if is_sticky(cookies):
+            with self._lock:
+                self._sticky_reads += 1
+            return None
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if not candidates:
+            with self._lock:
+                self._fallback_reads += 1
+            return None
+        start = next(self._counter) % len(candidates)
+        if self.strategy == "least_connections":
+            # Rotate first so ties (e.g. all idle) still spread round-robin
+            rotated = candidates[start:] + candidates[:start]
+            replica = min(rotated, key=lambda r: r.connections_in_use(use_async))
+        else:
+            replica = candidates[start]
+        with self._lock:
+            replica.reads += 1
+        return replica
+
+    def record_lag(self, replica: Replica, lag: float | None):
+        """Store a lag measurement and update the replica's rotation state."""
+        was_healthy = replica.healthy
+        replica.lag = lag
+        replica.checked_at = time.time()
+        replica.healthy = lag is not None and lag <= self.max_lag
+        if was_healthy and not replica.healthy:
+            logger.warning("Replica %s out of rotation (lag=%s)", replica.name, lag)
+        elif replica.healthy and not was_healthy:
+            logger.info("Replica %s back in rotation (lag=%s)", replica.name, lag)
+
+    def check_lag(self):
+        """Measure every replica's lag; unreachable replicas count as lagging."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = replication_lag(connection)
+            except Exception:
+                logger.warning("Lag check failed for replica %s", replica.name, exc_info=True)
+                lag = None
+            self.record_lag(replica, lag)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "max_lag_seconds": self.max_lag,
+                "sticky_reads": self._sticky_reads,
+                "fallback_reads": self._fallback_reads,
+                "replicas": [replica.stats() for replica in self.replicas],
+            }
+
+
+class ReplicaMonitor:
+    """Background thread running `ReplicaRouter.check_lag` periodically.
+
+    Args:
+        router: Router whose replicas are checked.
+        interval: Seconds between checks.
+    """
+
+    def __init__(self, router: ReplicaRouter, interval: float):
+        self.router = router
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Check once synchronously, then keep checking in the background."""
+        if self._thread is not None or not self.router.replicas:
+            return
+        self.router.check_lag()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signal the monitor thread to exit and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.router.check_lag()
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware opening the sticky-primary window after writes.
+
+    Any successful (status < 400) request with a non-safe method gets a
+    `db_primary_until` cookie holding the window's expiry timestamp.
+    Written as plain ASGI rather than `BaseHTTPMiddleware` so streaming
+    responses are not buffered.
+
+    Args:
+        app: Wrapped ASGI application.
+        sticky_seconds: Length of the read-your-writes window.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.sticky_seconds
+                cookie = (
+                    f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,247 @@
+"""Bounded executor for CPU-bound password hashing.
+
+Argon2 hashing and verification take tens of milliseconds of pure CPU
+and hold the GIL while they run, so doing them on the request thread
+starves every other endpoint on the worker. `HashExecutor` moves that
+work to a pool (a process pool by default) and bounds how much work may
+be outstanding at once.
+
+Backpressure: at most `pool_size + queue_size` jobs may be in flight.
+When that budget is exhausted, `submit` fails immediately with a 503
+and a `Retry-After` header rather than letting requests pile up behind
+a growing queue.
+
+Run times (queueing excluded) feed `password_hash_duration_seconds` at
+/metrics; the caller's whole wait is the `hash` entry of its request's
+`Server-Timing` header (see `utils.metrics`).
+
+The pool itself is created lazily on first use so that importing this
+module does not fork processes (and so pre-forking servers create the
+pool in each worker, not in the master). A process pool whose child
+died (OOM kill, segfault) is broken for good: the jobs it held fail with
+a 503 and the next job starts a new pool.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from utils.metrics import add_request_time, password_hash_duration
+from utils.config import (
+    HASH_EXECUTOR,
+    HASH_POOL_SIZE,
+    HASH_QUEUE_SIZE,
+    HASH_RETRY_AFTER_SECONDS,
+)
+
+
+def _timed_call(fn, *args):
+    """Run `fn(*args)` and return `(result, seconds)`.
+
+    Executed inside the pool worker so the measured time excludes queueing.
+    Must stay a module-level function so it can be pickled for processes.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _unavailable(detail: str, retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class HashExecutor:
+    """Pool wrapper with a hard cap on outstanding jobs and basic metrics.
+
+    Args:
+        kind: "process", "thread" or "inline" (run on the caller's thread).
+        pool_size: Number of pool workers.
+        queue_size: Jobs allowed to wait for a worker beyond `pool_size`.
+        retry_after: Seconds advertised in `Retry-After` when saturated.
+    """
+
+    def __init__(self, kind: str, pool_size: int, queue_size: int, retry_after: int):
+        if kind not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown hash executor kind: {kind!r}")
+        self.kind = kind
+        self.pool_size = max(1, pool_size)
+        self.capacity = self.pool_size + max(0, queue_size)
+        self.retry_after = retry_after
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        # Metrics; guarded by `_lock`
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._pool_restarts = 0
+        self._run_seconds_total = 0.0
+        self._wait_seconds_total = 0.0
+        self._run_seconds_max = 0.0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    self._pool = ProcessPoolExecutor(max_workers=self.pool_size)
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.pool_size, thread_name_prefix="hash"
+                    )
+            return self._pool
+
+    def _discard(self, pool):
+        """Drop a broken `pool` so that the next job creates a new one."""
+        with self._lock:
+            if pool is None or self._pool is not pool:
+                return
+            self._pool = None
+            self._pool_restarts += 1
+        pool.shutdown(wait=False)
+
+    def _broken(self) -> HTTPException:
+        return _unavailable("Password hashing is temporarily unavailable, please retry", self.retry_after)
+
+    def submit(self, fn, *args, block: bool = False) -> Future:
+        """Schedule `fn(*args)` on the pool.
+
+        Args:
+            fn: Module-level callable (must be picklable for processes).
+            *args: Arguments for `fn`.
+            block: Wait for a free slot instead of failing fast. Meant for
+                   batch jobs (imports), never for request handlers.
+
+        Raises:
+            HTTPException: 503 with `Retry-After` when the executor is
+                            saturated and `block` is False, or when the
+                            pool broke (also raised by the returned
+                            future for jobs the pool lost).
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._rejected += 1
+            raise _unavailable("Server is busy, please retry", self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+        submitted_at = time.perf_counter()
+        # "_hash" -> "hash", the label in password_hash_duration_seconds
+        operation = fn.__name__.lstrip("_")
+
+        pool = None
+        if self.kind == "inline":
+            future = Future()
+            try:
+                future.set_result(_timed_call(fn, *args))
+            except BaseException as exc:
+                future.set_exception(exc)
+        else:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_timed_call, fn, *args)
+            except BrokenExecutor:
+                self._release(None, submitted_at, operation)
+                self._discard(pool)
+                raise self._broken()
+            except BaseException:
+                self._release(None, submitted_at, operation)
+                raise
+
+        result_future = Future()
+
+        def _done(f):
+            try:
+                result, run_seconds = f.result()
+            except BrokenExecutor:
+                self._release(None, submitted_at, operation)
+                self._discard(pool)
+                result_future.set_exception(self._broken())
+            except BaseException as exc:
+                self._release(None, submitted_at, operation)
+                result_future.set_exception(exc)
+            else:
+                self._release(run_seconds, submitted_at, operation)
+                result_future.set_result(result)
+
+        future.add_done_callback(_done)
+        return result_future
+
+    def _release(self, run_seconds: float | None, submitted_at: float, operation: str):
+        elapsed = time.perf_counter() - submitted_at
+        if run_seconds is not None:
+            password_hash_duration.observe((operation,), run_seconds)
+        with self._lock:
+            self._in_flight -= 1
+            if run_seconds is not None:
+                self._completed += 1
+                self._run_seconds_total += run_seconds
+                self._wait_seconds_total += max(0.0, elapsed - run_seconds)
+                self._run_seconds_max = max(self._run_seconds_max, run_seconds)
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Submit `fn(*args)` and block until it finishes.
+
+        The wait, queueing included, counts as the request's `hash` time
+        in `Server-Timing`.
+        """
+        started = time.perf_counter()
+        try:
+            return self.submit(fn, *args).result()
+        finally:
+            add_request_time("hash", time.perf_counter() - started)
+
+    def map(self, fn, iterable) -> list:
+        """Run `fn` over `iterable` in parallel, waiting for free slots.
+
+        Results are returned in input order. Blocks rather than raising
+        503, so use it from batch jobs only.
+        """
+        futures = [self.submit(fn, arg, block=True) for arg in iterable]
+        return [future.result() for future in futures]
+
+    async def run_async(self, fn, *args):
+        """Submit `fn(*args)` and await it without blocking the event loop."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self.submit(fn, *args))
+        finally:
+            add_request_time("hash", time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Return a snapshot of queue depth and latency counters."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "executor": self.kind,
+                "pool_size": self.pool_size,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.pool_size),
+                "completed": completed,
+                "rejected": self._rejected,
+                "pool_restarts": self._pool_restarts,
+                "avg_run_ms": (self._run_seconds_total / completed * 1000) if completed else 0.0,
+                "avg_wait_ms": (self._wait_seconds_total / completed * 1000) if completed else 0.0,
+                "max_run_ms": self._run_seconds_max * 1000,
+            }
+
+    def shutdown(self):
+        """Stop the pool, waiting for running jobs to finish."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+hash_executor = HashExecutor(
+    kind=HASH_EXECUTOR,
+    pool_size=HASH_POOL_SIZE,
+    queue_size=HASH_QUEUE_SIZE,
+    retry_after=HASH_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,146 @@
+"""HTTP validators and conditional GET for read endpoints.
+
+Read routes attach a strong `ETag`, `Last-Modified` and `Cache-Control`
+to their responses and answer `If-None-Match` / `If-Modified-Since`
+with an empty 304, skipping serialization entirely:
+
+ - single rows (`GET /items/{id}`) are validated by their `updated_at`,
+   so the validator always matches the body it was computed from;
+ - lists (`GET /items/`, `GET /users/all`) by the table's version
+   counter (see `utils.table_versions`) plus the query string. The
+   version is read *before* the query, so a 304 needs no database work
+   and a body is never older than its ETag.
+
+Design notes:
+ - Per RFC 9110, `If-None-Match` wins over `If-Modified-Since`; ETags
+   are compared weakly (a `W/` prefix from an intermediary still matches).
+ - `Cache-Control` is `private` (responses may contain user data) and
+   `no-cache` unless `HTTP_CACHE_MAX_AGE` allows clients to reuse a
+   response without revalidating.
+ - List routes read from the primary even when replicas are configured:
+   a lagging replica could return a body older than the version in its
+   ETag, and clients would keep getting 304 for stale data until the
+   next write. Polling traffic is mostly 304s, which touch no database.
+ - When Redis is unreachable, lists are served without validators
+   rather than failing.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from utils.config import HTTP_CACHE_MAX_AGE
+from utils.table_versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = f"private, max-age={HTTP_CACHE_MAX_AGE}" if HTTP_CACHE_MAX_AGE > 0 else "private, no-cache"
+
+
+@dataclass(frozen=True)
+class Validators:
+    """Validators of one representation.
+
+    Fields:
+        etag: Quoted strong entity tag.
+        last_modified: Naive UTC time of the last change.
+    """
+
+    etag: str
+    last_modified: datetime
+
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+            "Cache-Control": CACHE_CONTROL,
+        }
+
+
+def row_validators(kind: str, row) -> Validators | None:
+    """Validators of a single row with `id` and `updated_at`.
+
+    Returns None for rows without `updated_at` (e.g. item snapshots
+    cached before the column existed).
+    """
+    updated_at = getattr(row, "updated_at", None)
+    if updated_at is None:
+        return None
+    micros = round(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+    return Validators(f'"{kind}-{row.id}-{micros}"', updated_at)
+
+
+def _list_validators(table: str, version: int, request: Request) -> Validators:
+    query = hashlib.sha1(request.url.query.encode()).hexdigest()[:16]
+    last_modified = datetime.fromtimestamp(version / 1_000_000, timezone.utc).replace(tzinfo=None)
+    return Validators(f'"{table}-{version}-{query}"', last_modified)
+
+
+def list_validators(table: str, request: Request) -> Validators | None:
+    """Validators of a listing of `table`, from its version counter."""
+    try:
+        return _list_validators(table, table_versions.get(table), request)
+    except Exception:
+        logger.warning("Table version lookup failed for %s", table, exc_info=True)
+        return None
+
+
+async def list_validators_async(table: str, request: Request) -> Validators | None:
+    """Async variant of `list_validators`."""
+    try:
+        return _list_validators(table, await table_versions.get_async(table), request)
+    except Exception:
+        logger.warning("Table version lookup failed for %s", table, exc_info=True)
+        return None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, validators: Validators | None) -> bool:
+    """True if the client's cached copy (per its conditional headers) is current."""
+    if validators is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have whole-second resolution
+    modified = validators.last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return modified <= since
+
+
+def not_modified(validators: Validators) -> Response:
+    """An empty 304 carrying the validators."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers())
+
+
+def conditional(request: Request, response: Response, validators: Validators | None, body):
+    """Return a 304 if the client's copy is current, else `body` with validators set.
+
+    Args:
+        request: Incoming request (conditional headers).
+        response: The route's injected `Response`, whose headers FastAPI
+                  merges into the serialized body.
+        validators: Validators of `body`, or None to skip caching.
+        body: What the route would return.
+    """
+    if validators is None:
+        return body
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    response.headers.update(validators.headers())
+    return body
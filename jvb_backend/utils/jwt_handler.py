@@ -2,16 +2,19 @@
 
 Small utilities to create and validate access/refresh tokens used by the
 authentication layer. Tokens are encoded with a project secret and a
-configurable algorithm and lifetime. Some functions interact with Redis
-to support token blacklisting and presence information.
+configurable algorithm and lifetime. Every token carries a random `jti`
+claim that identifies it for revocation (see `utils.revocation`).
 """
 
 import os
-import datetime
+import uuid
 from dotenv import load_dotenv
 import time
 import jwt
-from utils.config import redis_client
+from utils.config import redis_client, async_redis_client, ACCESS_TOKEN_EXPIRE_MINUTES
+from utils.metrics import traced
+from utils.revocation import revocation_store, token_id
+from utils.token_cache import REVOKED, token_cache, token_digest
 from fastapi import HTTPException, status
 
 load_dotenv()
@@ -19,7 +22,6 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
 
@@ -31,14 +33,15 @@ def create_access_token(user_id: str, username: str) -> str:
         username: Username to include in the token payload.
 
     Returns:
-        Encoded JWT as a string. The token includes `iat` and `exp` claims
-        based on `ACCESS_TOKEN_EXPIRE_MINUTES`.
+        Encoded JWT as a string. The token includes `iat`, `exp` (based on
+        `ACCESS_TOKEN_EXPIRE_MINUTES`) and a unique `jti` claim.
     """
     payload = {
         "sub": str(user_id),
         "username": username,
         "exp": int(time.time()) + ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         "iat": int(time.time()),
+        "jti": uuid.uuid4().hex,
     }
 
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
@@ -53,24 +56,29 @@ def create_refresh_token(user_id: str, username: str) -> str:
 
     Returns:
         Encoded refresh token string with a longer expiration based on
-        `REFRESH_TOKEN_EXPIRE_DAYS`.
+        `REFRESH_TOKEN_EXPIRE_DAYS` and a unique `jti` claim.
     """
     payload = {
         "sub": str(user_id),
         "username": username,
         "exp": int(time.time()) + REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
         "iat": int(time.time()),
+        "jti": uuid.uuid4().hex,
     }
 
     return jwt.encode(payload, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
 
 
+@traced("jwt_handler.decode_token")
 def decode_token(token: str) -> str:
     """Decode and validate an access token.
 
-    Performs a Redis blacklist check before decoding. Raises `HTTPException`
-    with 401 status for revoked, expired, or invalid tokens so callers can
-    return appropriate HTTP responses.
+    Serves previously verified tokens from the per-worker token cache.
+    On a miss, verifies the signature, checks the token's `jti` against
+    the revocation store (a local Bloom filter; Redis is only consulted
+    on a filter hit) and caches the payload until the token's `exp`.
+    Raises `HTTPException` with 401 status for revoked, expired, or
+    invalid tokens so callers can return appropriate HTTP responses.
 
     Args:
         token: Encoded JWT access token.
@@ -81,14 +89,77 @@ def decode_token(token: str) -> str:
     Raises:
         HTTPException: 401 for revoked/expired/invalid tokens.
     """
+    digest = token_digest(token)
+    cached = _get_cached_payload(digest)
+    if cached is not None:
+        return cached
+
+    payload = _verify_access_token(token)
+    if revocation_store.is_revoked(token_id(token, payload), payload["exp"]) or _legacy_blacklisted(token, payload):
+        token_cache.set(digest, REVOKED)
+        raise _revoked_token_error()
+    return _cache_payload(digest, payload)
+
+
+@traced("jwt_handler.decode_token_async")
+async def decode_token_async(token: str) -> dict:
+    """Async variant of `decode_token` for the `async def` request path.
+
+    Bloom-filter hits are confirmed through the asyncio Redis client so
+    the event loop is not blocked on the round-trip.
+
+    Raises:
+        HTTPException: 401 for revoked/expired/invalid tokens.
+    """
+    digest = token_digest(token)
+    cached = _get_cached_payload(digest)
+    if cached is not None:
+        return cached
+
+    payload = _verify_access_token(token)
+    revoked = await revocation_store.is_revoked_async(token_id(token, payload), payload["exp"])
+    if not revoked and "jti" not in payload:
+        revoked = bool(await async_redis_client.exists(f"blacklist:{token}"))
+    if revoked:
+        token_cache.set(digest, REVOKED)
+        raise _revoked_token_error()
+    return _cache_payload(digest, payload)
+
+
+def _legacy_blacklisted(token: str, payload: dict) -> bool:
+    # Tokens issued before `jti` existed may have been revoked under the
+    # old `blacklist:{token}` scheme; they age out within one token lifetime.
+    return "jti" not in payload and bool(redis_client.exists(f"blacklist:{token}"))
+
+
+def _get_cached_payload(digest: str) -> dict | None:
+    cached = token_cache.get(digest)
+    if cached is REVOKED:
+        raise _revoked_token_error()
+    return cached
+
+
+def _cache_payload(digest: str, payload: dict) -> dict:
+    # `add` never overwrites a REVOKED marker set by a concurrent logout
+    token_cache.add(digest, payload, expires_at=payload.get("exp"))
+    return payload
+
+
+def _revoked_token_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _verify_access_token(token: str) -> dict:
+    """Verify the signature and expiry of an access token.
+
+    Raises:
+        HTTPException: 401 for expired or invalid tokens.
+    """
     try:
-        # Check whether the token has been blacklisted in Redis
-        if redis_client.get(f"blacklist:{token}"):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has been revoked",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
         decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return decoded
     except jwt.ExpiredSignatureError:
@@ -108,7 +179,8 @@ def decode_token(token: str) -> str:
 def decode_refresh_token(token: str) -> dict:
     """Decode and validate a refresh token.
 
-    Validates the token signature and expiration. Returns the payload
+    Validates the token signature (against `REFRESH_SECRET_KEY`, the key
+    refresh tokens are signed with) and expiration. Returns the payload
     dict when valid or raises `HTTPException(401)` when invalid or
     expired.
 
@@ -122,14 +194,8 @@ def decode_refresh_token(token: str) -> dict:
         HTTPException: 401 when the refresh token is expired or invalid.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        exp = payload.get("exp")
-        if exp and datetime.utcfromtimestamp(exp) < datetime.utcnow():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Refresh token expired",
-            )
-        return payload
+        # jwt.decode rejects an expired `exp` itself
+        return jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
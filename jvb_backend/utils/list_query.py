@@ -0,0 +1,235 @@
+"""Filtering, ordering and sparse fieldsets for list endpoints.
+
+`GET /items/` and `GET /users/all` accept, besides `cursor` and `limit`:
+
+ - `fields=id,name`: return only these fields of each row;
+ - `sort=name` / `sort=-name`: order by a response field, descending
+   with `-`; ties on non-unique fields are broken by id in the same
+   direction;
+ - `min_id` / `max_id`: inclusive id range;
+ - equality filters on text columns (`name=`; `username=`, `email=`);
+ - a prefix filter on the main text column (`name_prefix=`;
+   `username_prefix=`).
+
+A `ListSpec` says what a resource allows; `parse_list_query` validates
+the parameters against it into a `ListQuery`, which compiles into one
+core `SELECT` and shapes the result page. Streaming (`stream=true`)
+walks the same query batch by batch (`after_row`), so it honours the
+filters, sort, fields and cursor too; multi-get (`ids=`) ignores them.
+
+Design notes:
+ - Only columns are selected, never entities: id, the sort column and
+   the requested fields. Password hashes are never read for the user
+   listing, and the composite indexes on the text columns cover the
+   query, so SQLite and InnoDB answer filtered and sorted listings from
+   the index alone.
+ - Prefixes are matched as a range (`name >= 'gre' AND name < 'grf'`)
+   rather than `LIKE 'gre%'`: SQLite only uses an index for LIKE with
+   `case_sensitive_like`, a range uses it on every backend. Matching
+   follows the column's collation: case-sensitive on SQLite,
+   case-insensitive with MySQL's default collations.
+ - Paging stays keyset: with `sort=name` the cursor holds the last
+   `(name, id)` and the next page seeks past it, spelled out as
+   `name > :name OR (name = :name AND id > :id)`, which every backend
+   can turn into an index range. Unique fields are sorted and sought
+   on alone: SQLite otherwise prefers the unique constraint's index,
+   which satisfies `ORDER BY username, id` but does not cover `email`.
+   A cursor only continues the sort it was issued for.
+"""
+
+import operator
+from dataclasses import dataclass, field, replace
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, or_, select
+from utils.pagination import decode_keyset_cursor, encode_keyset_cursor
+
+
+@dataclass(frozen=True)
+class ListSpec:
+    """What a list endpoint allows.
+
+    Fields:
+        model: ORM model listed.
+        fields: Response fields in output order; each can be requested
+                with `fields=` and sorted on.
+        filters: Fields filterable by equality.
+        prefix_field: Field matched by the prefix filter.
+        unique: Fields with a unique constraint (no id tiebreaker).
+    """
+
+    model: type
+    fields: tuple[str, ...]
+    filters: tuple[str, ...]
+    prefix_field: str
+    unique: tuple[str, ...] = ("id",)
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    """A validated listing request; the defaults list everything by id.
+
+    Fields:
+        spec: The endpoint's `ListSpec`.
+        fields: Requested fields, or None for all (not sparse).
+        sort: Field ordered by.
+        descending: Whether the order is descending.
+        filters: Equality filters, field -> value.
+        min_id: Inclusive lower id bound.
+        max_id: Inclusive upper id bound.
+        prefix: Required prefix of `spec.prefix_field`.
+        after: `(sort value, id)` of the last row of the previous page.
+    """
+
+    spec: ListSpec
+    fields: tuple[str, ...] | None = None
+    sort: str = "id"
+    descending: bool = False
+    filters: dict = field(default_factory=dict)
+    min_id: int | None = None
+    max_id: int | None = None
+    prefix: str | None = None
+    after: tuple[object, int] | None = None
+
+    @property
+    def sparse(self) -> bool:
+        """Whether only some fields were requested."""
+        return self.fields is not None
+
+    @property
+    def sort_token(self) -> str:
+        return f"-{self.sort}" if self.descending else self.sort
+
+    def statement(self, limit: int) -> Select:
+        """The `SELECT` of the needed columns for one (over-fetched) page."""
+        model = self.spec.model
+        columns = dict.fromkeys(("id", self.sort, *(self.fields or self.spec.fields)))
+        stmt = select(*(getattr(model, name) for name in columns))
+        for name, value in self.filters.items():
+            stmt = stmt.where(getattr(model, name) == value)
+        if self.min_id is not None:
+            stmt = stmt.where(model.id >= self.min_id)
+        if self.max_id is not None:
+            stmt = stmt.where(model.id <= self.max_id)
+        if self.prefix:
+            column = getattr(model, self.spec.prefix_field)
+            stmt = stmt.where(column >= self.prefix)
+            upper = _prefix_upper_bound(self.prefix)
+            if upper is not None:
+                stmt = stmt.where(column < upper)
+
+        sort_column = getattr(model, self.sort)
+        tiebreak = self.sort not in self.spec.unique
+        past = operator.lt if self.descending else operator.gt
+        if self.after is not None:
+            value, last_id = self.after
+            if self.sort == "id":
+                seek = past(model.id, last_id)
+            elif tiebreak:
+                seek = or_(past(sort_column, value), and_(sort_column == value, past(model.id, last_id)))
+            else:
+                seek = past(sort_column, value)
+            stmt = stmt.where(seek)
+        order = [sort_column]
+        if tiebreak:
+            order.append(model.id)
+        if self.descending:
+            order = [column.desc() for column in order]
+        return stmt.order_by(*order).limit(limit)
+
+    def after_row(self, row) -> "ListQuery":
+        """The same query, continuing after `row` (the next keyset batch)."""
+        value = getattr(row, self.sort) if self.sort != "id" else None
+        return replace(self, after=(value, row.id))
+
+    def record(self, row) -> dict:
+        """The requested fields of `row` (all of them unless sparse)."""
+        return {name: getattr(row, name) for name in self.fields or self.spec.fields}
+
+    def page(self, rows: list, limit: int) -> dict:
+        """Trim over-fetched `rows` into a page and its next cursor.
+
+        Returns:
+            Dict with `items` (the rows, or for sparse queries dicts of
+            the requested fields) and `next_cursor`.
+        """
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            value = getattr(last, self.sort) if self.sort != "id" else None
+            next_cursor = encode_keyset_cursor(self.sort_token, last.id, value)
+        if self.sparse:
+            rows = [self.record(row) for row in rows]
+        return {"items": rows, "next_cursor": next_cursor}
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with `prefix`."""
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        return None
+    # The next code point after U+D7FF that is not a (lone) surrogate
+    following = 0xE000 if last == 0xD7FF else last + 1
+    return prefix[:-1] + chr(following)
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def parse_list_query(
+    spec: ListSpec,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "id",
+    min_id: int | None = None,
+    max_id: int | None = None,
+    prefix: str | None = None,
+    filters: dict | None = None,
+) -> ListQuery:
+    """Validate list query parameters against `spec`.
+
+    Args:
+        spec: The endpoint's `ListSpec`.
+        cursor: Cursor from a previous page of the same sort.
+        fields: Comma-separated fields, or None for all.
+        sort: Field to order by, prefixed with `-` for descending.
+        min_id: Inclusive lower id bound.
+        max_id: Inclusive upper id bound.
+        prefix: Required prefix of `spec.prefix_field`.
+        filters: Equality filters; None values are ignored.
+
+    Raises:
+        HTTPException: 400 for unknown fields, sorts or filters, or a
+                       cursor issued for another sort.
+    """
+    requested = None
+    if fields is not None:
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - set(spec.fields)
+        if not names or unknown:
+            raise _bad_request(f"fields must be a comma-separated subset of: {', '.join(spec.fields)}")
+        requested = tuple(name for name in spec.fields if name in names)
+
+    descending = sort.startswith("-")
+    sort_field = sort.removeprefix("-")
+    if sort_field not in spec.fields:
+        raise _bad_request(f"sort must be one of: {', '.join(spec.fields)} (prefix with - for descending)")
+
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    unknown = set(filters) - set(spec.filters)
+    if unknown:
+        raise _bad_request(f"Cannot filter on: {', '.join(sorted(unknown))}")
+
+    return ListQuery(
+        spec=spec,
+        fields=requested,
+        sort=sort_field,
+        descending=descending,
+        filters=filters,
+        min_id=min_id,
+        max_id=max_id,
+        prefix=prefix or None,
+        after=decode_keyset_cursor(cursor, sort),
+    )
@@ -0,0 +1,409 @@
+"""Request metrics in Prometheus format, and per-layer request timing.
+
+`GET /metrics` exposes, per worker:
+
+ - `http_request_duration_seconds{method, route, status}`: wall time of
+   each request, labelled by route template (`/items/{item_id}`), not
+   the raw path;
+ - `db_query_duration_seconds{operation}`: time of each SQL statement,
+   from SQLAlchemy's cursor events, attributed to the repository method
+   (or traced service function) that issued it;
+ - `redis_command_duration_seconds{operation, command}`: time of each
+   Redis round-trip (a command, a script call or a whole pipeline),
+   attributed the same way;
+ - `password_hash_duration_seconds{operation}`: Argon2 hash/verify time
+   in the hash pool, excluding queueing;
+ - the pool, cache and limiter counters from the `/metrics/*` JSON
+   endpoints, as gauges.
+
+Each response also carries a `Server-Timing` header with the request's
+time in each layer so far, e.g. `db;dur=1.84, redis;dur=0.31,
+hash;dur=41.2, app;dur=45.7` (milliseconds; `app` is the whole request
+up to the response headers). Browser dev tools and most load-testing
+tools display it.
+
+Attribution: `traced` marks a function, and `traced_methods` every
+public method of a repository class, as an operation. The innermost
+operation running when a statement executes or a Redis command is sent
+is its label; work outside any operation is labelled "unattributed".
+
+Design notes:
+ - Hand-rolled rather than `prometheus_client`: the handful of metric
+   types needed fit in this module, and a locked list of bucket counts
+   per label set costs about a microsecond per observation.
+ - Metrics are per worker process. Scrape each worker (or run one
+   worker per container); counters restart with the worker.
+ - The current operation and the request's timings live in contextvars,
+   which follow the request into threadpool threads and into
+   SQLAlchemy's async greenlets, so the same hooks serve both request
+   paths. Generators (streaming) set the operation only while they run.
+ - Redis clients are subclasses timing `execute_command` and pipeline
+   `execute`; pub/sub connections are not timed (they block by design).
+ - `Server-Timing` is written with the response headers, so work done
+   while streaming a body is in the histograms but not in the header.
+ - `traced` is also where request profiling (`utils.profiling`) learns
+   which threadpool threads run a profiled request, and the statement
+   hooks feed the slow-query log (`utils.query_log`) through
+   `statement_observers`.
+"""
+
+import contextvars
+import functools
+import inspect
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNATTRIBUTED = "unattributed"
+
+# Request latency, seconds
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Single statements and Redis calls, seconds
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Argon2 at the default cost takes tens of milliseconds
+HASH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_operation: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_operation", default=UNATTRIBUTED)
+# layer -> seconds spent in it by the current request; None outside requests
+_request_timings: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_timings", default=None)
+# Profile of the current request (see utils.profiling); sync operations
+# report the thread they run on so threadpool work is profiled too
+active_profile: contextvars.ContextVar = contextvars.ContextVar("active_profile", default=None)
+# Called after each timed statement with (statement, parameters,
+# executemany, seconds); see utils.query_log
+statement_observers: list = []
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Latency histogram with one series per label values.
+
+    Args:
+        name: Metric name.
+        documentation: `# HELP` text.
+        labelnames: Label names; `observe` takes values in this order.
+        buckets: Upper bounds in seconds, ascending (+Inf is implied).
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [count per bucket..., count above the last, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def collect(self) -> list[str]:
+        """Exposition lines for every series."""
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template.",
+    ("method", "route", "status"), REQUEST_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "SQL statement latency by repository method.",
+    ("operation",), QUERY_BUCKETS,
+)
+redis_command_duration = Histogram(
+    "redis_command_duration_seconds", "Redis round-trip latency by calling operation and command.",
+    ("operation", "command"), QUERY_BUCKETS,
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Password hash and verify time in the hash pool.",
+    ("operation",), HASH_BUCKETS,
+)
+HISTOGRAMS = (request_duration, db_query_duration, redis_command_duration, password_hash_duration)
+
+
+def stats_gauges(prefix: str, stats: dict, labels: dict | None = None) -> list[tuple[str, dict, float]]:
+    """Turn a `stats()` dict into `(name, labels, value)` gauge samples.
+
+    Numbers and booleans become `{prefix}_{key}` gauges, nested dicts
+    extend the prefix; strings, lists and None are skipped.
+    """
+    samples = []
+    for key, value in stats.items():
+        name = _INVALID_NAME.sub("_", f"{prefix}_{key}")
+        if isinstance(value, dict):
+            samples += stats_gauges(name, value, labels)
+        elif isinstance(value, (bool, int, float)):
+            samples.append((name, labels or {}, float(value)))
+    return samples
+
+
+def render(gauges: list[tuple[str, dict, float]] = ()) -> str:
+    """The histograms plus `gauges` in Prometheus text format 0.0.4."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.collect()
+    by_name: dict[str, list] = {}
+    for name, labels, value in gauges:
+        by_name.setdefault(name, []).append((labels, value))
+    for name, samples in by_name.items():
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def add_request_time(layer: str, seconds: float):
+    """Add `seconds` to the current request's `layer` in `Server-Timing`."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[layer] = timings.get(layer, 0.0) + seconds
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def traced(label: str):
+    """Decorator running a function (sync, async or generator) as operation `label`."""
+
+    def decorate(fn):
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_gen_wrapper(*args, **kwargs):
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        token = _operation.set(label)
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _operation.reset(token)
+                        yield item
+                finally:
+                    await generator.aclose()
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        token = _operation.set(label)
+                        profile = active_profile.get()
+                        if profile is not None:
+                            profile.enter_thread()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                        finally:
+                            if profile is not None:
+                                profile.exit_thread()
+                            _operation.reset(token)
+                        yield item
+                finally:
+                    generator.close()
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                token = _operation.set(label)
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _operation.reset(token)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _operation.set(label)
+            profile = active_profile.get()
+            if profile is not None:
+                profile.enter_thread()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.exit_thread()
+                _operation.reset(token)
+        return wrapper
+
+    return decorate
+
+
+def traced_methods(cls):
+    """Class decorator tracing each public method as `Class.method`."""
+    for name, attribute in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(attribute):
+            setattr(cls, name, traced(f"{cls.__name__}.{name}")(attribute))
+    return cls
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_query_duration.observe((_operation.get(),), elapsed)
+    add_request_time("db", elapsed)
+    for observer in statement_observers:
+        observer(statement, parameters, executemany, elapsed)
+
+
+def instrument_engine(engine):
+    """Time every statement `engine` runs (pass `.sync_engine` for async engines)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _observe_redis(command, started: float):
+    elapsed = time.perf_counter() - started
+    name = command.decode() if isinstance(command, bytes) else str(command)
+    redis_command_duration.observe((_operation.get(), name.upper()), elapsed)
+    add_request_time("redis", elapsed)
+
+
+class TimedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            _observe_redis("MULTI" if self.transaction else "PIPELINE", started)
+
+
+class TimedRedis(redis.Redis):
+    """`redis.Redis` timing every command and pipeline."""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _observe_redis(args[0], started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class TimedAsyncPipeline(redis.asyncio.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            _observe_redis("MULTI" if self.is_transaction else "PIPELINE", started)
+
+
+class TimedAsyncRedis(redis.asyncio.Redis):
+    """`redis.asyncio.Redis` timing every command and pipeline."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _observe_redis(args[0], started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> TimedAsyncPipeline:
+        return TimedAsyncPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def server_timing(timings: dict, total: float) -> str:
+    """`Server-Timing` value from per-layer seconds and the request total."""
+    parts = [f"{layer};dur={seconds * 1000:.2f}" for layer, seconds in timings.items()]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and adding `Server-Timing`.
+
+    Args:
+        app: The wrapped ASGI app.
+        server_timing: Whether to add the `Server-Timing` header.
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    header = server_timing(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Set by the router on the matched route; unmatched paths share
+            # one label so arbitrary URLs cannot grow the series count
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_duration.observe((scope["method"], route, str(status_code)), time.perf_counter() - started)
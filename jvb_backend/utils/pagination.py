@@ -0,0 +1,131 @@
+"""Keyset pagination helpers.
+
+List endpoints page through tables by primary key instead of using
+OFFSET, so fetching page N costs the same as fetching page 1. The cursor
+handed to clients is opaque: a URL-safe base64 encoding of the last id
+seen on the previous page, plus its sort value when the listing is
+ordered by another column. Clients must not build cursors themselves.
+"""
+
+import base64
+import json
+from fastapi import HTTPException, status
+
+# Largest value of a signed 64-bit SQL INTEGER
+MAX_SQL_INT = 2**63 - 1
+
+
+def _is_sql_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and -MAX_SQL_INT - 1 <= value <= MAX_SQL_INT
+
+
+def _is_sort_value(value) -> bool:
+    """Whether `value` can be bound as a sort column value (str or number)."""
+    return isinstance(value, (str, float)) or _is_sql_int(value)
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last primary key of a page into an opaque cursor.
+
+    Args:
+        last_id: Primary key of the last row returned on the page.
+
+    Returns:
+        URL-safe cursor string without base64 padding.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode a result offset for listings that cannot use keyset paging.
+
+    Used by ranked search, whose order (relevance) is not a column.
+    """
+    raw = json.dumps({"offset": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str | None, max_offset: int | None = None) -> int:
+    """Decode a cursor produced by `encode_offset_cursor` (0 when absent).
+
+    Args:
+        cursor: Cursor string from the client, or None for the first page.
+        max_offset: Offsets at or above this are rejected (the listing
+                    never pages that far).
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or out of range.
+    """
+    if not cursor:
+        return 0
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("cursor offset must be a non-negative integer")
+        if max_offset is not None and offset >= max_offset:
+            raise ValueError("cursor offset is past the end of the listing")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return offset
+
+
+def encode_keyset_cursor(sort: str, last_id: int, value=None) -> str:
+    """Encode the position after a row of a listing ordered by `sort`.
+
+    Args:
+        sort: The listing's sort ("name", "-id", ...).
+        last_id: Primary key of the last row on the page.
+        value: That row's sort value; unused when sorting by id.
+
+    Returns:
+        URL-safe cursor string. Cursors of the default `id` order are
+        the same as `encode_cursor`'s.
+    """
+    if sort == "id":
+        return encode_cursor(last_id)
+    payload = {"id": last_id, "sort": sort}
+    if value is not None:
+        payload["value"] = value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str | None, sort: str) -> tuple[object, int] | None:
+    """Decode a cursor produced by `encode_keyset_cursor` for `sort`.
+
+    Returns:
+        `(value, last_id)` to continue after (value is None when sorting
+        by id), or None when no cursor was given.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was issued for
+                       a different sort.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = payload["id"]
+        if not _is_sql_int(last_id):
+            raise ValueError("cursor id must be an integer")
+        if payload.get("sort", "id") != sort:
+            raise ValueError("cursor was issued for another sort")
+        value = payload.get("value")
+        if value is None and sort.lstrip("-") != "id":
+            raise ValueError("cursor has no sort value")
+        if value is not None and not _is_sort_value(value):
+            raise ValueError("cursor sort value must be a string or a number")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return value, last_id
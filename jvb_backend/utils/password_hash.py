@@ -2,16 +2,51 @@
 
 This module wraps Passlib's CryptContext to provide a simple API for
 hashing and verifying passwords. The project is configured to use the
-Argon2 algorithm by default (configured in `pwd_context`).
+Argon2 algorithm by default (configured in `pwd_context()`), with cost
+parameters taken from `ARGON2_*` settings so throughput can be traded
+against security per deployment.
+
+Hashing is CPU-bound, so the public helpers run it on `hash_executor`
+(a bounded process pool by default) instead of the request thread. They
+raise a 503 `HTTPException` when the pool is saturated.
 
 Security note: Do NOT log or print plaintext passwords in production.
 """
 
-from passlib.context import CryptContext
+import functools
+from utils.config import ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+from utils.hash_executor import hash_executor
+
+
+@functools.cache
+def pwd_context():
+    """The CryptContext, configured to use Argon2.
+
+    Built on first use: importing passlib and argon2 takes ~30 ms that
+    app startup, the CLI and hash pool workers only pay once they hash.
+    Adjust schemes here if you need to support other hash algorithms or
+    migration strategies. Existing hashes with different costs still
+    verify; their parameters are encoded in the hash string itself.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__rounds=ARGON2_TIME_COST,
+        argon2__memory_cost=ARGON2_MEMORY_COST,
+        argon2__parallelism=ARGON2_PARALLELISM,
+    )
 
-# CryptContext configured to use Argon2. Adjust schemes here if you need
-# to support other hash algorithms or migration strategies.
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+def _hash(password: str) -> str:
+    # Runs inside the hash executor; must stay module-level to be picklable
+    return pwd_context().hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    # Runs inside the hash executor; must stay module-level to be picklable
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def hash_password(password: str) -> str:
@@ -22,9 +57,12 @@ def hash_password(password: str) -> str:
 
     Returns:
         A hashed password string suitable for storage in the database.
+
+    Raises:
+        HTTPException: 503 when the hash executor is saturated.
     """
     # Avoid printing or logging the plaintext password.
-    return pwd_context.hash(password)
+    return hash_executor.run(_hash, password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -37,5 +75,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if the plaintext password matches the hashed password,
         otherwise False.
+
+    Raises:
+        HTTPException: 503 when the hash executor is saturated.
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return hash_executor.run(_verify, plain_password, hashed_password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords in parallel on the hash executor.
+
+    Waits for free executor slots instead of failing with 503, so it is
+    meant for batch jobs such as user imports.
+
+    Returns:
+        Hashes in the same order as `passwords`.
+    """
+    return hash_executor.map(_hash, passwords)
+
+
+async def hash_password_async(password: str) -> str:
+    """Awaitable `hash_password` for the async request path."""
+    return await hash_executor.run_async(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Awaitable `verify_password` for the async request path."""
+    return await hash_executor.run_async(_verify, plain_password, hashed_password)
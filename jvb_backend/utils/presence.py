@@ -0,0 +1,422 @@
+"""Compact Redis presence store.
+
+Presence used to be three string keys per user (`user:{id}:is_online`,
+`user:{id}:last_login`, `user:{id}:offline_since`), each written with
+its own round-trip. It now lives in four shared structures:
+
+ - `presence:online`: bitmap, bit `user_id` set while the user is online,
+ - `presence:online_since`: sorted set, user id scored by login time,
+   holding online users only,
+ - `presence:offline_since`: sorted set, user id scored by logout time,
+   holding offline users only,
+ - `presence:last_login`: sorted set, user id scored by last login,
+ - `presence:heartbeat`: sorted set, online user id scored by the last
+   sign of life (login or `POST /presence/heartbeat`).
+
+Design notes:
+ - A login or logout is one MULTI/EXEC, so the bitmap and the sorted sets
+   never disagree. Callers may pass their own pipeline to fold presence
+   into a larger transaction (logout also revokes the token).
+ - Reading one user's presence is one pipelined round-trip, and so is
+   reading thousands: one BITFIELD GET per id plus one ZMSCORE per
+   sorted set, all in a single pipeline.
+ - The bitmap is sized by the highest user id (1M ids = 125 KB; ids
+   above `MAX_USER_ID` do not fit and are rejected by the routes). The
+   sorted sets give online counts (ZCARD) and online-since /
+   offline-since ordering without scanning keys.
+ - Every online/offline transition is published on `PRESENCE_CHANNEL`
+   inside the same transaction (see `utils.presence_events` for the
+   per-worker fan-out to SSE clients).
+ - `PresenceSweeper` marks users offline once their heartbeat is older
+   than `PRESENCE_TIMEOUT_SECONDS`, so a client that disappears without
+   logging out no longer stays online forever. Heartbeat and sweep are
+   Lua scripts: the check and the transition are atomic, so concurrent
+   sweepers on several workers publish each transition once.
+ - Timestamps use `presence_clock()`, the same `utcnow().timestamp()`
+   value the auth and user services have always stored.
+ - `migrate_legacy_keys` moves the old `user:{id}:*` keys into the new
+   structures (`python cli.py migrate-presence`). Users who already have
+   new-style presence keep it; their legacy keys are just deleted.
+"""
+
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+from utils.config import (
+    redis_client,
+    async_redis_client,
+    PRESENCE_CHANNEL,
+    PRESENCE_TIMEOUT_SECONDS,
+    PRESENCE_SWEEP_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+ONLINE_KEY = "presence:online"
+ONLINE_SINCE_KEY = "presence:online_since"
+OFFLINE_SINCE_KEY = "presence:offline_since"
+LAST_LOGIN_KEY = "presence:last_login"
+HEARTBEAT_KEY = "presence:heartbeat"
+
+# Highest user id the bitmap can hold: Redis bit offsets stop at 2^32 - 1
+MAX_USER_ID = 2**32 - 1
+
+# Users swept per script call, to keep each call short
+SWEEP_BATCH_SIZE = 1000
+
+# KEYS: online, online_since, offline_since, heartbeat
+# ARGV: user id, now, channel, event (published when the user was offline)
+HEARTBEAT_SCRIPT = """
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[1])
+if redis.call('GETBIT', KEYS[1], ARGV[1]) == 1 then
+    return 0
+end
+redis.call('SETBIT', KEYS[1], ARGV[1], 1)
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('PUBLISH', ARGV[3], ARGV[4])
+return 1
+"""
+
+# KEYS: online, online_since, offline_since, heartbeat
+# ARGV: cutoff, batch size, channel
+# Offline time is the last heartbeat, i.e. when the user was last seen.
+SWEEP_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+local swept = {}
+for i = 1, #stale, 2 do
+    local user_id, seen = stale[i], stale[i + 1]
+    redis.call('SETBIT', KEYS[1], user_id, 0)
+    redis.call('ZREM', KEYS[2], user_id)
+    redis.call('ZADD', KEYS[3], seen, user_id)
+    redis.call('ZREM', KEYS[4], user_id)
+    redis.call('PUBLISH', ARGV[3], '{"user_id": ' .. user_id .. ', "is_online": false, "at": ' .. seen .. '}')
+    table.insert(swept, user_id)
+end
+return swept
+"""
+
+LEGACY_KEY_PATTERN = re.compile(r"^user:(\d+):(is_online|last_login|offline_since)$")
+LEGACY_FIELDS = ("is_online", "last_login", "offline_since")
+
+
+def _score(value) -> float | None:
+    return None if value is None else float(value)
+
+
+def presence_clock() -> float:
+    """Current time on the clock presence timestamps are stored in."""
+    return datetime.utcnow().timestamp()
+
+
+def presence_event(user_id: int, is_online: bool, at: float) -> str:
+    """JSON payload published on `PRESENCE_CHANNEL` for a transition."""
+    return json.dumps({"user_id": user_id, "is_online": is_online, "at": at})
+
+
+class PresenceStore:
+    """Presence reads and writes over the shared bitmap / sorted sets.
+
+    Uses `redis_client` and `async_redis_client` from `utils.config`.
+    """
+
+    def __init__(self):
+        self._heartbeat = redis_client.register_script(HEARTBEAT_SCRIPT)
+        self._heartbeat_async = async_redis_client.register_script(HEARTBEAT_SCRIPT)
+        self._sweep = redis_client.register_script(SWEEP_SCRIPT)
+
+    def queue_online(self, pipe, user_id: int, at: float):
+        """Add the commands marking `user_id` online at `at` to `pipe`."""
+        pipe.setbit(ONLINE_KEY, user_id, 1)
+        pipe.zadd(ONLINE_SINCE_KEY, {user_id: at})
+        pipe.zadd(LAST_LOGIN_KEY, {user_id: at})
+        pipe.zadd(HEARTBEAT_KEY, {user_id: at})
+        pipe.zrem(OFFLINE_SINCE_KEY, user_id)
+        pipe.publish(PRESENCE_CHANNEL, presence_event(user_id, True, at))
+
+    def queue_offline(self, pipe, user_id: int, at: float):
+        """Add the commands marking `user_id` offline at `at` to `pipe`."""
+        pipe.setbit(ONLINE_KEY, user_id, 0)
+        pipe.zrem(ONLINE_SINCE_KEY, user_id)
+        pipe.zrem(HEARTBEAT_KEY, user_id)
+        pipe.zadd(OFFLINE_SINCE_KEY, {user_id: at})
+        pipe.publish(PRESENCE_CHANNEL, presence_event(user_id, False, at))
+
+    def mark_online(self, user_id: int, at: float | None = None, pipe=None):
+        """Mark a user online in one MULTI (or on the caller's `pipe`)."""
+        self._write(self.queue_online, user_id, at, pipe)
+
+    def mark_offline(self, user_id: int, at: float | None = None, pipe=None):
+        """Mark a user offline in one MULTI (or on the caller's `pipe`)."""
+        self._write(self.queue_offline, user_id, at, pipe)
+
+    async def mark_online_async(self, user_id: int, at: float | None = None, pipe=None):
+        """Async variant of `mark_online`."""
+        await self._write_async(self.queue_online, user_id, at, pipe)
+
+    async def mark_offline_async(self, user_id: int, at: float | None = None, pipe=None):
+        """Async variant of `mark_offline`."""
+        await self._write_async(self.queue_offline, user_id, at, pipe)
+
+    def _write(self, queue, user_id: int, at: float | None, pipe):
+        at = presence_clock() if at is None else at
+        if pipe is not None:
+            queue(pipe, user_id, at)
+            return
+        pipe = redis_client.pipeline(transaction=True)
+        queue(pipe, user_id, at)
+        pipe.execute()
+
+    async def _write_async(self, queue, user_id: int, at: float | None, pipe):
+        at = presence_clock() if at is None else at
+        if pipe is not None:
+            queue(pipe, user_id, at)
+            return
+        async with async_redis_client.pipeline(transaction=True) as pipe:
+            queue(pipe, user_id, at)
+            await pipe.execute()
+
+    def _heartbeat_args(self, user_id: int) -> tuple[list, list]:
+        now = presence_clock()
+        keys = [ONLINE_KEY, ONLINE_SINCE_KEY, OFFLINE_SINCE_KEY, HEARTBEAT_KEY]
+        return keys, [user_id, repr(now), PRESENCE_CHANNEL, presence_event(user_id, True, now)]
+
+    def heartbeat(self, user_id: int) -> bool:
+        """Record a sign of life; brings an auto-offlined user back online.
+
+        Returns:
+            True if the user was offline and is now marked online.
+        """
+        keys, args = self._heartbeat_args(user_id)
+        return bool(self._heartbeat(keys=keys, args=args))
+
+    async def heartbeat_async(self, user_id: int) -> bool:
+        """Async variant of `heartbeat`."""
+        keys, args = self._heartbeat_args(user_id)
+        return bool(await self._heartbeat_async(keys=keys, args=args))
+
+    def sweep(self, timeout: float = PRESENCE_TIMEOUT_SECONDS) -> list[int]:
+        """Mark users offline whose last heartbeat is older than `timeout`.
+
+        Returns:
+            Ids of the users marked offline.
+        """
+        cutoff = repr(presence_clock() - timeout)
+        keys = [ONLINE_KEY, ONLINE_SINCE_KEY, OFFLINE_SINCE_KEY, HEARTBEAT_KEY]
+        swept = []
+        while True:
+            batch = self._sweep(keys=keys, args=[cutoff, SWEEP_BATCH_SIZE, PRESENCE_CHANNEL])
+            swept += [int(user_id) for user_id in batch]
+            if len(batch) < SWEEP_BATCH_SIZE:
+                return swept
+
+    def seed_heartbeats(self):
+        """Give online users without a heartbeat one at their login time.
+
+        Covers users who logged in before heartbeats existed; idempotent
+        (existing heartbeats are never older than the login).
+        """
+        redis_client.zunionstore(HEARTBEAT_KEY, [HEARTBEAT_KEY, ONLINE_SINCE_KEY], aggregate="MAX")
+
+    def _queue_get(self, pipe, user_id: int):
+        pipe.getbit(ONLINE_KEY, user_id)
+        pipe.zscore(ONLINE_SINCE_KEY, user_id)
+        pipe.zscore(OFFLINE_SINCE_KEY, user_id)
+        pipe.zscore(LAST_LOGIN_KEY, user_id)
+
+    @staticmethod
+    def _as_presence(is_online, online_since, offline_since, last_login) -> dict:
+        return {
+            "is_online": bool(is_online),
+            "online_since": _score(online_since),
+            "offline_since": _score(offline_since),
+            "last_login": _score(last_login),
+        }
+
+    def get(self, user_id: int) -> dict:
+        """Return `is_online` and the three timestamps (epoch seconds or None).
+
+        One pipelined round-trip.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        self._queue_get(pipe, user_id)
+        return self._as_presence(*pipe.execute())
+
+    async def get_async(self, user_id: int) -> dict:
+        """Async variant of `get`."""
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            self._queue_get(pipe, user_id)
+            return self._as_presence(*await pipe.execute())
+
+    def _queue_get_many(self, pipe, user_ids: list[int]):
+        lookups = []
+        for user_id in user_ids:
+            lookups += ["GET", "u1", f"#{user_id}"]
+        pipe.execute_command("BITFIELD", ONLINE_KEY, *lookups)
+        pipe.zmscore(ONLINE_SINCE_KEY, user_ids)
+        pipe.zmscore(OFFLINE_SINCE_KEY, user_ids)
+
+    @staticmethod
+    def _as_presence_list(user_ids: list[int], online_bits, online_since, offline_since) -> list[dict]:
+        return [
+            {
+                "user_id": user_id,
+                "is_online": bool(bit),
+                "online_since": _score(since),
+                "offline_since": _score(until),
+            }
+            for user_id, bit, since, until in zip(user_ids, online_bits, online_since, offline_since)
+        ]
+
+    def get_many(self, user_ids: list[int]) -> list[dict]:
+        """Return presence for every id (in input order) in one round-trip.
+
+        Each entry has `user_id`, `is_online`, `online_since` and
+        `offline_since`.
+        """
+        if not user_ids:
+            return []
+        pipe = redis_client.pipeline(transaction=False)
+        self._queue_get_many(pipe, user_ids)
+        return self._as_presence_list(user_ids, *pipe.execute())
+
+    async def get_many_async(self, user_ids: list[int]) -> list[dict]:
+        """Async variant of `get_many`."""
+        if not user_ids:
+            return []
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            self._queue_get_many(pipe, user_ids)
+            return self._as_presence_list(user_ids, *await pipe.execute())
+
+    def _queue_online_users(self, pipe, limit: int):
+        pipe.zcard(ONLINE_SINCE_KEY)
+        pipe.zrevrange(ONLINE_SINCE_KEY, 0, limit - 1, withscores=True)
+
+    @staticmethod
+    def _as_online_users(count, members) -> dict:
+        return {
+            "online_count": count,
+            "users": [{"user_id": int(member), "online_since": score} for member, score in members],
+        }
+
+    def online_users(self, limit: int) -> dict:
+        """Return the online count and the `limit` most recently online users.
+
+        Served from the `online_since` index: ZCARD plus one ZREVRANGE,
+        in one round-trip and without scanning keys.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        self._queue_online_users(pipe, limit)
+        return self._as_online_users(*pipe.execute())
+
+    async def online_users_async(self, limit: int) -> dict:
+        """Async variant of `online_users`."""
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            self._queue_online_users(pipe, limit)
+            return self._as_online_users(*await pipe.execute())
+
+    def migrate_legacy_keys(self, batch_size: int = 1000) -> dict:
+        """Move `user:{id}:*` presence keys into the compact structures.
+
+        Safe to run while the app is serving traffic and to re-run: users
+        that already have new-style presence are not overwritten.
+
+        Args:
+            batch_size: User ids handled per pipeline round-trip.
+
+        Returns:
+            Counts of `users` migrated, `skipped` (already migrated) and
+            legacy `keys_deleted`.
+        """
+        counts = {"users": 0, "skipped": 0, "keys_deleted": 0}
+        pending: set[int] = set()
+        for key in redis_client.scan_iter(match="user:*", count=batch_size):
+            match = LEGACY_KEY_PATTERN.match(key)
+            if match:
+                pending.add(int(match.group(1)))
+            if len(pending) >= batch_size:
+                self._migrate_batch(sorted(pending), counts)
+                pending.clear()
+        if pending:
+            self._migrate_batch(sorted(pending), counts)
+        return counts
+
+    def _migrate_batch(self, user_ids: list[int], counts: dict):
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.mget([f"user:{user_id}:{field}" for field in LEGACY_FIELDS])
+            pipe.zscore(LAST_LOGIN_KEY, user_id)
+            pipe.zscore(OFFLINE_SINCE_KEY, user_id)
+        replies = pipe.execute()
+
+        pipe = redis_client.pipeline(transaction=True)
+        for index, user_id in enumerate(user_ids):
+            legacy, new_login, new_offline = replies[index * 3:index * 3 + 3]
+            is_online, last_login, offline_since = legacy
+            if all(value is None for value in legacy):
+                continue
+            if new_login is not None or new_offline is not None:
+                counts["skipped"] += 1
+            else:
+                counts["users"] += 1
+                if is_online == "1":
+                    login_at = _score(last_login) or presence_clock()
+                    self.queue_online(pipe, user_id, login_at)
+                else:
+                    if last_login is not None:
+                        pipe.zadd(LAST_LOGIN_KEY, {user_id: float(last_login)})
+                    if offline_since is not None:
+                        self.queue_offline(pipe, user_id, float(offline_since))
+            legacy_keys = [f"user:{user_id}:{field}" for field, value in zip(LEGACY_FIELDS, legacy) if value is not None]
+            pipe.delete(*legacy_keys)
+            counts["keys_deleted"] += len(legacy_keys)
+        pipe.execute()
+
+
+class PresenceSweeper:
+    """Background thread running `PresenceStore.sweep` periodically.
+
+    Args:
+        store: Presence store to sweep.
+        interval: Seconds between sweeps.
+    """
+
+    def __init__(self, store: PresenceStore, interval: float):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Seed missing heartbeats, then start sweeping in the background."""
+        if self._thread is not None:
+            return
+        try:
+            self.store.seed_heartbeats()
+        except Exception:
+            logger.warning("Seeding presence heartbeats failed", exc_info=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="presence-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signal the sweeper thread to exit and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                swept = self.store.sweep()
+                if swept:
+                    logger.info("Marked %d idle users offline", len(swept))
+            except Exception:
+                logger.warning("Presence sweep failed", exc_info=True)
+
+
+presence_store = PresenceStore()
+presence_sweeper = PresenceSweeper(presence_store, PRESENCE_SWEEP_SECONDS)
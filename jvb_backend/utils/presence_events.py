@@ -0,0 +1,191 @@
+"""Per-worker fan-out of presence transitions to streaming clients.
+
+Logins, logouts, heartbeats that bring a user back and the idle sweep
+publish each transition on `PRESENCE_CHANNEL` (see `utils.presence`).
+`PresenceBroadcaster` holds one async pub/sub subscription per worker
+and hands every event to the clients watching that user, so thousands of
+`GET /presence/stream` connections cost one Redis connection instead of
+one each, and no client polls.
+
+Design notes:
+ - Watchers are indexed by user id: an event costs a dict lookup plus
+   one `put_nowait` per watching client, whatever the number of
+   connected clients.
+ - Each client has a bounded queue (`PRESENCE_STREAM_QUEUE_SIZE`). A
+   client that falls behind is not allowed to grow memory: its queue is
+   dropped and replaced by a `RESYNC` marker, and the stream sends a
+   fresh snapshot instead of the missed events.
+ - Pub/sub is fire-and-forget, so after a lost Redis connection every
+   client is resynced the same way once the subscription is back.
+ - The subscription is opened by the first stream on the worker, inside
+   the event loop serving it, and closed from the app lifespan. A stream
+   waits at most `PRESENCE_SUBSCRIBE_TIMEOUT_SECONDS` for it and is only
+   registered once it is live, so an unreachable Redis fails streams
+   instead of piling up waiting connections.
+"""
+
+import asyncio
+import json
+import logging
+from utils.config import async_redis_client, PRESENCE_CHANNEL, PRESENCE_STREAM_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of missed events when a client must be resynced
+RESYNC = object()
+
+
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """One streaming client and the users it watches.
+
+    Attributes:
+        user_ids: Watched user ids.
+        queue: Pending events (dicts) or `RESYNC`.
+    """
+
+    def __init__(self, user_ids: list[int], queue_size: int):
+        self.user_ids = user_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, event) -> bool:
+        """Queue `event`; on overflow replace the backlog with `RESYNC`.
+
+        Returns:
+            False if the client overflowed and will be resynced.
+        """
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.resync()
+            return False
+
+    def resync(self):
+        """Drop pending events and ask the client for a fresh snapshot."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+
+class PresenceBroadcaster:
+    """Route presence events from Redis pub/sub to watching subscriptions.
+
+    Args:
+        channel: Redis pub/sub channel carrying presence transitions.
+        queue_size: Per-subscription event buffer.
+        reconnect_delay: Seconds to wait before resubscribing.
+    """
+
+    def __init__(self, channel: str, queue_size: int, reconnect_delay: float = 1.0):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._watchers: dict[int, set[Subscription]] = {}
+        self._subscriptions: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+        self._ready: asyncio.Event | None = None
+        self._events = 0
+        self._deliveries = 0
+        self._overflows = 0
+        self._reconnects = 0
+
+    async def subscribe(self, user_ids: list[int], timeout: float | None = None) -> Subscription:
+        """Register a client watching `user_ids`.
+
+        Waits until the worker's pub/sub subscription is live, so a
+        snapshot taken afterwards cannot miss a transition. The client
+        is only registered once it is, so a wait that times out or is
+        cancelled leaves nothing behind.
+
+        Raises:
+            asyncio.TimeoutError: The subscription was not live within
+                                  `timeout` seconds (Redis unreachable).
+        """
+        self._ensure_listener()
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        subscription = Subscription(user_ids, self.queue_size)
+        self._subscriptions.add(subscription)
+        for user_id in user_ids:
+            self._watchers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a client; safe to call more than once."""
+        self._subscriptions.discard(subscription)
+        for user_id in subscription.user_ids:
+            watchers = self._watchers.get(user_id)
+            if watchers is None:
+                continue
+            watchers.discard(subscription)
+            if not watchers:
+                del self._watchers[user_id]
+
+    async def stop(self):
+        """Close the pub/sub subscription (clients are left to disconnect)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._task is not None and not self._task.done(),
+            "connections": len(self._subscriptions),
+            "watched_users": len(self._watchers),
+            "events": self._events,
+            "deliveries": self._deliveries,
+            "overflows": self._overflows,
+            "reconnects": self._reconnects,
+        }
+
+    def _ensure_listener(self):
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="presence-broadcaster")
+
+    def _dispatch(self, data: str):
+        event = json.loads(data)
+        self._events += 1
+        for subscription in self._watchers.get(event["user_id"], ()):
+            self._deliveries += 1
+            if not subscription.push(event):
+                self._overflows += 1
+
+    async def _run(self):
+        reconnecting = False
+        while True:
+            pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                if reconnecting:
+                    # Events published while disconnected are lost
+                    self._reconnects += 1
+                    for subscription in self._subscriptions:
+                        subscription.resync()
+                self._ready.set()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Presence subscription lost; resubscribing", exc_info=True)
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                reconnecting = True
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+presence_broadcaster = PresenceBroadcaster(PRESENCE_CHANNEL, PRESENCE_STREAM_QUEUE_SIZE)
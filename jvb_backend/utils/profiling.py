@@ -0,0 +1,290 @@
+"""On-demand profiling of individual requests.
+
+A request is profiled when it carries `X-Profile: <PROFILING_TOKEN>`
+(the header is ignored while no token is configured), or at random
+with probability `PROFILE_SAMPLE_RATE`. Two profilers are available:
+
+ - "sample" (default): a sampling profiler that records the request's
+   stack every `PROFILE_INTERVAL_MS`, written as collapsed stacks
+   (`module:func;module:func count` lines, `.collapsed`) for
+   flamegraph.pl, inferno or speedscope;
+ - "cprofile": deterministic `cProfile`, written as pstats (`.prof`) for
+   `python -m pstats` or snakeviz.
+
+`PROFILE_MODE` picks the profiler for sampled requests; header-triggered
+requests may choose with `X-Profile-Mode`. Profiles are written to
+`PROFILE_DIR`, and header-triggered responses name the file in
+`X-Profile-File`.
+
+Design notes:
+ - Only the request's own work is profiled. On the event loop, its
+   coroutine is driven step by step and the profiler is on only while
+   one of its steps runs, so other requests sharing the loop stay out
+   of the profile. Threadpool work (the sync request path) is profiled
+   from the first traced operation a thread enters (services,
+   repositories, token checks; see `utils.metrics.traced`) until it
+   leaves it, so sync endpoint code outside any operation is not seen.
+ - Sampling is cheap (one stack walk per interval, in its own thread)
+   and suits a small `PROFILE_SAMPLE_RATE` in production. cProfile
+   slows Python code several times over: read its numbers relative to
+   each other, not as latencies. The sampler needs the GIL, so under
+   CPU load intervals below the interpreter's switch interval (5 ms)
+   are not honoured.
+ - Profiles are written off the event loop after the response has been
+   sent. Nothing removes old profiles.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from starlette.concurrency import run_in_threadpool
+from utils.metrics import active_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+FILE_SUFFIXES = {"sample": "collapsed", "cprofile": "prof"}
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+
+class _Profiled:
+    """Awaitable driving `coro` with `profile` resumed only during its steps."""
+
+    def __init__(self, coro, profile: "RequestProfile"):
+        self.coro = coro
+        self.profile = profile
+
+    def __await__(self):
+        coro, profile = self.coro, self.profile
+        value, error = None, None
+        while True:
+            profile.resume()
+            try:
+                if error is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                profile.pause()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as exc:
+                value, error = None, exc
+
+
+# Sampled event-loop stacks start at the request, not at the server
+_ROOT_CODE = _Profiled.__await__.__code__
+
+
+def _collapsed(frame) -> str:
+    names = []
+    while frame is not None and frame.f_code is not _ROOT_CODE:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfile:
+    """Profile of one request, across the event loop and threadpool threads.
+
+    Created on the event loop thread, which it treats as the loop.
+
+    Args:
+        mode: "sample" or "cprofile".
+        interval: Seconds between samples ("sample" mode).
+    """
+
+    def __init__(self, mode: str, interval: float):
+        self.mode = mode
+        self.interval = interval
+        self._loop_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # thread -> nesting depth of the request's operations running on it
+        self._depths: dict[int, int] = {}
+        self._profilers: dict[int, cProfile.Profile] = {}
+        self._samples: Counter = Counter()
+        self._on_loop = False
+        self._sampler: threading.Thread | None = None
+
+    def start(self):
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _profiler(self, thread: int) -> cProfile.Profile:
+        profiler = self._profilers.get(thread)
+        if profiler is None:
+            with self._lock:
+                profiler = self._profilers.setdefault(thread, cProfile.Profile())
+        return profiler
+
+    def resume(self):
+        """The request's coroutine is about to run a step on the loop."""
+        if self.mode == "cprofile":
+            self._profiler(self._loop_thread).enable()
+        else:
+            self._on_loop = True
+
+    def pause(self):
+        if self.mode == "cprofile":
+            self._profilers[self._loop_thread].disable()
+        else:
+            self._on_loop = False
+
+    def enter_thread(self):
+        """A traced operation of the request starts on this thread."""
+        thread = threading.get_ident()
+        if thread == self._loop_thread or self._stopped.is_set():
+            return
+        with self._lock:
+            depth = self._depths.get(thread, 0)
+            self._depths[thread] = depth + 1
+        if depth == 0 and self.mode == "cprofile":
+            self._profiler(thread).enable()
+
+    def exit_thread(self):
+        thread = threading.get_ident()
+        with self._lock:
+            depth = self._depths.pop(thread, 0) - 1
+            if depth > 0:
+                self._depths[thread] = depth
+        # depth < 0: entered after stop() or on the loop, nothing to undo
+        if depth == 0 and self.mode == "cprofile":
+            self._profilers[thread].disable()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            on_loop = self._on_loop
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._depths)
+            # Skip the loop if the request's step ended while sampling
+            if on_loop and self._on_loop:
+                threads.append(self._loop_thread)
+            for thread in threads:
+                frame = frames.get(thread)
+                if frame is not None:
+                    self._samples[_collapsed(frame)] += 1
+
+    def write(self, path: str):
+        """Write collapsed stacks or pstats to `path` (call after `stop`)."""
+        if self.mode == "sample":
+            with open(path, "w") as file:
+                for stack, count in self._samples.most_common():
+                    file.write(f"{stack} {count}\n")
+            return
+        with self._lock:
+            # A thread still inside an operation (a streaming generator)
+            # owns its profiler until it leaves; leave that one out
+            profilers = [p for thread, p in self._profilers.items() if not self._depths.get(thread)]
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests selected by header or sampling.
+
+    Args:
+        app: The wrapped ASGI app.
+        token: Value of `X-Profile` that enables profiling; "" disables
+            the header.
+        sample_rate: Fraction of all requests profiled (0 to 1).
+        mode: Profiler for sampled requests, "sample" or "cprofile".
+        directory: Where profiles are written (created if missing).
+        interval: Seconds between samples in "sample" mode.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: str = "",
+        sample_rate: float = 0.0,
+        mode: str = "sample",
+        directory: str = "profiles",
+        interval: float = 0.005,
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}")
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.directory = directory
+        self.interval = interval
+
+    def _selection(self, scope) -> tuple[str, bool] | None:
+        """(mode, requested by header) for a profiled request, else None."""
+        if self.token:
+            value = _header(scope, b"x-profile")
+            if value is not None and hmac.compare_digest(value, self.token):
+                mode = (_header(scope, b"x-profile-mode") or b"").decode("latin-1").lower()
+                return (mode if mode in PROFILE_MODES else self.mode), True
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.mode, False
+        return None
+
+    def _path(self, scope, mode: str) -> str:
+        slug = _UNSAFE.sub("_", scope["path"]).strip("_")[:60] or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}-{scope['method']}-{slug}-{os.urandom(3).hex()}.{FILE_SUFFIXES[mode]}"
+        return os.path.join(self.directory, name)
+
+    def _write(self, profile: RequestProfile, path: str):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.write(path)
+        except OSError:
+            logger.warning("Writing profile %s failed", path, exc_info=True)
+        else:
+            logger.info("Wrote %s profile to %s", profile.mode, path)
+
+    async def __call__(self, scope, receive, send):
+        selection = self._selection(scope) if scope["type"] == "http" else None
+        if selection is None:
+            await self.app(scope, receive, send)
+            return
+
+        mode, requested = selection
+        path = self._path(scope, mode)
+
+        async def send_with_file(message):
+            if requested and message["type"] == "http.response.start":
+                header = (b"x-profile-file", os.path.basename(path).encode())
+                message = {**message, "headers": [*message.get("headers", ()), header]}
+            await send(message)
+
+        profile = RequestProfile(mode, self.interval)
+        token = active_profile.set(profile)
+        profile.start()
+        try:
+            await _Profiled(self.app(scope, receive, send_with_file), profile)
+        finally:
+            active_profile.reset(token)
+            profile.stop()
+            await run_in_threadpool(self._write, profile, path)
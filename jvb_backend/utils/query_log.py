@@ -0,0 +1,331 @@
+"""Slow-query log and per-request repeated / duplicate query detection.
+
+Every statement timed by `utils.metrics` is passed to `query_log`:
+
+ - statements slower than `SLOW_QUERY_MS` are logged (logger
+   `utils.query_log`, WARNING) and kept in a short list at
+   /metrics/queries, with the statement, the shape of its parameters
+   (`(int, str)`, `{name_1: str}`, `100 x (str, datetime)`), the
+   duration, the repository method or traced function that issued it
+   and the request route. That endpoint requires the header
+   `X-Profiling-Token: <PROFILING_TOKEN>`; /metrics only exports the
+   counters;
+ - within a request (see `QueryAuditMiddleware`), two patterns are
+   flagged when the response starts:
+     - repeated statements: the same SQL run `QUERY_REPEAT_THRESHOLD`
+       or more times, the signature of an N+1 loop (a query per row of
+       a previous result);
+     - duplicate reads: a SELECT reading the same rows again, e.g.
+       `update` loading an item and then `refresh`-ing it. SELECTs are
+       compared on their FROM/WHERE part and its parameter values, so a
+       `.first()` (which adds LIMIT/OFFSET) and a `refresh` of the same
+       primary key match.
+
+Design notes:
+ - Parameter values are never logged or kept, only their types: they
+   include password hashes and user data.
+ - Statement analysis (placeholder positions, the FROM/WHERE key) is
+   cached per SQL string. SQLAlchemy reuses compiled strings, so the
+   per-statement cost is a dict lookup plus counting, a microsecond or
+   two on top of the metrics hooks.
+ - Detection stops at `http.response.start`: queries issued while a
+   body streams (the keyset batches of `?stream=true` and exports) or
+   by background tasks are batched by design, not N+1 loops. Only the
+   first `MAX_TRACKED_STATEMENTS` statements of a request are analysed.
+ - A duplicate read after a write in between can be deliberate (reading
+   back defaults); it is still flagged, as the write usually returns or
+   already holds what the second read fetches.
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import deque
+from utils.config import SLOW_QUERY_MS, QUERY_REPEAT_THRESHOLD, QUERY_LOG_SIZE
+from utils.metrics import current_operation
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_STATEMENTS = 1000
+# Longer statements are cut in logs and at /metrics/queries
+STATEMENT_MAX_CHARS = 500
+_SHAPE_CACHE_SIZE = 2000
+
+# qmark (SQLite), format / pyformat (MySQL, psycopg), numeric (asyncpg)
+_PLACEHOLDER = re.compile(r"\?|%\((\w+)\)s|%s|\$(\d+)")
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_PAGING = re.compile(r"(?: LIMIT \?)?(?: OFFSET \?)?$")
+
+_request_queries: contextvars.ContextVar["RequestQueries | None"] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+class _Shape:
+    """What the audit needs from one SQL string.
+
+    Attributes:
+        text: Statement with whitespace collapsed, placeholders as `?`
+            and IN lists as `(?, ...)`.
+        read_key: FROM/WHERE part of a SELECT without LIMIT/OFFSET, or
+            None for other statements.
+        read_refs: Parameter positions (int) or names (str) used in
+            `read_key`, in order.
+    """
+
+    __slots__ = ("text", "read_key", "read_refs")
+
+    def __init__(self, statement: str):
+        text = _WHITESPACE.sub(" ", statement).strip()
+        # refs: (position of the `?` in the normalized text, parameter)
+        parts, refs, ordinal, last, length = [], [], 0, 0, 0
+        for match in _PLACEHOLDER.finditer(text):
+            chunk = text[last:match.start()]
+            parts += (chunk, "?")
+            length += len(chunk)
+            name, number = match.groups()
+            if name is not None:
+                refs.append((length, name))
+            elif number is not None:
+                refs.append((length, int(number) - 1))
+            else:
+                refs.append((length, ordinal))
+                ordinal += 1
+            length += 1
+            last = match.end()
+        parts.append(text[last:])
+        normalized = "".join(parts)
+        self.text = _IN_LIST.sub("(?, ...)", normalized)
+        self.read_key = None
+        self.read_refs = ()
+        if normalized[:7].upper() == "SELECT ":
+            start = normalized.upper().find(" FROM ")
+            if start != -1:
+                key = _PAGING.sub("", normalized[start + 1:])
+                end = start + 1 + len(key)
+                self.read_key = key
+                self.read_refs = tuple(ref for position, ref in refs if start < position < end)
+
+
+def _parameter(parameters, ref):
+    if isinstance(ref, str):
+        return parameters.get(ref) if isinstance(parameters, dict) else None
+    if isinstance(parameters, (tuple, list)) and ref < len(parameters):
+        return parameters[ref]
+    return None
+
+
+def _type_names(values) -> str:
+    """`int, str x 3` from the values' types, runs of one type collapsed."""
+    runs: list[list] = []
+    for value in values:
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return ", ".join(name if count == 1 else f"{name} x {count}" for name, count in runs)
+
+
+def params_shape(parameters, executemany: bool = False) -> str:
+    """Parameter types of a statement, without their values."""
+    if executemany:
+        if not parameters:
+            return "0 x ()"
+        return f"{len(parameters)} x {params_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (tuple, list)):
+        return f"({_type_names(parameters)})"
+    return "()" if parameters is None else type(parameters).__name__
+
+
+def _cut(text: str) -> str:
+    return text if len(text) <= STATEMENT_MAX_CHARS else text[:STATEMENT_MAX_CHARS] + "..."
+
+
+def _route(scope) -> str | None:
+    if scope is None:
+        return None
+    return getattr(scope.get("route"), "path", None) or scope.get("path")
+
+
+class RequestQueries:
+    """Statements seen during one request, grouped for the audit."""
+
+    __slots__ = ("scope", "closed", "statements", "shapes", "reads")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.closed = False
+        self.statements = 0
+        # shape text -> [count, operations]
+        self.shapes: dict[str, list] = {}
+        # (read key, parameter values) -> [count, operations]
+        self.reads: dict[tuple, list] = {}
+
+    def record(self, shape: _Shape, parameters, executemany: bool, operation: str):
+        self.statements += 1
+        if self.statements > MAX_TRACKED_STATEMENTS:
+            return
+        entry = self.shapes.get(shape.text)
+        if entry is None:
+            entry = self.shapes[shape.text] = [0, set()]
+        entry[0] += 1
+        entry[1].add(operation)
+        if shape.read_key is None or executemany:
+            return
+        key = (shape.read_key, tuple(_parameter(parameters, ref) for ref in shape.read_refs))
+        try:
+            entry = self.reads.get(key)
+        except TypeError:
+            # Unhashable values (arrays); such reads are not compared
+            return
+        if entry is None:
+            entry = self.reads[key] = [0, set()]
+        entry[0] += 1
+        entry[1].add(operation)
+
+
+class QueryLog:
+    """Slow-query log and request query audit.
+
+    Args:
+        slow_seconds: Statements taking at least this long are logged.
+        repeat_threshold: Executions of one statement within a request
+            that flag it as repeated (N+1).
+        size: Slow queries and findings kept for /metrics/queries.
+    """
+
+    def __init__(self, slow_seconds: float, repeat_threshold: int, size: int):
+        self.slow_seconds = slow_seconds
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self._shapes: dict[str, _Shape] = {}
+        self._slow = deque(maxlen=size)
+        self._findings = deque(maxlen=size)
+        self._slow_queries = 0
+        self._requests = 0
+        self._flagged_requests = 0
+        self._repeated = 0
+        self._duplicate_reads = 0
+
+    def _shape(self, statement: str) -> _Shape:
+        shape = self._shapes.get(statement)
+        if shape is None:
+            if len(self._shapes) >= _SHAPE_CACHE_SIZE:
+                self._shapes.clear()
+            shape = self._shapes[statement] = _Shape(statement)
+        return shape
+
+    def observe(self, statement: str, parameters, executemany: bool, seconds: float):
+        """Statement observer (see `utils.metrics.statement_observers`)."""
+        queries = _request_queries.get()
+        if seconds >= self.slow_seconds:
+            self._log_slow(statement, parameters, executemany, seconds, queries)
+        if queries is not None and not queries.closed:
+            queries.record(self._shape(statement), parameters, executemany, current_operation())
+
+    def _log_slow(self, statement, parameters, executemany, seconds, queries):
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(seconds * 1000, 3),
+            "operation": current_operation(),
+            "route": _route(queries.scope) if queries is not None else None,
+            "statement": _cut(_WHITESPACE.sub(" ", statement).strip()),
+            "params": params_shape(parameters, executemany),
+        }
+        with self._lock:
+            self._slow_queries += 1
+            self._slow.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) in %s [%s]: %s params=%s",
+            entry["duration_ms"], entry["operation"], entry["route"], entry["statement"], entry["params"],
+        )
+
+    def finish(self, queries: RequestQueries, method: str):
+        """Flag repeated statements and duplicate reads of a finished request."""
+        findings = []
+        for text, (count, operations) in queries.shapes.items():
+            if count >= self.repeat_threshold:
+                findings.append(("repeated", count, text, operations))
+        for (read_key, _values), (count, operations) in queries.reads.items():
+            if count > 1:
+                findings.append(("duplicate_read", count, "SELECT ... " + read_key, operations))
+
+        with self._lock:
+            self._requests += 1
+            if not findings:
+                return
+            self._flagged_requests += 1
+            route = _route(queries.scope)
+            for kind, count, text, operations in findings:
+                if kind == "repeated":
+                    self._repeated += 1
+                else:
+                    self._duplicate_reads += 1
+                self._findings.append({
+                    "at": time.time(),
+                    "kind": kind,
+                    "method": method,
+                    "route": route,
+                    "count": count,
+                    "operations": sorted(operations),
+                    "statement": _cut(text),
+                })
+        for kind, count, text, operations in findings:
+            logger.warning(
+                "%s in %s %s: %d x %s (from %s)",
+                "Repeated statement" if kind == "repeated" else "Duplicate read",
+                method, route, count, _cut(text), ", ".join(sorted(operations)),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "slow_query_ms": self.slow_seconds * 1000,
+                "repeat_threshold": self.repeat_threshold,
+                "slow_queries": self._slow_queries,
+                "requests_audited": self._requests,
+                "requests_flagged": self._flagged_requests,
+                "repeated_statements": self._repeated,
+                "duplicate_reads": self._duplicate_reads,
+                "recent_slow": list(self._slow),
+                "recent_findings": list(self._findings),
+            }
+
+
+query_log = QueryLog(SLOW_QUERY_MS / 1000, QUERY_REPEAT_THRESHOLD, QUERY_LOG_SIZE)
+
+
+class QueryAuditMiddleware:
+    """ASGI middleware collecting each request's statements for `query_log`."""
+
+    def __init__(self, app, log: QueryLog = query_log):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope)
+        token = _request_queries.set(queries)
+
+        async def send_and_close(message):
+            if message["type"] == "http.response.start" and not queries.closed:
+                queries.closed = True
+                self.log.finish(queries, scope["method"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_close)
+        finally:
+            _request_queries.reset(token)
+            if not queries.closed:
+                queries.closed = True
+                self.log.finish(queries, scope["method"])
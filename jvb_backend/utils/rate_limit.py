@@ -0,0 +1,261 @@
+"""Sliding-window rate limits in Redis, with a per-worker pre-limiter.
+
+Throttled routes (`/auth/login`, `/auth/register`) depend on a
+`RateLimit`, which checks the client IP and, where the body has one, the
+username against limits such as `ip:20/60,username:5/60` (at most 20
+attempts per IP and 5 per username in any 60 seconds). Over the limit,
+the request gets a 429 with `Retry-After` before the route opens a
+database session or hashes a password.
+
+Limits are sliding-window logs: one sorted set per key holding the
+times of the attempts admitted in the last window. One Lua script
+checks every key of a request and admits it into all of them, or none,
+atomically, so concurrent workers cannot overshoot a limit.
+
+Design notes:
+ - Only admitted attempts are logged. A key that is over its limit
+   therefore stays over until its oldest entry leaves the window, and
+   the script returns that time. Each worker remembers it in a local
+   `LRUTTLCache` and rejects the key's requests without asking Redis
+   until then. This is exact (Redis would give the same answer), and a
+   flood from one IP or against one username costs one Redis call per
+   worker per window instead of one per request.
+ - The client IP is `request.client.host`. Behind a reverse proxy, run
+   uvicorn with `--proxy-headers --forwarded-allow-ips=<proxy>` so it
+   is the real client rather than the proxy.
+ - Usernames are keyed case-insensitively, so "Alice" and "alice" share
+   a budget.
+ - If Redis is unreachable, requests are let through (and logged):
+   throttling protects capacity, it should not take login down.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from fastapi import HTTPException, Request, status
+from utils.cache import LRUTTLCache
+from utils.config import redis_client, async_redis_client, RATE_LIMIT_ENABLED, RATE_LIMIT_LOCAL_SIZE
+from utils.metrics import traced_methods
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate:"
+SCOPES = ("ip", "username")
+
+# KEYS: one sorted set per limited key
+# ARGV: now (ms), unique member, then limit and window (ms) for each key
+# Returns, per key, 0 if the attempt fits or the ms until it would; the
+# attempt is logged in every key only when all of them are 0
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local waits = {}
+local rejected = false
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    waits[i] = 0
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        waits[i] = math.max(1, tonumber(oldest[2]) + window - now)
+        rejected = true
+    end
+end
+if not rejected then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, ARGV[2])
+        redis.call('PEXPIRE', key, ARGV[2 + 2 * i])
+    end
+end
+return waits
+"""
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """At most `limit` attempts per `scope` value in any `window` seconds.
+
+    Fields:
+        scope: "ip" or "username".
+        limit: Attempts admitted per window.
+        window: Window length in seconds.
+    """
+
+    scope: str
+    limit: int
+    window: float
+
+
+def parse_rules(spec: str) -> tuple[RateRule, ...]:
+    """Parse `scope:limit/seconds` rules separated by commas.
+
+    Raises:
+        ValueError: for a malformed rule or an unknown scope.
+    """
+    rules = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            scope, rate = part.split(":")
+            limit, window = rate.split("/")
+            rule = RateRule(scope.strip(), int(limit), float(window))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit rule {part!r}; expected scope:limit/seconds")
+        if rule.scope not in SCOPES or rule.limit < 1 or rule.window <= 0:
+            raise ValueError(f"Invalid rate limit rule {part!r}")
+        rules.append(rule)
+    return tuple(rules)
+
+
+def _too_many_requests(wait_seconds: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(wait_seconds)))},
+    )
+
+
+@traced_methods
+class RateLimiter:
+    """Runs the sliding-window script and keeps the local block list.
+
+    Uses `redis_client` and `async_redis_client` from `utils.config`.
+
+    Args:
+        local_size: Blocked keys remembered per worker.
+    """
+
+    def __init__(self, local_size: int):
+        self._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._script_async = async_redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        # key -> time (epoch seconds) until which Redis would reject it;
+        # entries expire at that time
+        self._blocked = LRUTTLCache(maxsize=local_size, ttl=0)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._rejected_local = 0
+        self._rejected_redis = 0
+        self._errors = 0
+
+    def _check_local(self, keys: list[str]):
+        """Raise 429 if any key is known to be over its limit."""
+        now = time.time()
+        for key in keys:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None and blocked_until > now:
+                with self._lock:
+                    self._rejected_local += 1
+                raise _too_many_requests(blocked_until - now)
+
+    @staticmethod
+    def _args(rules: tuple[RateRule, ...], now: float) -> list:
+        args = [int(now * 1000), f"{now:.6f}-{os.urandom(4).hex()}"]
+        for rule in rules:
+            args += [rule.limit, int(rule.window * 1000)]
+        return args
+
+    def _apply(self, keys: list[str], waits: list, now: float):
+        """Record keys over their limit and raise 429 if any is."""
+        waits = [int(wait) / 1000 for wait in waits]
+        if not any(waits):
+            with self._lock:
+                self._admitted += 1
+            return
+        for key, wait in zip(keys, waits):
+            if wait:
+                self._blocked.set(key, now + wait, ttl=wait)
+        with self._lock:
+            self._rejected_redis += 1
+        raise _too_many_requests(max(waits))
+
+    def hit(self, keys: list[str], rules: tuple[RateRule, ...]):
+        """Count one attempt against `keys` (one per rule).
+
+        Raises:
+            HTTPException: 429 with `Retry-After` when any key is over
+                           its limit; the attempt is then not counted.
+        """
+        self._check_local(keys)
+        now = time.time()
+        try:
+            waits = self._script(keys=keys, args=self._args(rules, now))
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            logger.warning("Rate limit check failed; letting the request through", exc_info=True)
+            return
+        self._apply(keys, waits, now)
+
+    async def hit_async(self, keys: list[str], rules: tuple[RateRule, ...]):
+        """Async variant of `hit`."""
+        self._check_local(keys)
+        now = time.time()
+        try:
+            waits = await self._script_async(keys=keys, args=self._args(rules, now))
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            logger.warning("Rate limit check failed; letting the request through", exc_info=True)
+            return
+        self._apply(keys, waits, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": RATE_LIMIT_ENABLED,
+                "admitted": self._admitted,
+                "rejected_local": self._rejected_local,
+                "rejected_redis": self._rejected_redis,
+                "errors": self._errors,
+                "blocked_keys": self._blocked.stats()["size"],
+            }
+
+
+rate_limiter = RateLimiter(RATE_LIMIT_LOCAL_SIZE)
+
+
+class RateLimit:
+    """Rate limits of one route.
+
+    Args:
+        name: Route name, part of the Redis keys (e.g. "login").
+        spec: Rules, e.g. "ip:20/60,username:5/60" (see `parse_rules`).
+    """
+
+    def __init__(self, name: str, spec: str):
+        self.name = name
+        self.rules = parse_rules(spec)
+
+    def keys(self, request: Request, username: str | None = None) -> tuple[list[str], tuple[RateRule, ...]]:
+        """Redis keys and matching rules for one request.
+
+        Username rules are skipped when the request has no username.
+        """
+        values = {
+            "ip": request.client.host if request.client else "unknown",
+            "username": username.strip().lower() if username else None,
+        }
+        rules = tuple(rule for rule in self.rules if values[rule.scope] is not None)
+        keys = [f"{KEY_PREFIX}{self.name}:{rule.scope}:{values[rule.scope]}:{rule.window:g}" for rule in rules]
+        return keys, rules
+
+    def hit(self, request: Request, username: str | None = None):
+        """Count the request; raise 429 if over any limit."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        keys, rules = self.keys(request, username)
+        if rules:
+            rate_limiter.hit(keys, rules)
+
+    async def hit_async(self, request: Request, username: str | None = None):
+        """Async variant of `hit`."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        keys, rules = self.keys(request, username)
+        if rules:
+            await rate_limiter.hit_async(keys, rules)
@@ -0,0 +1,362 @@
+"""Access-token revocation backed by time-bucketed Bloom filters.
+
+Revoked tokens are identified by their `jti` claim (tokens issued before
+`jti` existed fall back to the SHA-256 digest of the raw token). Each
+revocation is stored twice in Redis:
+
+ - an exact key `revoked:{jti}` that expires with the token, and
+ - bits in a shared Bloom filter `revoked:bloom:{bucket}`, where the
+   bucket is the window of `REVOCATION_BUCKET_SECONDS` in which the token
+   expires. A bucket (and its Redis key) can be dropped as a whole once
+   every token in it has expired, so filters never need deletions.
+
+Every worker keeps a copy of the live filters in memory. Lookups consult
+the local filter first; almost every token is not revoked and is
+answered without any Redis call. Only a Bloom hit (a revoked token or a
+rare false positive) falls through to an exact `EXISTS revoked:{jti}`.
+
+Workers learn about new revocations through `TOKEN_INVALIDATION_CHANNEL`
+(applied immediately) and re-read the filters from Redis every
+`REVOCATION_SYNC_SECONDS` to recover anything missed. The same listener
+also marks the token `REVOKED` in the verified-token cache.
+
+A sync does not scan the keyspace for filters: the buckets that can hold
+an unexpired token are known from the clock and the access-token
+lifetime (a handful with the defaults), and are read with one MGET.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from utils.config import (
+    redis_client,
+    redis_bytes_client,
+    async_redis_client,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REVOCATION_BUCKET_SECONDS,
+    REVOCATION_EXPECTED_PER_BUCKET,
+    REVOCATION_FALSE_POSITIVE_RATE,
+    REVOCATION_SYNC_SECONDS,
+    TOKEN_INVALIDATION_CHANNEL,
+)
+from utils.token_cache import REVOKED, token_cache, token_digest
+
+logger = logging.getLogger(__name__)
+
+BLOOM_KEY_PREFIX = "revoked:bloom:"
+# Keep a bucket around briefly after its last token expires to absorb
+# clock skew between workers
+BUCKET_GRACE_SECONDS = 60
+
+
+def bloom_parameters(expected_items: int, fp_rate: float) -> tuple[int, int]:
+    """Return `(size_bits, hash_count)` for a Bloom filter.
+
+    Standard sizing: m = -n ln p / (ln 2)^2 and k = (m / n) ln 2, with
+    the bit count rounded up to a whole number of bytes.
+    """
+    expected_items = max(1, expected_items)
+    size_bits = math.ceil(-expected_items * math.log(fp_rate) / (math.log(2) ** 2))
+    size_bits = (size_bits + 7) // 8 * 8
+    hash_count = max(1, round(size_bits / expected_items * math.log(2)))
+    return size_bits, hash_count
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over a bytearray.
+
+    Bit numbering matches Redis SETBIT/GETBIT (bit 0 is the most
+    significant bit of byte 0), so a filter can be loaded directly from
+    the bitmap stored in Redis. `add` and `merge` both rewrite bytes of
+    `bits` and share a lock, so a concurrent merge cannot undo an add.
+
+    Args:
+        size_bits: Number of bits; must be a multiple of 8.
+        hash_count: Number of bit positions per item.
+    """
+
+    def __init__(self, size_bits: int, hash_count: int):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bytearray(size_bits // 8)
+        self._lock = threading.Lock()
+
+    def positions(self, item: str) -> list[int]:
+        """Return the bit offsets for `item` (Kirsch-Mitzenmacher double hashing)."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        positions = self.positions(item)
+        with self._lock:
+            for offset in positions:
+                self.bits[offset >> 3] |= 0x80 >> (offset & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[offset >> 3] & (0x80 >> (offset & 7)) for offset in self.positions(item))
+
+    def merge(self, raw: bytes):
+        """OR a bitmap read from Redis into this filter."""
+        bits = self.bits
+        with self._lock:
+            # Redis omits trailing zero bytes, so `raw` may be shorter
+            merged = int.from_bytes(bits[:len(raw)], "big") | int.from_bytes(raw[:len(bits)], "big")
+            bits[:len(raw)] = merged.to_bytes(min(len(raw), len(bits)), "big")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class RevocationStore:
+    """Revocation list with per-worker Bloom filters in front of Redis.
+
+    Args:
+        bucket_seconds: Width of an expiry bucket.
+        expected_per_bucket: Revocations each bucket's filter is sized for.
+        fp_rate: Target false-positive rate at `expected_per_bucket`.
+        max_token_seconds: Longest lifetime of a revocable token.
+    """
+
+    def __init__(self, bucket_seconds: int, expected_per_bucket: int, fp_rate: float, max_token_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.max_token_seconds = max_token_seconds
+        self.size_bits, self.hash_count = bloom_parameters(expected_per_bucket, fp_rate)
+        self._filters: dict[int, BloomFilter] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.bloom_hits = 0
+        self.confirmed = 0
+
+    def bucket_for(self, exp: int) -> int:
+        return int(exp) // self.bucket_seconds
+
+    def _filter(self, bucket: int) -> BloomFilter:
+        with self._lock:
+            bloom = self._filters.get(bucket)
+            if bloom is None:
+                bloom = self._filters[bucket] = BloomFilter(self.size_bits, self.hash_count)
+            return bloom
+
+    def add_local(self, jti: str, exp: int):
+        """Record a revocation in this worker's filter only."""
+        self._filter(self.bucket_for(exp)).add(jti)
+
+    def might_be_revoked(self, jti: str, exp: int) -> bool:
+        """Local Bloom check: False means definitely not revoked."""
+        with self._lock:
+            bloom = self._filters.get(self.bucket_for(exp))
+        return bloom is not None and jti in bloom
+
+    def revoke(self, jti: str, exp: int, digest: str | None = None, pipe=None):
+        """Revoke a token until its expiry.
+
+        Writes the exact key and the filter bits in one pipeline and
+        publishes the revocation to the other workers. Tokens that have
+        already expired need no revocation and are ignored.
+
+        Args:
+            jti: Token identifier.
+            exp: Token expiry (epoch seconds).
+            digest: Token digest to mark in the verified-token caches.
+            pipe: Optional pipeline to add the commands to; the caller
+                  executes it. When omitted the commands run immediately.
+        """
+        ttl = int(exp) - int(time.time())
+        if ttl <= 0:
+            return
+
+        self.add_local(jti, exp)
+        if digest is not None:
+            token_cache.set(digest, REVOKED)
+
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = redis_client.pipeline(transaction=False)
+        self._queue_revocation(pipe, jti, exp, ttl, digest)
+        if own_pipe:
+            pipe.execute()
+
+    async def revoke_async(self, jti: str, exp: int, digest: str | None = None, pipe=None):
+        """Async variant of `revoke` using the asyncio Redis client."""
+        ttl = int(exp) - int(time.time())
+        if ttl <= 0:
+            return
+
+        self.add_local(jti, exp)
+        if digest is not None:
+            token_cache.set(digest, REVOKED)
+
+        if pipe is not None:
+            self._queue_revocation(pipe, jti, exp, ttl, digest)
+            return
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            self._queue_revocation(pipe, jti, exp, ttl, digest)
+            await pipe.execute()
+
+    def _queue_revocation(self, pipe, jti: str, exp: int, ttl: int, digest: str | None):
+        bucket = self.bucket_for(exp)
+        bloom_key = f"{BLOOM_KEY_PREFIX}{bucket}"
+        pipe.set(f"revoked:{jti}", 1, ex=ttl)
+        for offset in self._filter(bucket).positions(jti):
+            pipe.setbit(bloom_key, offset, 1)
+        pipe.expireat(bloom_key, (bucket + 1) * self.bucket_seconds + BUCKET_GRACE_SECONDS)
+        pipe.publish(
+            TOKEN_INVALIDATION_CHANNEL,
+            json.dumps({"jti": jti, "exp": int(exp), "digest": digest}),
+        )
+
+    def is_revoked(self, jti: str, exp: int) -> bool:
+        """Return True if the token is revoked.
+
+        Only Bloom hits cost a Redis round-trip.
+        """
+        self.lookups += 1
+        if not self.might_be_revoked(jti, exp):
+            return False
+        self.bloom_hits += 1
+        revoked = bool(redis_client.exists(f"revoked:{jti}"))
+        self.confirmed += revoked
+        return revoked
+
+    async def is_revoked_async(self, jti: str, exp: int) -> bool:
+        """Async variant of `is_revoked`."""
+        self.lookups += 1
+        if not self.might_be_revoked(jti, exp):
+            return False
+        self.bloom_hits += 1
+        revoked = bool(await async_redis_client.exists(f"revoked:{jti}"))
+        self.confirmed += revoked
+        return revoked
+
+    def live_buckets(self, now: float) -> range:
+        """Buckets whose filter can still exist in Redis at `now`.
+
+        From the newest bucket still in its grace period to the one
+        holding tokens issued now.
+        """
+        return range(self.bucket_for(now - BUCKET_GRACE_SECONDS), self.bucket_for(now + self.max_token_seconds) + 1)
+
+    def sync(self):
+        """Merge the shared filters from Redis and drop expired buckets."""
+        now = time.time()
+        buckets = self.live_buckets(now)
+        raws = redis_bytes_client.mget([f"{BLOOM_KEY_PREFIX}{bucket}" for bucket in buckets])
+        for bucket, raw in zip(buckets, raws):
+            if raw:
+                self._filter(bucket).merge(raw)
+
+        with self._lock:
+            for bucket in list(self._filters):
+                if (bucket + 1) * self.bucket_seconds + BUCKET_GRACE_SECONDS < now:
+                    del self._filters[bucket]
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets = len(self._filters)
+        return {
+            "buckets": buckets,
+            "filter_bytes": buckets * self.size_bits // 8,
+            "hash_count": self.hash_count,
+            "lookups": self.lookups,
+            "bloom_hits": self.bloom_hits,
+            "confirmed": self.confirmed,
+        }
+
+
+def token_id(token: str, payload: dict) -> str:
+    """Return the revocation id of a token: its `jti`, or its digest for
+    tokens issued before `jti` was added."""
+    return payload.get("jti") or token_digest(token)
+
+
+class RevocationListener:
+    """Background thread keeping this worker's revocation state current.
+
+    Applies revocations published on the invalidation channel as they
+    arrive and runs a full `RevocationStore.sync` every `sync_seconds`.
+    If Redis is lost, the verified-token cache is cleared because
+    messages may have been missed.
+
+    Args:
+        store: Revocation store to update.
+        channel: Redis pub/sub channel carrying revocations.
+        sync_seconds: Interval between full filter syncs.
+        reconnect_delay: Seconds to wait before resubscribing.
+    """
+
+    def __init__(self, store: RevocationStore, channel: str, sync_seconds: int, reconnect_delay: float = 1.0):
+        self.store = store
+        self.channel = channel
+        self.sync_seconds = sync_seconds
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Load the current filters, then start the listener thread."""
+        if self._thread is not None:
+            return
+        try:
+            self.store.sync()
+        except Exception:
+            logger.warning("Initial revocation sync failed", exc_info=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="revocation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signal the listener thread to exit and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _apply(self, data: str):
+        message = json.loads(data)
+        self.store.add_local(message["jti"], message["exp"])
+        if message.get("digest"):
+            token_cache.set(message["digest"], REVOKED)
+
+    def _run(self):
+        while not self._stop.is_set():
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                # Resync after (re)subscribing to cover the gap
+                self.store.sync()
+                next_sync = time.monotonic() + self.sync_seconds
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self._apply(message["data"])
+                    if time.monotonic() >= next_sync:
+                        self.store.sync()
+                        next_sync = time.monotonic() + self.sync_seconds
+            except Exception:
+                logger.warning("Revocation listener lost Redis; clearing token cache", exc_info=True)
+                token_cache.clear()
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+revocation_store = RevocationStore(
+    bucket_seconds=REVOCATION_BUCKET_SECONDS,
+    expected_per_bucket=REVOCATION_EXPECTED_PER_BUCKET,
+    fp_rate=REVOCATION_FALSE_POSITIVE_RATE,
+    max_token_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+revocation_listener = RevocationListener(
+    revocation_store, TOKEN_INVALIDATION_CHANNEL, REVOCATION_SYNC_SECONDS
+)
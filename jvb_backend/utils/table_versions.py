@@ -0,0 +1,151 @@
+"""Per-table version counters in Redis.
+
+List endpoints derive their ETag / Last-Modified from a counter per
+table (`table_version:{table}`) instead of hashing the payload: a
+conditional `GET /items/` costs one Redis round-trip and no query when
+nothing changed.
+
+Writes bump the counters automatically. `VersionedSession` (the session
+class behind `SessionLocal` and `AsyncSessionLocal`) records which
+tables a transaction touched, through flushes and ORM bulk
+INSERT/UPDATE/DELETE statements alike, and bumps them after the commit.
+
+Design notes:
+ - A version is the commit time in microseconds, forced to grow by at
+   least 1 per bump (`max(now, current + 1)` in Lua). It doubles as the
+   table's Last-Modified time, and because it follows the clock it never
+   goes back to an old value after Redis loses the key.
+ - A missing counter is initialized to "now" on read: the first request
+   after a flush sees a fresh version, never a stale one.
+ - Bumps happen after COMMIT, so a reader can never see a new version
+   with old data. A reader can see new data with the old version; its
+   next request then misses and refetches.
+ - On the async path the bump is scheduled on the event loop rather than
+   run inside the commit, which executes in SQLAlchemy's greenlet bridge
+   where a blocking Redis call would stall the loop.
+ - A failed bump is logged; that table's list ETags stay on the old
+   version until the next successful write.
+"""
+
+import asyncio
+import logging
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.config import redis_client, async_redis_client
+from utils.metrics import traced_methods
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "table_version:"
+# `Session.info` key holding the tables changed in the current transaction
+CHANGED_TABLES = "changed_tables"
+
+# KEYS: counters to bump; ARGV: now in microseconds
+BUMP_SCRIPT = """
+local versions = {}
+for i, key in ipairs(KEYS) do
+    local version = math.max(tonumber(ARGV[1]), tonumber(redis.call('GET', key) or '0') + 1)
+    redis.call('SET', key, string.format('%d', version))
+    versions[i] = version
+end
+return versions
+"""
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+@traced_methods
+class TableVersions:
+    """Read and bump per-table versions.
+
+    Uses `redis_client` and `async_redis_client` from `utils.config`.
+    """
+
+    def __init__(self):
+        self._bump = redis_client.register_script(BUMP_SCRIPT)
+        self._bump_async = async_redis_client.register_script(BUMP_SCRIPT)
+
+    @staticmethod
+    def _queue_get(pipe, table: str):
+        pipe.set(KEY_PREFIX + table, _now_us(), nx=True)
+        pipe.get(KEY_PREFIX + table)
+
+    def get(self, table: str) -> int:
+        """Return the current version of `table` (one round-trip)."""
+        pipe = redis_client.pipeline(transaction=False)
+        self._queue_get(pipe, table)
+        return int(pipe.execute()[-1])
+
+    async def get_async(self, table: str) -> int:
+        """Async variant of `get`."""
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            self._queue_get(pipe, table)
+            return int((await pipe.execute())[-1])
+
+    def bump(self, tables) -> list[int]:
+        """Advance the version of every table in `tables`."""
+        tables = sorted(tables)
+        return self._bump(keys=[KEY_PREFIX + table for table in tables], args=[_now_us()])
+
+    async def bump_async(self, tables) -> list[int]:
+        """Async variant of `bump`."""
+        tables = sorted(tables)
+        return await self._bump_async(keys=[KEY_PREFIX + table for table in tables], args=[_now_us()])
+
+
+table_versions = TableVersions()
+
+# Scheduled async bumps, referenced until done so they are not collected
+_pending_bumps: set[asyncio.Task] = set()
+
+
+class VersionedSession(Session):
+    """Session that bumps `table_versions` for the tables it commits."""
+
+
+def _record(session: Session, table: str):
+    session.info.setdefault(CHANGED_TABLES, set()).add(table)
+
+
+@event.listens_for(VersionedSession, "after_flush")
+def _record_flushed(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        _record(session, instance.__table__.name)
+
+
+@event.listens_for(VersionedSession, "do_orm_execute")
+def _record_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _record(orm_execute_state.session, orm_execute_state.statement.table.name)
+
+
+@event.listens_for(VersionedSession, "after_rollback")
+def _forget_changes(session):
+    session.info.pop(CHANGED_TABLES, None)
+
+
+def _log_failed_bump(task: asyncio.Task):
+    _pending_bumps.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Table version bump failed", exc_info=task.exception())
+
+
+@event.listens_for(VersionedSession, "after_commit")
+def _bump_committed(session):
+    tables = session.info.pop(CHANGED_TABLES, None)
+    if not tables:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        try:
+            table_versions.bump(tables)
+        except Exception:
+            logger.warning("Table version bump failed for %s", sorted(tables), exc_info=True)
+        return
+    task = loop.create_task(table_versions.bump_async(tables))
+    _pending_bumps.add(task)
+    task.add_done_callback(_log_failed_bump)
@@ -0,0 +1,29 @@
+"""Per-worker cache of verified access-token payloads.
+
+`decode_token` is on every authenticated request. Without a cache each
+call costs a signature verify plus a revocation check for a token the
+worker has very likely seen seconds ago. This module keeps verified
+payloads in an `LRUTTLCache` keyed by a SHA-256 digest of the token, so
+a hot token verifies with no Redis call and no crypto.
+
+Revocation: revoking a token marks its digest `REVOKED` here, and the
+revocation listener (see `utils.revocation`) applies the same mark in
+every other worker. Marking (rather than deleting) means a verification
+that raced with the revocation cannot re-insert the payload afterwards,
+because payloads are only cached with `LRUTTLCache.add`. As a final
+safety net entries never outlive `TOKEN_CACHE_TTL_SECONDS`.
+"""
+
+import hashlib
+from utils.cache import LRUTTLCache
+from utils.config import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS
+
+token_cache = LRUTTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# Cached in place of a payload for tokens known to be revoked
+REVOKED = object()
+
+
+def token_digest(token: str) -> str:
+    """Return the cache key for a raw token (hex SHA-256)."""
+    return hashlib.sha256(token.encode()).hexdigest()
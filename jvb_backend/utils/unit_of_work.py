@@ -0,0 +1,151 @@
+"""Unit of work: one transaction per service operation.
+
+Repositories only `flush`: their statements run inside the session's
+current transaction, and generated values (ids, `updated_at`) are on the
+returned objects without a reload. The service operation that calls
+them owns the transaction and commits once at the end:
+
+    with transaction(db):
+        item = repo.create(name)
+
+    async with transaction(db):
+        item = await repo.create(name)
+
+The scope commits when the block exits normally and rolls back when it
+raises (an `HTTPException` included). Work that must only happen once
+the data is committed, such as writing a cache entry, is registered with
+`after_commit` and runs after the COMMIT. It is dropped on rollback.
+
+Design notes:
+ - The scope is per service operation rather than a request dependency,
+   so the CLI, imports and HTTP requests share it. A failing COMMIT (a
+   unique constraint, a deadlock) raises inside the service, before the
+   response is built.
+ - Scopes nest: an inner `transaction` on the same session joins the
+   outer one. Only the outermost commits, so a service can call other
+   services and still write everything in one transaction.
+ - Sessions are created with `expire_on_commit=False` (see database.py):
+   objects returned by repositories keep their loaded values after the
+   commit, so serializing them does not reload each row.
+ - Single-row INSERTs get their id from `RETURNING` where the backend
+   supports it (PostgreSQL, MariaDB, SQLite 3.35+) and from the
+   cursor's `lastrowid` otherwise (MySQL), in the same round-trip either
+   way. Defaults are computed in Python, so there is nothing else to
+   fetch back.
+ - A failing `after_commit` callback is logged and the others still
+   run: the data is committed by then, and callbacks only maintain
+   caches.
+ - Writes made outside any scope are never committed; closing the
+   session rolls them back.
+"""
+
+import inspect
+import logging
+from typing import Callable
+from utils.metrics import traced
+
+logger = logging.getLogger(__name__)
+
+# `Session.info` keys: nesting depth and callbacks waiting for the commit
+DEPTH = "unit_of_work_depth"
+AFTER_COMMIT = "after_commit"
+
+
+def after_commit(db, callback: Callable):
+    """Run `callback()` once the current unit of work on `db` commits.
+
+    Args:
+        db: Session or AsyncSession of the active unit of work.
+        callback: Called with no arguments; on an AsyncSession it may
+                  return an awaitable, which is awaited.
+    """
+    db.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+@traced("unit_of_work.commit")
+def _commit(db):
+    db.commit()
+
+
+@traced("unit_of_work.commit")
+async def _commit_async(db):
+    await db.commit()
+
+
+class UnitOfWork:
+    """Transaction scope over a session; see the module docstring.
+
+    Use `with` on a Session and `async with` on an AsyncSession.
+
+    Args:
+        db: The session the repositories of the operation share.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._outermost = False
+
+    def _enter(self):
+        depth = self.db.info.get(DEPTH, 0)
+        self.db.info[DEPTH] = depth + 1
+        self._outermost = depth == 0
+
+    def _leave(self) -> list[Callable] | None:
+        """Pop this scope; callbacks to run if it is the outermost."""
+        self.db.info[DEPTH] -= 1
+        if not self._outermost:
+            return None
+        return self.db.info.pop(AFTER_COMMIT, [])
+
+    def __enter__(self):
+        self._enter()
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        callbacks = self._leave()
+        if callbacks is None:
+            return False
+        if exc_type is not None:
+            self.db.rollback()
+            return False
+        try:
+            _commit(self.db)
+        except BaseException:
+            self.db.rollback()
+            raise
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.warning("after_commit callback %r failed", callback, exc_info=True)
+        return False
+
+    async def __aenter__(self):
+        self._enter()
+        return self.db
+
+    async def __aexit__(self, exc_type, exc, tb):
+        callbacks = self._leave()
+        if callbacks is None:
+            return False
+        if exc_type is not None:
+            await self.db.rollback()
+            return False
+        try:
+            await _commit_async(self.db)
+        except BaseException:
+            await self.db.rollback()
+            raise
+        for callback in callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.warning("after_commit callback %r failed", callback, exc_info=True)
+        return False
+
+
+def transaction(db) -> UnitOfWork:
+    """Unit of work over `db`: commit once at the end, or roll back."""
+    return UnitOfWork(db)